@@ -8,7 +8,12 @@ Each document type has its own specialized agent that handles:
 4. Producing the final output
 """
 
-from app.agents.base import BaseDocumentAgent
+from app.agents.base import (
+    BaseDocumentAgent,
+    SectionBudget,
+    StructuredResponseError,
+    parse_structured_response,
+)
 from app.agents.scenario_brief import ScenarioBriefAgent
 from app.agents.facilitator_guide import FacilitatorGuideAgent
 from app.agents.participant_handbook import ParticipantHandbookAgent
@@ -38,6 +43,9 @@ def get_agent_for_document_type(document_type: DocumentType) -> BaseDocumentAgen
 
 __all__ = [
     "BaseDocumentAgent",
+    "SectionBudget",
+    "StructuredResponseError",
+    "parse_structured_response",
     "ScenarioBriefAgent",
     "FacilitatorGuideAgent",
     "ParticipantHandbookAgent",
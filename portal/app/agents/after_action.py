@@ -2,7 +2,7 @@
 After Action Review Template document generation agent.
 """
 
-from app.agents.base import BaseDocumentAgent
+from app.agents.base import BaseDocumentAgent, SectionBudget
 from app.models.document import DocumentType
 
 
@@ -14,6 +14,13 @@ class AfterActionAgent(BaseDocumentAgent):
     post-exercise reviews and capturing lessons learned.
     """
 
+    # Ten sections of templates and tables need more than the default
+    # content budget
+    section_budgets = {
+        **BaseDocumentAgent.section_budgets,
+        "content": SectionBudget(tier="standard", max_tokens=6000),
+    }
+
     @property
     def document_type(self) -> DocumentType:
         return DocumentType.AFTER_ACTION_TEMPLATE
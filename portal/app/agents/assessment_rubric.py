@@ -2,7 +2,7 @@
 Assessment Rubric document generation agent.
 """
 
-from app.agents.base import BaseDocumentAgent
+from app.agents.base import BaseDocumentAgent, SectionBudget
 from app.models.document import DocumentType
 
 
@@ -14,6 +14,13 @@ class AssessmentRubricAgent(BaseDocumentAgent):
     performance and exercise outcomes.
     """
 
+    # The rubric matrix scores five competencies at every performance level,
+    # which needs more than the default content budget
+    section_budgets = {
+        **BaseDocumentAgent.section_budgets,
+        "content": SectionBudget(tier="standard", max_tokens=6000),
+    }
+
     @property
     def document_type(self) -> DocumentType:
         return DocumentType.ASSESSMENT_RUBRIC
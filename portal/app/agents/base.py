@@ -2,12 +2,36 @@
 Base document generation agent.
 """
 
+import asyncio
+import logging
+import re
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
-from typing import Optional
+from typing import AsyncIterator, Awaitable, Dict, List, Optional, Tuple
 
+from app.config import settings
 from app.models.tabletop import Tabletop
 from app.models.document import DocumentType
+from app.prompt import Prompt
+
+
+logger = logging.getLogger(__name__)
+
+# Document sections, in the order they are generated and tagged
+SECTIONS = ("description", "content", "learning_goals")
+
+
+@dataclass(frozen=True)
+class SectionBudget:
+    """Model tier and response limit of a section's LLM requests."""
+    tier: str  # "fast" or "standard", see settings.LLM_MODEL_TIERS
+    max_tokens: int
+
+
+DEFAULT_SECTION_BUDGET = SectionBudget(tier="standard", max_tokens=4000)
+
+# Tokens allowed for the section tags of a single-call response
+STRUCTURED_TAG_TOKENS = 50
 
 
 @dataclass
@@ -19,6 +43,54 @@ class DocumentContent:
     learning_goals: str
 
 
+async def gather_sections(*requests: Awaitable) -> list:
+    """
+    Await section requests concurrently and return their results in order.
+
+    Unlike asyncio.gather, the first failure cancels the requests still
+    running, since the document has failed and their tokens would be
+    wasted, and is raised as is rather than in an ExceptionGroup.
+    """
+    try:
+        async with asyncio.TaskGroup() as group:
+            tasks = [group.create_task(request) for request in requests]
+    except ExceptionGroup as e:
+        raise e.exceptions[0]
+    return [task.result() for task in tasks]
+
+
+class StructuredResponseError(ValueError):
+    """Raised when a single-call response does not contain every section exactly once."""
+
+
+def parse_structured_response(text: str) -> Tuple[str, str, str]:
+    """
+    Split a tagged single-call response into its sections.
+
+    Args:
+        text: Response containing <description>, <content> and
+            <learning_goals> elements
+
+    Returns:
+        The description, content and learning goals, stripped
+
+    Raises:
+        StructuredResponseError: If a section is missing, repeated or empty
+    """
+    sections = []
+    for section in SECTIONS:
+        matches = re.findall(rf"<{section}>(.*?)</{section}>", text, re.DOTALL)
+        if len(matches) != 1:
+            raise StructuredResponseError(
+                f"Expected one <{section}> section, found {len(matches)}"
+            )
+        value = matches[0].strip()
+        if not value:
+            raise StructuredResponseError(f"The <{section}> section is empty")
+        sections.append(value)
+    return tuple(sections)
+
+
 class BaseDocumentAgent(ABC):
     """
     Base class for document generation agents.
@@ -30,6 +102,22 @@ class BaseDocumentAgent(ABC):
     3. Define learning goals
     """
 
+    # Ask for all sections in one tagged response: True or False to decide
+    # for this agent, None to follow settings.AGENT_STRUCTURED_PROVIDERS
+    structured_generation: Optional[bool] = None
+    # Response budget of the single call, which holds all three sections
+    # (None = the section budgets combined, see structured_budget())
+    structured_max_tokens: Optional[int] = None
+
+    # The description is 2-3 sentences and the learning goals a short list,
+    # so both go to the fast tier with tight limits; only the content needs
+    # the standard model and the full budget
+    section_budgets: Dict[str, SectionBudget] = {
+        "description": SectionBudget(tier="fast", max_tokens=300),
+        "content": DEFAULT_SECTION_BUDGET,
+        "learning_goals": SectionBudget(tier="fast", max_tokens=600),
+    }
+
     def __init__(self):
         self.name = self.__class__.__name__
 
@@ -85,51 +173,89 @@ class BaseDocumentAgent(ABC):
 
         return "\n".join(context_parts)
 
-    def generate_description_prompt(self, tabletop: Tabletop) -> str:
-        """Generate prompt for creating document description."""
-        context = self.build_context(tabletop)
-        return f"""
-{self.role_description}
+    def prompt_prefix(self, tabletop: Tabletop) -> Tuple[str, str]:
+        """
+        Build the blocks every section prompt starts with.
 
-Based on the following tabletop exercise information, write a brief description
-(2-3 sentences) of what this {self.document_purpose} will contain and how it
-will be used.
+        The tabletop context comes first since it is the same for every
+        agent, followed by this agent's role, which is the same for all of
+        its sections. Only the instructions after them vary, so providers
+        can reuse the prefix from their prompt cache.
+        """
+        context_block = f"""The following information describes a tabletop exercise.
 
-{context}
+{self.build_context(tabletop)}"""
+        role_block = f"""{self.role_description}
 
-Write ONLY the description, nothing else.
-"""
+You are writing a {self.document_purpose} based on the tabletop exercise information above."""
+        return context_block, role_block
 
-    def generate_content_prompt(self, tabletop: Tabletop) -> str:
-        """Generate prompt for creating main document content."""
-        context = self.build_context(tabletop)
-        return f"""
-{self.role_description}
+    def description_instructions(self) -> str:
+        """Instructions for creating the document description."""
+        return f"""Write a brief description (2-3 sentences) of what this {self.document_purpose}
+will contain and how it will be used.
 
-Based on the following tabletop exercise information, create the main content
-for a {self.document_purpose}.
+Write ONLY the description, nothing else."""
 
-{context}
+    def content_instructions(self) -> str:
+        """Instructions for creating the main document content."""
+        return f"""Create the main content for the {self.document_purpose}.
 
-{self.get_content_guidelines()}
+{self.get_content_guidelines().strip()}
 
-Create comprehensive, well-structured content. Use markdown formatting.
-"""
+Create comprehensive, well-structured content. Use markdown formatting."""
 
-    def generate_learning_goals_prompt(self, tabletop: Tabletop) -> str:
-        """Generate prompt for creating learning goals."""
-        context = self.build_context(tabletop)
-        return f"""
-{self.role_description}
+    def learning_goals_instructions(self) -> str:
+        """Instructions for creating the learning goals."""
+        return f"""Create a list of learning goals for this {self.document_purpose}.
 
-Based on the following tabletop exercise information, create a list of
-learning goals for this {self.document_purpose}.
+Create 4-6 specific, measurable learning objectives. Format as a numbered list.
+Each goal should describe what participants will learn, understand, or be able to do."""
+
+    def structured_instructions(self) -> str:
+        """Instructions for creating all sections in a single tagged response."""
+        return f"""Write all three parts of the {self.document_purpose} in a single response.
+
+Part 1, the description:
+{self.description_instructions()}
+
+Part 2, the main content:
+{self.content_instructions()}
+
+Part 3, the learning goals:
+{self.learning_goals_instructions()}
+
+Wrap each part in its tag, in this order, and write nothing outside the tags:
+<description>...</description>
+<content>...</content>
+<learning_goals>...</learning_goals>"""
+
+    def generate_structured_prompt(self, tabletop: Tabletop) -> Prompt:
+        """Generate prompt for creating all sections in one call."""
+        return Prompt(self.prompt_prefix(tabletop), self.structured_instructions())
+
+    def use_structured_generation(self, llm_service: "LLMService") -> bool:
+        """Whether generate() asks for all sections in one call by default."""
+        if self.structured_generation is not None:
+            return self.structured_generation
+        providers = {
+            name.strip().lower()
+            for name in settings.AGENT_STRUCTURED_PROVIDERS.split(",")
+            if name.strip()
+        }
+        return llm_service.provider_name in providers
+
+    def generate_description_prompt(self, tabletop: Tabletop) -> Prompt:
+        """Generate prompt for creating document description."""
+        return Prompt(self.prompt_prefix(tabletop), self.description_instructions())
 
-{context}
+    def generate_content_prompt(self, tabletop: Tabletop) -> Prompt:
+        """Generate prompt for creating main document content."""
+        return Prompt(self.prompt_prefix(tabletop), self.content_instructions())
 
-Create 4-6 specific, measurable learning objectives. Format as a numbered list.
-Each goal should describe what participants will learn, understand, or be able to do.
-"""
+    def generate_learning_goals_prompt(self, tabletop: Tabletop) -> Prompt:
+        """Generate prompt for creating learning goals."""
+        return Prompt(self.prompt_prefix(tabletop), self.learning_goals_instructions())
 
     @abstractmethod
     def get_content_guidelines(self) -> str:
@@ -139,32 +265,82 @@ Each goal should describe what participants will learn, understand, or be able t
     async def generate(
         self,
         tabletop: Tabletop,
-        llm_service: "LLMService"
+        llm_service: "LLMService",
+        parallel: Optional[bool] = None,
+        section_timeout: Optional[float] = None,
+        structured: Optional[bool] = None,
+        use_cache: Optional[bool] = None,
     ) -> DocumentContent:
         """
         Generate all document content sections.
 
+        The description, content and learning goals prompts do not depend on
+        each other, so by default they are sent to the LLM at the same time.
+        In structured mode a single call returns all three as tagged
+        sections instead; if that call fails or its response cannot be
+        parsed, the sections are generated separately as usual.
+
         Args:
             tabletop: The tabletop exercise to generate content for
             llm_service: The LLM service for generating content
+            parallel: Generate the sections concurrently
+                (defaults to settings.AGENT_PARALLEL_SECTIONS)
+            section_timeout: Timeout in seconds for each section, 0 for none
+                (defaults to settings.AGENT_SECTION_TIMEOUT)
+            structured: Generate all sections in one call
+                (defaults to use_structured_generation())
+            use_cache: Read cached LLM responses (defaults to the LLM
+                service setting)
 
         Returns:
             DocumentContent with all sections populated
         """
+        if parallel is None:
+            parallel = settings.AGENT_PARALLEL_SECTIONS
+        if section_timeout is None:
+            section_timeout = settings.AGENT_SECTION_TIMEOUT
+        if structured is None:
+            structured = self.use_structured_generation(llm_service)
+
         # Generate title
         title = self.generate_title(tabletop)
 
-        # Generate description
-        description_prompt = self.generate_description_prompt(tabletop)
-        description = await llm_service.generate(description_prompt)
-
-        # Generate main content
-        content_prompt = self.generate_content_prompt(tabletop)
-        content = await llm_service.generate(content_prompt)
-
-        # Generate learning goals
-        goals_prompt = self.generate_learning_goals_prompt(tabletop)
-        learning_goals = await llm_service.generate(goals_prompt)
+        if structured:
+            try:
+                response = await self._generate_section(
+                    llm_service,
+                    "all sections",
+                    self.generate_structured_prompt(tabletop),
+                    self.structured_timeout(section_timeout),
+                    max_tokens=self.structured_budget(),
+                    task=self.llm_task("structured"),
+                    use_cache=use_cache,
+                )
+                description, content, learning_goals = parse_structured_response(response)
+                return DocumentContent(
+                    title=title,
+                    description=description,
+                    content=content,
+                    learning_goals=learning_goals,
+                )
+            except Exception as e:
+                # An unparseable response, a provider error or a timeout
+                logger.warning(
+                    "%s: falling back to one call per section: %s", self.name, e
+                )
+
+        sections = self.section_prompts(tabletop)
+
+        if parallel:
+            description, content, learning_goals = await gather_sections(*[
+                self._generate_section(llm_service, name, prompt, section_timeout, use_cache=use_cache)
+                for name, prompt in sections
+            ])
+        else:
+            description, content, learning_goals = [
+                await self._generate_section(llm_service, name, prompt, section_timeout, use_cache=use_cache)
+                for name, prompt in sections
+            ]
 
         return DocumentContent(
             title=title,
@@ -173,6 +349,159 @@ Each goal should describe what participants will learn, understand, or be able t
             learning_goals=learning_goals,
         )
 
+    def section_prompts(self, tabletop: Tabletop) -> List[Tuple[str, Prompt]]:
+        """The (section, prompt) pairs generated for a document, in order."""
+        prefix = self.prompt_prefix(tabletop)
+        return [
+            ("description", Prompt(prefix, self.description_instructions())),
+            ("content", Prompt(prefix, self.content_instructions())),
+            ("learning_goals", Prompt(prefix, self.learning_goals_instructions())),
+        ]
+
+    async def stream(
+        self,
+        tabletop: Tabletop,
+        llm_service: "LLMService",
+        parallel: Optional[bool] = None,
+        section_timeout: Optional[float] = None,
+    ) -> AsyncIterator[Tuple[str, str]]:
+        """
+        Generate all document sections, yielding text as it arrives.
+
+        Sections are always requested separately here, since a tagged
+        single-call response could only be validated once it is complete.
+
+        Args:
+            tabletop: The tabletop exercise to generate content for
+            llm_service: The LLM service for generating content
+            parallel: Stream the sections concurrently
+                (defaults to settings.AGENT_PARALLEL_SECTIONS)
+            section_timeout: Timeout in seconds for each section, 0 for none
+                (defaults to settings.AGENT_SECTION_TIMEOUT)
+
+        Yields:
+            (section, text) pairs, where section is "description", "content"
+            or "learning_goals". Parallel sections are interleaved.
+        """
+        if parallel is None:
+            parallel = settings.AGENT_PARALLEL_SECTIONS
+        if section_timeout is None:
+            section_timeout = settings.AGENT_SECTION_TIMEOUT
+
+        queue: asyncio.Queue = asyncio.Queue()
+        sections = self.section_prompts(tabletop)
+
+        async def produce():
+            if parallel:
+                await gather_sections(*[
+                    self._stream_section(llm_service, name, prompt, section_timeout, queue)
+                    for name, prompt in sections
+                ])
+            else:
+                for name, prompt in sections:
+                    await self._stream_section(llm_service, name, prompt, section_timeout, queue)
+
+        producer = asyncio.create_task(produce())
+        producer.add_done_callback(lambda _: queue.put_nowait(None))
+
+        try:
+            while True:
+                item = await queue.get()
+                if item is None:
+                    break
+                yield item
+            # Re-raise any section error
+            producer.result()
+        finally:
+            producer.cancel()
+
+    async def _stream_section(
+        self,
+        llm_service: "LLMService",
+        section: str,
+        prompt: Prompt,
+        timeout: float,
+        queue: asyncio.Queue,
+    ) -> None:
+        """Stream a single section into the queue, enforcing the section timeout."""
+        budget = self.section_budget(section)
+
+        async def pump():
+            async for text in llm_service.stream(
+                prompt,
+                budget.max_tokens,
+                task=self.llm_task(section),
+                tier=budget.tier,
+            ):
+                await queue.put((section, text))
+
+        if not timeout:
+            return await pump()
+        try:
+            await asyncio.wait_for(pump(), timeout)
+        except asyncio.TimeoutError:
+            raise TimeoutError(
+                f"{self.name} timed out generating {section.replace('_', ' ')} after {timeout:g} seconds"
+            )
+
+    async def _generate_section(
+        self,
+        llm_service: "LLMService",
+        section: str,
+        prompt: Prompt,
+        timeout: float,
+        max_tokens: Optional[int] = None,
+        task: Optional[str] = None,
+        use_cache: Optional[bool] = None,
+    ) -> str:
+        """Generate a single section within its budget, enforcing the section timeout."""
+        budget = self.section_budget(section)
+        request = llm_service.generate(
+            prompt,
+            max_tokens or budget.max_tokens,
+            use_cache=use_cache,
+            task=task or self.llm_task(section),
+            tier=budget.tier,
+        )
+        if not timeout:
+            return await request
+        try:
+            return await asyncio.wait_for(request, timeout)
+        except asyncio.TimeoutError:
+            raise TimeoutError(
+                f"{self.name} timed out generating {section.replace('_', ' ')} after {timeout:g} seconds"
+            )
+
+    def section_budget(self, section: str) -> SectionBudget:
+        """Model tier and max_tokens of a section's LLM requests."""
+        return self.section_budgets.get(section, DEFAULT_SECTION_BUDGET)
+
+    def structured_budget(self) -> int:
+        """
+        max_tokens of the single-call request.
+
+        A response cut off before its last tag cannot be parsed and falls
+        back to one call per section, so by default the single call gets
+        every section's budget plus room for the tags.
+        """
+        if self.structured_max_tokens is not None:
+            return self.structured_max_tokens
+        return sum(self.section_budget(section).max_tokens for section in SECTIONS) + STRUCTURED_TAG_TOKENS
+
+    def structured_timeout(self, section_timeout: float) -> float:
+        """
+        Timeout of the single-call request, 0 for none.
+
+        The section timeout has to cover the largest section, and the single
+        call writes every section, so it gets proportionally longer.
+        """
+        largest = max(self.section_budget(section).max_tokens for section in SECTIONS)
+        return section_timeout * self.structured_budget() / largest
+
+    def llm_task(self, section: str) -> str:
+        """Name of a section's LLM requests, matched by settings.LLM_ROUTE_OVERRIDES."""
+        return f"{self.document_type.value}.{section}"
+
     def generate_title(self, tabletop: Tabletop) -> str:
         """Generate document title based on tabletop and document type."""
         doc_type_name = self.document_type.value.replace("_", " ").title()
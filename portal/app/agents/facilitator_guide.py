@@ -2,7 +2,7 @@
 Facilitator Guide document generation agent.
 """
 
-from app.agents.base import BaseDocumentAgent
+from app.agents.base import BaseDocumentAgent, SectionBudget
 from app.models.document import DocumentType
 
 
@@ -14,6 +14,12 @@ class FacilitatorGuideAgent(BaseDocumentAgent):
     they need to effectively run the tabletop exercise.
     """
 
+    # Nine sections of guidance need more than the default content budget
+    section_budgets = {
+        **BaseDocumentAgent.section_budgets,
+        "content": SectionBudget(tier="standard", max_tokens=6000),
+    }
+
     @property
     def document_type(self) -> DocumentType:
         return DocumentType.FACILITATOR_GUIDE
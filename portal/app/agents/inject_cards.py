@@ -2,7 +2,7 @@
 Inject Cards document generation agent.
 """
 
-from app.agents.base import BaseDocumentAgent
+from app.agents.base import BaseDocumentAgent, SectionBudget
 from app.models.document import DocumentType
 
 
@@ -14,6 +14,12 @@ class InjectCardsAgent(BaseDocumentAgent):
     introduced during the exercise to challenge participants.
     """
 
+    # 8-12 cards of several paragraphs each need more than the default content budget
+    section_budgets = {
+        **BaseDocumentAgent.section_budgets,
+        "content": SectionBudget(tier="standard", max_tokens=8000),
+    }
+
     @property
     def document_type(self) -> DocumentType:
         return DocumentType.INJECT_CARDS
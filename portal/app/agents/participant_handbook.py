@@ -2,7 +2,7 @@
 Participant Handbook document generation agent.
 """
 
-from app.agents.base import BaseDocumentAgent
+from app.agents.base import BaseDocumentAgent, SectionBudget
 from app.models.document import DocumentType
 
 
@@ -14,6 +14,12 @@ class ParticipantHandbookAgent(BaseDocumentAgent):
     information, their roles, and reference materials.
     """
 
+    # Eight short reference sections fit the default content budget
+    section_budgets = {
+        **BaseDocumentAgent.section_budgets,
+        "content": SectionBudget(tier="standard", max_tokens=4000),
+    }
+
     @property
     def document_type(self) -> DocumentType:
         return DocumentType.PARTICIPANT_HANDBOOK
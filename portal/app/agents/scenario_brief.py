@@ -2,7 +2,7 @@
 Scenario Brief document generation agent.
 """
 
-from app.agents.base import BaseDocumentAgent
+from app.agents.base import BaseDocumentAgent, SectionBudget
 from app.models.document import DocumentType
 
 
@@ -15,6 +15,12 @@ class ScenarioBriefAgent(BaseDocumentAgent):
     and initial situation.
     """
 
+    # Seven narrative sections fit the default content budget
+    section_budgets = {
+        **BaseDocumentAgent.section_budgets,
+        "content": SectionBudget(tier="standard", max_tokens=4000),
+    }
+
     @property
     def document_type(self) -> DocumentType:
         return DocumentType.SCENARIO_BRIEF
@@ -0,0 +1,30 @@
+"""
+Administration API routes.
+"""
+
+from fastapi import APIRouter, Depends
+
+from app.models.user import User
+from app.security import get_current_admin_user, get_password_hasher
+from app.services.llm_metrics import get_llm_metrics
+from app.services.llm_policy import get_provider_health
+from app.services.pdf_service import get_pdf_render_pool
+from app.services.rate_limiter import get_rate_limit_scheduler
+
+router = APIRouter()
+
+
+@router.get("/metrics")
+async def get_metrics(current_user: User = Depends(get_current_admin_user)):
+    """
+    Get the queue depths, LLM usage, rate limits and provider health (admin only).
+    """
+    return {
+        "queues": {
+            "password_hashing": get_password_hasher().queue_depth,
+            "pdf_rendering": get_pdf_render_pool().queue_depth,
+        },
+        "llm_usage": get_llm_metrics().snapshot(),
+        "llm_rate_limits": get_rate_limit_scheduler().snapshot(),
+        "llm_providers": get_provider_health().snapshot(),
+    }
@@ -9,13 +9,13 @@ from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
 
 from app.config import settings
-from app.database import get_db
+from app.database import AsyncDB, get_async_db
 from app.models.user import User
 from app.schemas.user import UserCreate, UserResponse, Token
 from app.security import (
-    authenticate_user,
+    authenticate_user_async,
     create_access_token,
-    get_password_hash,
+    get_password_hasher,
     get_current_user,
 )
 
@@ -23,8 +23,17 @@ router = APIRouter()
 
 
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-def register(user_data: UserCreate, db: Session = Depends(get_db)):
+async def register(user_data: UserCreate, db: AsyncDB = Depends(get_async_db)):
     """Register a new administrator account."""
+    await db.run(_check_available, user_data)
+
+    # Hash in the password hasher's threads, not the shared threadpool
+    hashed_password = await get_password_hasher().hash(user_data.password)
+
+    return await db.run(_create_user, user_data, hashed_password)
+
+
+def _check_available(db: Session, user_data: UserCreate) -> None:
     # Check if username exists
     existing_user = db.query(User).filter(User.username == user_data.username).first()
     if existing_user:
@@ -41,12 +50,13 @@ def register(user_data: UserCreate, db: Session = Depends(get_db)):
             detail="Email already registered"
         )
 
-    # Create new user
+
+def _create_user(db: Session, user_data: UserCreate, hashed_password: str) -> User:
     db_user = User(
         email=user_data.email,
         username=user_data.username,
         full_name=user_data.full_name,
-        hashed_password=get_password_hash(user_data.password),
+        hashed_password=hashed_password,
         is_admin=True,  # All registered users are admins in this system
     )
     db.add(db_user)
@@ -57,12 +67,12 @@ def register(user_data: UserCreate, db: Session = Depends(get_db)):
 
 
 @router.post("/login", response_model=Token)
-def login(
+async def login(
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db)
+    db: AsyncDB = Depends(get_async_db)
 ):
     """Login and receive an access token."""
-    user = authenticate_user(db, form_data.username, form_data.password)
+    user = await authenticate_user_async(db, form_data.username, form_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -2,50 +2,34 @@
 Document generation API routes.
 """
 
+import json
 from typing import List
 
-from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import FileResponse, StreamingResponse
 from sqlalchemy.orm import Session
 
-from app.database import get_db
+from app.database import AsyncDB, get_async_db
 from app.models.user import User
-from app.models.tabletop import Tabletop
-from app.models.document import Document, DocumentType, DocumentStatus
+from app.models.document import Document, DocumentType
 from app.schemas.document import (
     DocumentCreate,
     DocumentResponse,
+    DocumentJobResponse,
     DocumentListResponse,
     DocumentGenerateRequest,
 )
+from app.repositories import document as document_queries
+from app.repositories import tabletop as tabletop_queries
 from app.security import get_current_user
 from app.services.document_service import DocumentGenerationService
+from app.services.artifact_store import get_artifact_store
+from app.services.job_queue import get_job_queue
+from app.services.rate_limiter import Priority
 
 router = APIRouter()
 
 
-async def generate_document_task(
-    db_url: str,
-    tabletop_id: int,
-    document_type: DocumentType,
-):
-    """Background task for document generation."""
-    from sqlalchemy import create_engine
-    from sqlalchemy.orm import sessionmaker
-
-    engine = create_engine(db_url)
-    SessionLocal = sessionmaker(bind=engine)
-    db = SessionLocal()
-
-    try:
-        tabletop = db.query(Tabletop).filter(Tabletop.id == tabletop_id).first()
-        if tabletop:
-            service = DocumentGenerationService()
-            await service.generate_document(db, tabletop, document_type)
-    finally:
-        db.close()
-
-
 @router.get("/types", response_model=List[dict])
 def list_document_types(current_user: User = Depends(get_current_user)):
     """List all available document types."""
@@ -62,31 +46,34 @@ def list_document_types(current_user: User = Depends(get_current_user)):
 
 
 @router.get("/tabletop/{tabletop_id}", response_model=List[DocumentListResponse])
-def list_tabletop_documents(
+async def list_tabletop_documents(
     tabletop_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncDB = Depends(get_async_db),
     current_user: User = Depends(get_current_user),
 ):
     """List all documents for a tabletop."""
-    tabletop = db.query(Tabletop).filter(
-        Tabletop.id == tabletop_id,
-        Tabletop.creator_id == current_user.id,
-    ).first()
+    documents = await db.run(
+        document_queries.list_tabletop_documents, tabletop_id, current_user.id
+    )
 
-    if not tabletop:
+    if documents is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Tabletop not found"
         )
 
-    return tabletop.documents
+    return documents
 
 
-@router.post("/tabletop/{tabletop_id}/generate", response_model=List[DocumentResponse])
+@router.post(
+    "/tabletop/{tabletop_id}/generate",
+    response_model=List[DocumentJobResponse],
+    status_code=status.HTTP_202_ACCEPTED,
+)
 async def generate_documents(
     tabletop_id: int,
     request: DocumentGenerateRequest,
-    db: Session = Depends(get_db),
+    db: AsyncDB = Depends(get_async_db),
     current_user: User = Depends(get_current_user),
 ):
     """
@@ -99,11 +86,14 @@ async def generate_documents(
     - inject_cards: Creates unexpected event cards
     - assessment_rubric: Creates evaluation criteria
     - after_action_template: Creates post-exercise review template
+
+    Documents are queued and generated by the document worker. The response
+    returns immediately with one job per document; poll the documents to
+    follow their status.
     """
-    tabletop = db.query(Tabletop).filter(
-        Tabletop.id == tabletop_id,
-        Tabletop.creator_id == current_user.id,
-    ).first()
+    tabletop = await db.run(
+        tabletop_queries.get_tabletop, tabletop_id, current_user.id, with_questions=True
+    )
 
     if not tabletop:
         raise HTTPException(
@@ -117,26 +107,68 @@ async def generate_documents(
             detail="Cannot generate documents until all questions are answered"
         )
 
-    service = DocumentGenerationService()
-    documents = await service.generate_all_documents(
-        db, tabletop, request.document_types
+    return await db.run(
+        get_job_queue().enqueue, tabletop, request.document_types, Priority.BULK
     )
 
-    return documents
-
 
-@router.post("/tabletop/{tabletop_id}/generate/{document_type}", response_model=DocumentResponse)
+@router.post(
+    "/tabletop/{tabletop_id}/generate/{document_type}",
+    response_model=DocumentJobResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+)
 async def generate_single_document(
     tabletop_id: int,
     document_type: DocumentType,
-    db: Session = Depends(get_db),
+    db: AsyncDB = Depends(get_async_db),
     current_user: User = Depends(get_current_user),
 ):
-    """Generate a single document type for a tabletop."""
-    tabletop = db.query(Tabletop).filter(
-        Tabletop.id == tabletop_id,
-        Tabletop.creator_id == current_user.id,
-    ).first()
+    """Queue generation of a single document type for a tabletop."""
+    tabletop = await db.run(
+        tabletop_queries.get_tabletop, tabletop_id, current_user.id, with_questions=True
+    )
+
+    if not tabletop:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Tabletop not found"
+        )
+
+    if not tabletop.is_complete:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cannot generate documents until all questions are answered"
+        )
+
+    documents = await db.run(
+        get_job_queue().enqueue, tabletop, [document_type], Priority.INTERACTIVE
+    )
+
+    return documents[0]
+
+
+@router.post("/tabletop/{tabletop_id}/generate/{document_type}/stream")
+async def stream_single_document(
+    tabletop_id: int,
+    document_type: DocumentType,
+    db: AsyncDB = Depends(get_async_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Generate a single document, streaming progress as Server-Sent Events.
+
+    Events:
+    - status: {"document_id", "status", "error_message"} when generation
+      starts and when it completes or fails
+    - token: {"section", "text"} for each piece of generated content, where
+      section is description, content or learning_goals
+
+    Responds with 409 if the document is already being generated, by the
+    worker, a batch run or another stream.
+    """
+    tabletop = await db.run(
+        tabletop_queries.get_tabletop, tabletop_id, current_user.id, with_questions=True
+    )
 
     if not tabletop:
         raise HTTPException(
@@ -151,22 +183,35 @@ async def generate_single_document(
         )
 
     service = DocumentGenerationService()
-    document = await service.generate_document(db, tabletop, document_type)
+    document = await db.run(service.claim_document, tabletop, document_type)
 
-    return document
+    if document is None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Document is already being generated"
+        )
+
+    async def event_stream():
+        async for event in service.stream_document(document.id):
+            yield f"event: {event['event']}\ndata: {json.dumps(event['data'])}\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @router.get("/{document_id}", response_model=DocumentResponse)
-def get_document(
+async def get_document(
     document_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncDB = Depends(get_async_db),
     current_user: User = Depends(get_current_user),
 ):
     """Get a specific document by ID."""
-    document = db.query(Document).join(Tabletop).filter(
-        Document.id == document_id,
-        Tabletop.creator_id == current_user.id,
-    ).first()
+    document = await db.run(
+        document_queries.get_user_document, document_id, current_user.id
+    )
 
     if not document:
         raise HTTPException(
@@ -178,16 +223,15 @@ def get_document(
 
 
 @router.get("/{document_id}/download")
-def download_document(
+async def download_document(
     document_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncDB = Depends(get_async_db),
     current_user: User = Depends(get_current_user),
 ):
     """Download the PDF file for a document."""
-    document = db.query(Document).join(Tabletop).filter(
-        Document.id == document_id,
-        Tabletop.creator_id == current_user.id,
-    ).first()
+    document = await db.run(
+        document_queries.get_user_document, document_id, current_user.id
+    )
 
     if not document:
         raise HTTPException(
@@ -208,17 +252,20 @@ def download_document(
     )
 
 
-@router.post("/{document_id}/regenerate", response_model=DocumentResponse)
+@router.post(
+    "/{document_id}/regenerate",
+    response_model=DocumentJobResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+)
 async def regenerate_document(
     document_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncDB = Depends(get_async_db),
     current_user: User = Depends(get_current_user),
 ):
-    """Regenerate a document with updated content."""
-    document = db.query(Document).join(Tabletop).filter(
-        Document.id == document_id,
-        Tabletop.creator_id == current_user.id,
-    ).first()
+    """Queue regeneration of a document with new content, bypassing the LLM cache."""
+    document = await db.run(
+        document_queries.get_user_document, document_id, current_user.id, with_tabletop=True
+    )
 
     if not document:
         raise HTTPException(
@@ -226,23 +273,27 @@ async def regenerate_document(
             detail="Document not found"
         )
 
-    service = DocumentGenerationService()
-    updated_document = await service.regenerate_document(db, document)
+    documents = await db.run(
+        get_job_queue().enqueue,
+        document.tabletop,
+        [document.document_type],
+        Priority.INTERACTIVE,
+        use_cache=False,
+    )
 
-    return updated_document
+    return documents[0]
 
 
 @router.delete("/{document_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_document(
+async def delete_document(
     document_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncDB = Depends(get_async_db),
     current_user: User = Depends(get_current_user),
 ):
     """Delete a document."""
-    document = db.query(Document).join(Tabletop).filter(
-        Document.id == document_id,
-        Tabletop.creator_id == current_user.id,
-    ).first()
+    document = await db.run(
+        document_queries.get_user_document, document_id, current_user.id
+    )
 
     if not document:
         raise HTTPException(
@@ -250,11 +301,12 @@ def delete_document(
             detail="Document not found"
         )
 
-    # Delete PDF file if exists
-    if document.pdf_file_path:
-        import os
-        if os.path.exists(document.pdf_file_path):
-            os.remove(document.pdf_file_path)
+    await db.run(_delete_document, document)
+
+
+def _delete_document(db: Session, document: Document) -> None:
+    # Drop the document's reference to its PDF; shared files are kept
+    get_artifact_store().detach(db, document)
 
     db.delete(document)
     db.commit()
@@ -2,9 +2,9 @@
 Tabletop exercise API routes.
 """
 
-from typing import List
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlalchemy.orm import Session
 
 from app.database import get_db
@@ -18,6 +18,8 @@ from app.schemas.tabletop import (
     QuestionAnswer,
     TabletopQuestionResponse,
 )
+from app.repositories import tabletop as tabletop_queries
+from app.repositories.pagination import NEXT_CURSOR_HEADER, InvalidCursorError
 from app.security import get_current_user
 
 router = APIRouter()
@@ -66,20 +68,39 @@ def create_tabletop(
 
 @router.get("/", response_model=List[TabletopListResponse])
 def list_tabletops(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     status_filter: TabletopStatus = None,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """List all tabletops for the current user."""
-    query = db.query(Tabletop).filter(Tabletop.creator_id == current_user.id)
+    """
+    List all tabletops for the current user, newest first.
 
-    if status_filter:
-        query = query.filter(Tabletop.status == status_filter)
+    When more tabletops follow, the X-Next-Cursor response header holds a
+    cursor; pass it back as ?cursor= to get the next page. Cursor pages stay
+    fast however deep they go, unlike ?skip=.
+    """
+    try:
+        page = tabletop_queries.list_tabletop_summaries(
+            db,
+            current_user.id,
+            status=status_filter,
+            skip=skip,
+            limit=limit,
+            cursor=cursor,
+        )
+    except InvalidCursorError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
 
-    tabletops = query.order_by(Tabletop.created_at.desc()).offset(skip).limit(limit).all()
-    return tabletops
+    if page.next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = page.next_cursor
+    return page.items
 
 
 @router.get("/{tabletop_id}", response_model=TabletopResponse)
@@ -89,10 +110,9 @@ def get_tabletop(
     current_user: User = Depends(get_current_user)
 ):
     """Get a specific tabletop by ID."""
-    tabletop = db.query(Tabletop).filter(
-        Tabletop.id == tabletop_id,
-        Tabletop.creator_id == current_user.id
-    ).first()
+    tabletop = tabletop_queries.get_tabletop(
+        db, tabletop_id, current_user.id, with_questions=True
+    )
 
     if not tabletop:
         raise HTTPException(
@@ -111,10 +131,9 @@ def update_tabletop(
     current_user: User = Depends(get_current_user)
 ):
     """Update a tabletop's basic information."""
-    tabletop = db.query(Tabletop).filter(
-        Tabletop.id == tabletop_id,
-        Tabletop.creator_id == current_user.id
-    ).first()
+    tabletop = tabletop_queries.get_tabletop(
+        db, tabletop_id, current_user.id
+    )
 
     if not tabletop:
         raise HTTPException(
@@ -138,10 +157,9 @@ def delete_tabletop(
     current_user: User = Depends(get_current_user)
 ):
     """Delete a tabletop and all associated data."""
-    tabletop = db.query(Tabletop).filter(
-        Tabletop.id == tabletop_id,
-        Tabletop.creator_id == current_user.id
-    ).first()
+    tabletop = tabletop_queries.get_tabletop(
+        db, tabletop_id, current_user.id
+    )
 
     if not tabletop:
         raise HTTPException(
@@ -162,10 +180,9 @@ def get_tabletop_questions(
     current_user: User = Depends(get_current_user)
 ):
     """Get all questions for a tabletop."""
-    tabletop = db.query(Tabletop).filter(
-        Tabletop.id == tabletop_id,
-        Tabletop.creator_id == current_user.id
-    ).first()
+    tabletop = tabletop_queries.get_tabletop(
+        db, tabletop_id, current_user.id, with_questions=True
+    )
 
     if not tabletop:
         raise HTTPException(
@@ -184,10 +201,9 @@ def get_question(
     current_user: User = Depends(get_current_user)
 ):
     """Get a specific question by type."""
-    tabletop = db.query(Tabletop).filter(
-        Tabletop.id == tabletop_id,
-        Tabletop.creator_id == current_user.id
-    ).first()
+    tabletop = tabletop_queries.get_tabletop(
+        db, tabletop_id, current_user.id
+    )
 
     if not tabletop:
         raise HTTPException(
@@ -226,10 +242,9 @@ def answer_question(
     3. twists - Unexpected events
     4. conclusion - Expected outcomes
     """
-    tabletop = db.query(Tabletop).filter(
-        Tabletop.id == tabletop_id,
-        Tabletop.creator_id == current_user.id
-    ).first()
+    tabletop = tabletop_queries.get_tabletop(
+        db, tabletop_id, current_user.id
+    )
 
     if not tabletop:
         raise HTTPException(
@@ -283,10 +298,9 @@ def complete_tabletop(
 
     Requires all 4 questions to be answered.
     """
-    tabletop = db.query(Tabletop).filter(
-        Tabletop.id == tabletop_id,
-        Tabletop.creator_id == current_user.id
-    ).first()
+    tabletop = tabletop_queries.get_tabletop(
+        db, tabletop_id, current_user.id, with_questions=True
+    )
 
     if not tabletop:
         raise HTTPException(
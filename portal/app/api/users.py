@@ -2,29 +2,48 @@
 User management API routes.
 """
 
-from typing import List
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlalchemy.orm import Session
 
-from app.database import get_db
+from app.database import AsyncDB, get_async_db, get_db
 from app.models.user import User
+from app.repositories import user as user_queries
+from app.repositories.pagination import NEXT_CURSOR_HEADER, InvalidCursorError
 from app.schemas.user import UserResponse, UserUpdate
-from app.security import get_current_user, get_current_admin_user, get_password_hash
+from app.security import get_current_user, get_current_admin_user, get_password_hasher
+from app.services.principal_cache import get_principal_cache
 
 router = APIRouter()
 
 
 @router.get("/", response_model=List[UserResponse])
 def list_users(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_admin_user)
 ):
-    """List all users (admin only)."""
-    users = db.query(User).offset(skip).limit(limit).all()
-    return users
+    """
+    List all users (admin only), oldest first.
+
+    When more users follow, the X-Next-Cursor response header holds a
+    cursor; pass it back as ?cursor= to get the next page.
+    """
+    try:
+        page = user_queries.list_users(db, skip=skip, limit=limit, cursor=cursor)
+    except InvalidCursorError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+    if page.next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = page.next_cursor
+    return page.items
 
 
 @router.get("/{user_id}", response_model=UserResponse)
@@ -51,10 +70,10 @@ def get_user(
 
 
 @router.put("/{user_id}", response_model=UserResponse)
-def update_user(
+async def update_user(
     user_id: int,
     user_data: UserUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncDB = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Update a user."""
@@ -65,7 +84,7 @@ def update_user(
             detail="Not authorized to update this user"
         )
 
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.run(Session.get, User, user_id)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -75,14 +94,24 @@ def update_user(
     # Update fields
     update_data = user_data.model_dump(exclude_unset=True)
 
-    # Handle password separately
+    # Handle password separately, hashing it in the password hasher's threads
     if "password" in update_data:
-        update_data["hashed_password"] = get_password_hash(update_data.pop("password"))
+        update_data["hashed_password"] = await get_password_hasher().hash(
+            update_data.pop("password")
+        )
 
     # Only admins can change admin status
     if "is_admin" in update_data and not current_user.is_admin:
         del update_data["is_admin"]
 
+    user = await db.run(_update_user, user, update_data)
+
+    # Apply changes such as is_active and is_admin to the user's next request
+    get_principal_cache().invalidate(user_id)
+    return user
+
+
+def _update_user(db: Session, user: User, update_data: dict) -> User:
     for field, value in update_data.items():
         setattr(user, field, value)
 
@@ -113,3 +142,5 @@ def delete_user(
 
     db.delete(user)
     db.commit()
+
+    get_principal_cache().invalidate(user_id)
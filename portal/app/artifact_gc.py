@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Garbage collection for rendered PDFs.
+
+Corrects artifact reference counts and deletes PDFs in PDF_OUTPUT_DIR that
+no document references.
+
+Usage:
+    python -m app.artifact_gc [--dry-run] [--grace-period SECONDS]
+"""
+
+import argparse
+import logging
+from typing import List, Optional
+
+from app.config import settings
+from app.database import SessionLocal, init_db
+from app.services.artifact_store import get_artifact_store
+
+logger = logging.getLogger(__name__)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Remove unreferenced Zombies on Fire PDFs")
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Report what would be removed without removing anything",
+    )
+    parser.add_argument(
+        "--grace-period",
+        type=float,
+        default=settings.PDF_ARTIFACT_GC_GRACE_PERIOD,
+        help="Seconds an unreferenced PDF is kept (default: %(default)s)",
+    )
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    init_db()
+
+    db = SessionLocal()
+    try:
+        result = get_artifact_store().collect_garbage(
+            db, grace_period=args.grace_period, dry_run=args.dry_run
+        )
+    finally:
+        db.close()
+
+    logger.info(
+        "%s %d files (%d bytes) and %d artifact records; corrected %d reference counts",
+        "Would remove" if args.dry_run else "Removed",
+        result.files_removed,
+        result.bytes_freed,
+        result.artifacts_removed,
+        result.refs_corrected,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Batch document generation.
+
+Generates documents for many tabletops through the LLM provider's batch API,
+which is cheaper than interactive generation but may take up to 24 hours.
+
+Usage:
+    python -m app.batch start [--tabletop ID ...] [--type TYPE ...] [--provider NAME] [--wait]
+    python -m app.batch status [RUN_ID ...]
+    python -m app.batch poll [RUN_ID ...] [--wait]
+    python -m app.batch cancel RUN_ID [RUN_ID ...]
+"""
+
+import argparse
+import asyncio
+import logging
+from typing import List, Optional
+
+from app.config import settings
+from app.database import dispose_async_engine, init_db
+from app.models.batch import BatchRun
+from app.models.document import DocumentType
+from app.services.batch_generation import BatchGenerationService
+from app.services.llm_service import get_provider_registry
+from app.services.pdf_service import get_pdf_render_pool
+
+logger = logging.getLogger(__name__)
+
+
+def format_run(run: BatchRun) -> str:
+    """One line describing a run's progress."""
+    line = (
+        f"run {run.id}: {run.status.value}, {run.provider}"
+        f" {run.provider_batch_id or '(not submitted)'},"
+        f" {run.succeeded_count + run.failed_count}/{run.request_count} requests finished"
+        f" ({run.succeeded_count} succeeded, {run.failed_count} failed)"
+    )
+    if run.error_message:
+        line += f": {run.error_message}"
+    return line
+
+
+async def run_command(args: argparse.Namespace) -> None:
+    """Run a subcommand, then print the runs it concerned."""
+    service = BatchGenerationService()
+    run_ids = args.run_ids or None
+
+    if args.command == "start":
+        run_ids = await service.start(
+            tabletop_ids=args.tabletops,
+            document_types=args.types,
+            provider=args.provider,
+        )
+        if not run_ids:
+            logger.info("No documents to generate")
+            return
+        if args.wait:
+            await service.wait(run_ids, args.poll_interval)
+
+    elif args.command == "poll":
+        if args.wait:
+            await service.wait(run_ids, args.poll_interval)
+        else:
+            for run_id in run_ids or await service.unfinished_run_ids():
+                await service.poll(run_id)
+
+    elif args.command == "cancel":
+        for run_id in run_ids:
+            if await service.cancel(run_id) is None:
+                logger.error("Batch run %d not found", run_id)
+
+    for run in await service.list_runs():
+        if run_ids is None or run.id in run_ids:
+            print(format_run(run))
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Zombies on Fire batch document generation")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    start = commands.add_parser("start", help="Start generating documents in provider batches")
+    start.add_argument(
+        "--tabletop",
+        dest="tabletops",
+        type=int,
+        action="append",
+        metavar="ID",
+        help="Tabletop to generate documents for, may be repeated (default: all complete tabletops)",
+    )
+    start.add_argument(
+        "--type",
+        dest="types",
+        type=DocumentType,
+        action="append",
+        metavar="TYPE",
+        help=(
+            "Document type to generate, may be repeated (default: all): "
+            + ", ".join(document_type.value for document_type in DocumentType)
+        ),
+    )
+    start.add_argument(
+        "--provider",
+        help="LLM provider whose batch API is used (default: the first configured route)",
+    )
+    start.set_defaults(run_ids=None)
+
+    status = commands.add_parser("status", help="Show batch runs")
+    status.add_argument("run_ids", type=int, nargs="*", metavar="RUN_ID")
+
+    poll = commands.add_parser("poll", help="Check unfinished runs and collect ended batches")
+    poll.add_argument("run_ids", type=int, nargs="*", metavar="RUN_ID")
+
+    cancel = commands.add_parser("cancel", help="Cancel batch runs")
+    cancel.add_argument("run_ids", type=int, nargs="+", metavar="RUN_ID")
+
+    for command in (start, poll):
+        command.add_argument(
+            "--wait",
+            action="store_true",
+            help="Poll until the runs have finished",
+        )
+        command.add_argument(
+            "--poll-interval",
+            type=float,
+            default=settings.BATCH_POLL_INTERVAL,
+            help="Seconds between polls while waiting (default: %(default)s)",
+        )
+
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    init_db()
+
+    async def _main():
+        try:
+            await run_command(args)
+        finally:
+            await get_provider_registry().aclose()
+            await dispose_async_engine()
+            get_pdf_render_pool().shutdown()
+
+    asyncio.run(_main())
+
+
+if __name__ == "__main__":
+    main()
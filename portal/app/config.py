@@ -19,9 +19,32 @@ class Settings(BaseSettings):
     SECRET_KEY: str = os.getenv("SECRET_KEY", "change-me-in-production-use-strong-secret")
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60
+    # bcrypt cost factor; stored hashes with a different cost are rehashed at login
+    BCRYPT_ROUNDS: int = int(os.getenv("BCRYPT_ROUNDS", "12"))
+    # Threads hashing and verifying passwords (further requests wait for a free thread)
+    PASSWORD_HASH_THREADS: int = int(os.getenv("PASSWORD_HASH_THREADS", "2"))
+    # Seconds an authenticated user is reused across requests with the same token (0 disables)
+    AUTH_CACHE_TTL: int = int(os.getenv("AUTH_CACHE_TTL", "30"))
+    AUTH_CACHE_MAX_ENTRIES: int = int(os.getenv("AUTH_CACHE_MAX_ENTRIES", "1024"))
 
     # Database
     DATABASE_URL: str = os.getenv("DATABASE_URL", "sqlite:///./tabletop.db")
+    # Use an async driver (aiosqlite / asyncpg) for document generation and the document API
+    DATABASE_ASYNC: bool = os.getenv("DATABASE_ASYNC", "false").lower() == "true"
+    # Async connection URL (derived from DATABASE_URL when empty)
+    ASYNC_DATABASE_URL: str = os.getenv("ASYNC_DATABASE_URL", "")
+    # Connection pool (server databases such as PostgreSQL)
+    DATABASE_POOL_SIZE: int = int(os.getenv("DATABASE_POOL_SIZE", "5"))
+    DATABASE_MAX_OVERFLOW: int = int(os.getenv("DATABASE_MAX_OVERFLOW", "10"))
+    DATABASE_POOL_TIMEOUT: float = float(os.getenv("DATABASE_POOL_TIMEOUT", "30"))
+    # Seconds before a pooled connection is replaced (-1 keeps connections indefinitely)
+    DATABASE_POOL_RECYCLE: int = int(os.getenv("DATABASE_POOL_RECYCLE", "1800"))
+    DATABASE_POOL_PRE_PING: bool = os.getenv("DATABASE_POOL_PRE_PING", "true").lower() == "true"
+    # SQLite pragmas applied to every connection
+    SQLITE_JOURNAL_MODE: str = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+    SQLITE_SYNCHRONOUS: str = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+    SQLITE_BUSY_TIMEOUT: int = int(os.getenv("SQLITE_BUSY_TIMEOUT", "5000"))  # milliseconds
+    SQLITE_MMAP_SIZE: int = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
 
     # AI/LLM Configuration
     OPENAI_API_KEY: str = os.getenv("OPENAI_API_KEY", "")
@@ -29,9 +52,103 @@ class Settings(BaseSettings):
     LLM_PROVIDER: str = os.getenv("LLM_PROVIDER", "openai")  # openai, anthropic, or mock
     LLM_MODEL: str = os.getenv("LLM_MODEL", "gpt-4")
 
+    # LLM Routing
+    # Providers and models to route requests across, as
+    # provider[:model][=weight[/cost]], e.g. "openai:gpt-4o=3/5,anthropic=1/3"
+    # (empty = LLM_PROVIDER and LLM_MODEL only)
+    LLM_ROUTES: str = os.getenv("LLM_ROUTES", "")
+    # "health" (weighted by error rate and latency) or "cost" (cheapest first)
+    LLM_ROUTING_STRATEGY: str = os.getenv("LLM_ROUTING_STRATEGY", "health").lower()
+    # Routes for some agents or sections, e.g.
+    # "description=openai:gpt-4o-mini;scenario_brief.content=anthropic"
+    LLM_ROUTE_OVERRIDES: str = os.getenv("LLM_ROUTE_OVERRIDES", "")
+    # Routes of model tiers, e.g. "fast=openai:gpt-4o-mini;standard=openai:gpt-4o".
+    # Agents send short sections to the "fast" tier; unlisted tiers use each
+    # provider's own model for the tier (gpt-4o-mini, claude-3-haiku-20240307)
+    LLM_MODEL_TIERS: str = os.getenv("LLM_MODEL_TIERS", "")
+
+    # LLM HTTP connection pool (shared by all requests to a provider)
+    LLM_HTTP_MAX_CONNECTIONS: int = int(os.getenv("LLM_HTTP_MAX_CONNECTIONS", "100"))
+    LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS: int = int(os.getenv("LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS", "20"))
+    LLM_HTTP_KEEPALIVE_EXPIRY: float = float(os.getenv("LLM_HTTP_KEEPALIVE_EXPIRY", "30"))
+
+    # LLM Rate Limits
+    # Requests and tokens per minute for each provider and model (0 = only the
+    # limits reported in the provider's rate-limit headers)
+    LLM_REQUESTS_PER_MINUTE: int = int(os.getenv("LLM_REQUESTS_PER_MINUTE", "0"))
+    LLM_TOKENS_PER_MINUTE: int = int(os.getenv("LLM_TOKENS_PER_MINUTE", "0"))
+    # Overrides as provider[:model]=requests/tokens, e.g. "openai=500/30000,anthropic=50/40000"
+    LLM_RATE_LIMITS: str = os.getenv("LLM_RATE_LIMITS", "")
+    # Times a request rejected with 429 is queued again before the error is raised
+    LLM_RATE_LIMIT_MAX_RETRIES: int = int(os.getenv("LLM_RATE_LIMIT_MAX_RETRIES", "5"))
+
+    # LLM Request Policy
+    # Seconds each attempt may take; for streams, seconds until the first and
+    # between later chunks (0 = no deadline)
+    LLM_REQUEST_TIMEOUT: float = float(os.getenv("LLM_REQUEST_TIMEOUT", "120"))
+    # Attempts per request when it times out or fails with a transient error
+    LLM_MAX_ATTEMPTS: int = int(os.getenv("LLM_MAX_ATTEMPTS", "3"))
+    LLM_RETRY_BACKOFF: float = float(os.getenv("LLM_RETRY_BACKOFF", "1"))  # seconds, doubled per retry
+    LLM_RETRY_BACKOFF_MAX: float = float(os.getenv("LLM_RETRY_BACKOFF_MAX", "30"))
+    # Send a second request when the first runs longer than the recent
+    # percentile latency, and use whichever answers first
+    LLM_HEDGE_REQUESTS: bool = os.getenv("LLM_HEDGE_REQUESTS", "false").lower() == "true"
+    LLM_HEDGE_PERCENTILE: float = float(os.getenv("LLM_HEDGE_PERCENTILE", "95"))
+    LLM_HEDGE_MIN_SAMPLES: int = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20"))
+    # Consecutive failures that open a provider's circuit breaker (0 = disabled)
+    LLM_CIRCUIT_FAILURE_THRESHOLD: int = int(os.getenv("LLM_CIRCUIT_FAILURE_THRESHOLD", "5"))
+    LLM_CIRCUIT_RESET_TIMEOUT: float = float(os.getenv("LLM_CIRCUIT_RESET_TIMEOUT", "30"))  # seconds
+
+    # LLM Response Cache
+    LLM_CACHE_ENABLED: bool = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+    LLM_CACHE_TTL: int = int(os.getenv("LLM_CACHE_TTL", "86400"))  # seconds, 0 = never expire
+    LLM_CACHE_MAX_ENTRIES: int = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "512"))
+    # Optional SQLite file shared across processes and restarts (empty = memory only)
+    LLM_CACHE_DB_PATH: str = os.getenv("LLM_CACHE_DB_PATH", "")
+    LLM_CACHE_DB_MAX_BYTES: int = int(os.getenv("LLM_CACHE_DB_MAX_BYTES", str(100 * 1024 * 1024)))
+
+    # Document Generation
+    # Generate the description, content and learning goals of a document at the same time
+    AGENT_PARALLEL_SECTIONS: bool = os.getenv("AGENT_PARALLEL_SECTIONS", "true").lower() == "true"
+    # Timeout in seconds for each section LLM call (0 disables the timeout)
+    AGENT_SECTION_TIMEOUT: float = float(os.getenv("AGENT_SECTION_TIMEOUT", "300"))
+    # Comma-separated providers asked for all sections of a document in one tagged response
+    AGENT_STRUCTURED_PROVIDERS: str = os.getenv("AGENT_STRUCTURED_PROVIDERS", "")
+
+    # Document Generation Worker
+    # Run a worker inside the web server process (disable when running app.worker separately)
+    EMBEDDED_WORKER: bool = os.getenv("EMBEDDED_WORKER", "true").lower() == "true"
+    WORKER_PROCESSES: int = int(os.getenv("WORKER_PROCESSES", "1"))
+    WORKER_CONCURRENCY: int = int(os.getenv("WORKER_CONCURRENCY", "3"))
+    WORKER_POLL_INTERVAL: float = float(os.getenv("WORKER_POLL_INTERVAL", "1.0"))
+    # Seconds to let running jobs finish on shutdown before returning them to the queue
+    WORKER_SHUTDOWN_TIMEOUT: float = float(os.getenv("WORKER_SHUTDOWN_TIMEOUT", "30"))
+    # Seconds after which a generating job is assumed to belong to a crashed worker
+    WORKER_STALE_JOB_TIMEOUT: int = int(os.getenv("WORKER_STALE_JOB_TIMEOUT", "1800"))
+
+    # Batch Generation (python -m app.batch)
+    # Maximum section requests in one provider batch; larger runs are split
+    BATCH_MAX_REQUESTS: int = int(os.getenv("BATCH_MAX_REQUESTS", "10000"))
+    # Seconds between progress checks while waiting for batches
+    BATCH_POLL_INTERVAL: float = float(os.getenv("BATCH_POLL_INTERVAL", "60"))
+    # State of the local stand-in batch API used with the mock provider
+    BATCH_LOCAL_DIR: Path = Path(os.getenv("BATCH_LOCAL_DIR", "./batches"))
+    # Seconds before a local batch's results become available
+    BATCH_LOCAL_DELAY: float = float(os.getenv("BATCH_LOCAL_DELAY", "0"))
+    # Local batch requests whose prompt contains this text fail (empty = none fail)
+    BATCH_LOCAL_FAIL_MARKER: str = os.getenv("BATCH_LOCAL_FAIL_MARKER", "")
+
+    # PDF Rendering
+    # Processes used to render PDFs off the event loop (0 renders in a thread instead)
+    PDF_RENDER_PROCESSES: int = int(os.getenv("PDF_RENDER_PROCESSES", "2"))
+    # PDFs allowed to wait for a render process before callers have to wait
+    PDF_RENDER_MAX_PENDING: int = int(os.getenv("PDF_RENDER_MAX_PENDING", "16"))
+
     # File Storage
     UPLOAD_DIR: Path = Path(os.getenv("UPLOAD_DIR", "./uploads"))
     PDF_OUTPUT_DIR: Path = Path(os.getenv("PDF_OUTPUT_DIR", "./generated_pdfs"))
+    # Seconds an unreferenced PDF is kept before garbage collection may delete it
+    PDF_ARTIFACT_GC_GRACE_PERIOD: int = int(os.getenv("PDF_ARTIFACT_GC_GRACE_PERIOD", "3600"))
 
     class Config:
         env_file = ".env"
@@ -2,16 +2,55 @@
 Database connection and session management.
 """
 
-from sqlalchemy import create_engine
+import asyncio
+from pathlib import Path
+from typing import Any, AsyncIterator, Callable, TypeVar, Union
+
+from sqlalchemy import create_engine, event, inspect
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 
 from app.config import settings
 
-engine = create_engine(
-    settings.DATABASE_URL,
-    connect_args={"check_same_thread": False} if "sqlite" in settings.DATABASE_URL else {}
-)
+T = TypeVar("T")
+
+
+def get_engine_options(url: str) -> dict:
+    """Keyword arguments for create_engine, based on the configured pool settings."""
+    if url.startswith("sqlite"):
+        return {"connect_args": {"check_same_thread": False}}
+
+    return {
+        "pool_size": settings.DATABASE_POOL_SIZE,
+        "max_overflow": settings.DATABASE_MAX_OVERFLOW,
+        "pool_timeout": settings.DATABASE_POOL_TIMEOUT,
+        "pool_recycle": settings.DATABASE_POOL_RECYCLE,
+        "pool_pre_ping": settings.DATABASE_POOL_PRE_PING,
+    }
+
+
+def set_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+    """
+    Tune each new SQLite connection.
+
+    WAL lets readers continue while a writer (e.g. the document worker) is
+    committing; synchronous=NORMAL is durable in WAL mode except on power
+    loss; busy_timeout waits for locks instead of failing immediately.
+    """
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute(f"PRAGMA journal_mode={settings.SQLITE_JOURNAL_MODE}")
+        cursor.execute(f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}")
+        cursor.execute(f"PRAGMA busy_timeout={settings.SQLITE_BUSY_TIMEOUT:d}")
+        cursor.execute(f"PRAGMA mmap_size={settings.SQLITE_MMAP_SIZE:d}")
+    finally:
+        cursor.close()
+
+
+engine = create_engine(settings.DATABASE_URL, **get_engine_options(settings.DATABASE_URL))
+
+if engine.dialect.name == "sqlite":
+    event.listen(engine, "connect", set_sqlite_pragmas)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
@@ -27,7 +66,149 @@ def get_db():
         db.close()
 
 
+# The Alembic migrations directory sits next to the app package
+PROJECT_DIR = Path(__file__).resolve().parent.parent
+
+
+class SchemaOutOfDateError(RuntimeError):
+    """Raised when an existing database is missing migrations."""
+
+
+def _migration_scripts():
+    from alembic.config import Config
+    from alembic.script import ScriptDirectory
+
+    config = Config()
+    config.set_main_option("script_location", str(PROJECT_DIR / "migrations"))
+    return ScriptDirectory.from_config(config)
+
+
 def init_db():
-    """Initialize database tables."""
-    from app.models import user, tabletop, document  # noqa: F401
-    Base.metadata.create_all(bind=engine)
+    """
+    Initialize database tables.
+
+    A new database gets the current schema and is stamped as fully
+    migrated. create_all() does not add columns or indexes to tables that
+    already exist, so an existing database must have every migration
+    applied with `alembic upgrade head` first.
+
+    Raises:
+        SchemaOutOfDateError: If an existing database has pending migrations
+    """
+    from alembic.runtime.migration import MigrationContext
+    from app.models import user, tabletop, document, artifact, batch  # noqa: F401
+
+    scripts = _migration_scripts()
+    with engine.begin() as connection:
+        existing_tables = set(inspect(connection).get_table_names()) & set(Base.metadata.tables)
+        migrations = MigrationContext.configure(connection)
+
+        if not existing_tables:
+            Base.metadata.create_all(bind=connection)
+            migrations.stamp(scripts, "head")
+            return
+
+        current = set(migrations.get_current_heads())
+        if current != set(scripts.get_heads()):
+            raise SchemaOutOfDateError(
+                f"The database schema is at revision {', '.join(sorted(current)) or 'none'}, "
+                f"not {', '.join(scripts.get_heads())}. Back up the database and run "
+                "`alembic upgrade head` (see Database Migrations in the README)."
+            )
+
+
+# Async access
+
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+}
+
+
+def get_async_database_url(url: str) -> str:
+    """Swap the driver in a sync database URL for its async counterpart."""
+    scheme, separator, rest = url.partition("://")
+    return f"{ASYNC_DRIVERS.get(scheme, scheme)}{separator}{rest}"
+
+
+async_engine = None
+AsyncSessionLocal = None
+
+if settings.DATABASE_ASYNC:
+    from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+    async_database_url = settings.ASYNC_DATABASE_URL or get_async_database_url(settings.DATABASE_URL)
+    async_engine = create_async_engine(async_database_url, **get_engine_options(async_database_url))
+    if async_engine.dialect.name == "sqlite":
+        event.listen(async_engine.sync_engine, "connect", set_sqlite_pragmas)
+    AsyncSessionLocal = async_sessionmaker(
+        async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+    )
+
+# Sessions used through AsyncDB in sync mode. Objects are not expired on
+# commit, matching AsyncSessionLocal, so they can be read outside run().
+ThreadSessionLocal = sessionmaker(
+    autocommit=False, autoflush=False, expire_on_commit=False, bind=engine
+)
+
+
+class AsyncDB:
+    """
+    Database session for code running on the event loop.
+
+    Wraps an AsyncSession when DATABASE_ASYNC is enabled, and a regular
+    Session otherwise. ORM work is passed to run() as a function taking a
+    sync Session: an AsyncSession runs it through run_sync on the async
+    driver, and a Session runs it in a worker thread. Either way the event
+    loop is not blocked on database I/O, and the same query code serves both.
+
+    Objects are not expired on commit. Relationships must be loaded inside
+    run() (see app.repositories) before they are read outside it.
+    """
+
+    def __init__(self, session: Union[Session, "AsyncSession"]):
+        self.session = session
+
+    @property
+    def is_async(self) -> bool:
+        return not isinstance(self.session, Session)
+
+    async def run(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """
+        Call fn(session, *args, **kwargs) with a sync Session.
+
+        Returns:
+            The result of fn
+        """
+        if self.is_async:
+            return await self.session.run_sync(fn, *args, **kwargs)
+        return await asyncio.to_thread(fn, self.session, *args, **kwargs)
+
+    async def close(self) -> None:
+        if self.is_async:
+            await self.session.close()
+        else:
+            await asyncio.to_thread(self.session.close)
+
+
+def create_async_db() -> AsyncDB:
+    """Open an AsyncDB using the configured driver."""
+    if AsyncSessionLocal is not None:
+        return AsyncDB(AsyncSessionLocal())
+    return AsyncDB(ThreadSessionLocal())
+
+
+async def get_async_db() -> AsyncIterator[AsyncDB]:
+    """Dependency that provides a database session for async routes."""
+    db = create_async_db()
+    try:
+        yield db
+    finally:
+        await db.close()
+
+
+async def dispose_async_engine() -> None:
+    """Close the async engine's connections."""
+    if async_engine is not None:
+        await async_engine.dispose()
@@ -2,14 +2,19 @@
 Main FastAPI application entry point.
 """
 
+import asyncio
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import HTMLResponse
 
 from app.config import settings
-from app.database import init_db
+from app.database import dispose_async_engine, init_db
 from app.api import api_router
+from app.services.llm_service import get_provider_registry
+from app.security import get_password_hasher
+from app.services.pdf_service import get_pdf_render_pool
 
 # Create FastAPI application
 app = FastAPI(
@@ -49,6 +54,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 # Include API routes
@@ -63,8 +69,29 @@ except RuntimeError:
 
 @app.on_event("startup")
 async def startup_event():
-    """Initialize database on startup."""
+    """Initialize database and LLM providers on startup."""
     init_db()
+    get_provider_registry()
+
+    if settings.EMBEDDED_WORKER:
+        from app.worker import DocumentWorker
+
+        app.state.worker = DocumentWorker()
+        app.state.worker_task = asyncio.create_task(app.state.worker.run())
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop the embedded document worker, LLM connections and worker pools."""
+    worker = getattr(app.state, "worker", None)
+    if worker is not None:
+        await worker.stop()
+        await app.state.worker_task
+
+    await get_provider_registry().aclose()
+    await dispose_async_engine()
+    get_pdf_render_pool().shutdown()
+    get_password_hasher().shutdown()
 
 
 @app.get("/", response_class=HTMLResponse)
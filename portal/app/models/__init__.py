@@ -5,5 +5,16 @@ Database models package.
 from app.models.user import User
 from app.models.tabletop import Tabletop, TabletopQuestion
 from app.models.document import Document, DocumentType
+from app.models.artifact import PDFArtifact
+from app.models.batch import BatchItem, BatchRun
 
-__all__ = ["User", "Tabletop", "TabletopQuestion", "Document", "DocumentType"]
+__all__ = [
+    "User",
+    "Tabletop",
+    "TabletopQuestion",
+    "Document",
+    "DocumentType",
+    "PDFArtifact",
+    "BatchRun",
+    "BatchItem",
+]
@@ -0,0 +1,33 @@
+"""
+Rendered artifact model for content-addressed PDF storage.
+"""
+
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, DateTime
+
+from app.database import Base
+
+
+class PDFArtifact(Base):
+    """
+    A rendered PDF file, shared by every document with the same rendered inputs.
+
+    The content hash covers the title, description, content, learning goals
+    and PDF theme version. ref_count is the number of documents whose
+    pdf_file_path points at the file.
+    """
+
+    __tablename__ = "pdf_artifacts"
+
+    id = Column(Integer, primary_key=True, index=True)
+    content_hash = Column(String(64), unique=True, index=True, nullable=False)
+    file_path = Column(String(500), unique=True, nullable=False)
+    size_bytes = Column(Integer, nullable=False, default=0)
+    ref_count = Column(Integer, nullable=False, default=0)
+
+    # Timestamps
+    created_at = Column(DateTime, default=datetime.utcnow)
+    last_used_at = Column(DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<PDFArtifact(id={self.id}, hash='{self.content_hash[:12]}', refs={self.ref_count})>"
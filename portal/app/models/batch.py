@@ -0,0 +1,87 @@
+"""
+Batch generation models for documents generated through provider batch APIs.
+"""
+
+from datetime import datetime
+from enum import Enum as PyEnum
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Enum, Index
+from sqlalchemy.orm import relationship
+
+from app.database import Base
+
+
+class BatchRunStatus(str, PyEnum):
+    """Status of a batch run."""
+    PENDING = "pending"          # Created, not yet accepted by the provider
+    SUBMITTED = "submitted"      # Processing at the provider
+    COMPLETED = "completed"      # Results written to the documents
+    FAILED = "failed"            # Submission failed or the provider gave no results
+
+
+class BatchItemStatus(str, PyEnum):
+    """Status of a single request in a batch run."""
+    PENDING = "pending"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+
+class BatchRun(Base):
+    """
+    One provider batch of document section requests.
+
+    The run's documents stay GENERATING until its results are collected,
+    so the job queue neither claims them nor requeues them as stale.
+    """
+
+    __tablename__ = "batch_runs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    provider = Column(String(50), nullable=False)
+    status = Column(Enum(BatchRunStatus), nullable=False, default=BatchRunStatus.PENDING)
+    provider_batch_id = Column(String(255), nullable=True)
+
+    # Request counts, as last reported by the provider
+    request_count = Column(Integer, nullable=False, default=0)
+    succeeded_count = Column(Integer, nullable=False, default=0)
+    failed_count = Column(Integer, nullable=False, default=0)
+    error_message = Column(Text, nullable=True)
+
+    # Timestamps
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    submitted_at = Column(DateTime, nullable=True)
+    completed_at = Column(DateTime, nullable=True)
+
+    # Relationships
+    items = relationship("BatchItem", back_populates="run", cascade="all, delete-orphan")
+
+    def __repr__(self):
+        return f"<BatchRun(id={self.id}, provider='{self.provider}', status='{self.status}')>"
+
+
+class BatchItem(Base):
+    """A request for one section of one document in a batch run."""
+
+    __tablename__ = "batch_items"
+    __table_args__ = (
+        # Stale job recovery skips documents with an unfinished batch request
+        Index("ix_batch_items_document_id_status", "document_id", "status"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    run_id = Column(Integer, ForeignKey("batch_runs.id", ondelete="CASCADE"), nullable=False, index=True)
+    document_id = Column(Integer, ForeignKey("documents.id", ondelete="CASCADE"), nullable=False)
+    section = Column(String(50), nullable=False)  # description, content or learning_goals
+    model = Column(String(100), nullable=False)
+    max_tokens = Column(Integer, nullable=False)
+
+    status = Column(Enum(BatchItemStatus), nullable=False, default=BatchItemStatus.PENDING)
+    result = Column(Text, nullable=True)
+    error_message = Column(Text, nullable=True)
+
+    # Relationships
+    run = relationship("BatchRun", back_populates="items")
+    document = relationship("Document")
+
+    def __repr__(self):
+        return f"<BatchItem(id={self.id}, document_id={self.document_id}, section='{self.section}')>"
@@ -4,7 +4,7 @@ Document model for generated exercise materials.
 
 from datetime import datetime
 from enum import Enum as PyEnum
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Enum
+from sqlalchemy import Boolean, Column, Integer, String, Text, DateTime, ForeignKey, Enum, Index, true
 from sqlalchemy.orm import relationship
 
 from app.database import Base
@@ -32,11 +32,21 @@ class Document(Base):
     """Generated document for a tabletop exercise."""
 
     __tablename__ = "documents"
+    __table_args__ = (
+        # One document per type and tabletop; also serves lookups by tabletop
+        Index("uq_documents_tabletop_id_document_type", "tabletop_id", "document_type", unique=True),
+        # Job queue polling: highest priority, then oldest pending document first
+        Index("ix_documents_status_priority_updated_at", "status", "priority", "updated_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     tabletop_id = Column(Integer, ForeignKey("tabletops.id"), nullable=False)
     document_type = Column(Enum(DocumentType), nullable=False)
     status = Column(Enum(DocumentStatus), default=DocumentStatus.PENDING)
+    # Job priority, a rate_limiter.Priority value; lower values are generated first
+    priority = Column(Integer, nullable=False, default=1, server_default="1")
+    # Whether the job may reuse cached LLM responses; regenerations ask for new ones
+    use_cache = Column(Boolean, nullable=False, default=True, server_default=true())
 
     # Document content sections
     title = Column(String(255), nullable=True)
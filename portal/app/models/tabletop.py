@@ -4,7 +4,7 @@ Tabletop exercise models.
 
 from datetime import datetime
 from enum import Enum as PyEnum
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Enum
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Enum, Index
 from sqlalchemy.orm import relationship
 
 from app.database import Base
@@ -30,6 +30,10 @@ class Tabletop(Base):
     """Tabletop exercise model."""
 
     __tablename__ = "tabletops"
+    __table_args__ = (
+        # Dashboard listing: a user's tabletops, newest first
+        Index("ix_tabletops_creator_id_created_at", "creator_id", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String(255), nullable=False)
@@ -44,7 +48,8 @@ class Tabletop(Base):
     story_prompt = Column(Text, nullable=True)
 
     # Timestamps
-    created_at = Column(DateTime, default=datetime.utcnow)
+    # Not null: listings are paginated by (created_at, id)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     # Relationships
@@ -68,6 +73,9 @@ class TabletopQuestion(Base):
     """Questions and answers for tabletop creation flow."""
 
     __tablename__ = "tabletop_questions"
+    __table_args__ = (
+        Index("ix_tabletop_questions_tabletop_id_question_type", "tabletop_id", "question_type"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     tabletop_id = Column(Integer, ForeignKey("tabletops.id"), nullable=False)
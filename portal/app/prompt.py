@@ -0,0 +1,35 @@
+"""
+Prompts split into a cacheable prefix and a varying suffix.
+"""
+
+from dataclasses import dataclass
+from typing import Tuple, Union
+
+
+@dataclass(frozen=True)
+class Prompt:
+    """
+    A prompt split into a stable prefix and a varying suffix.
+
+    The prefix blocks are sent first, most widely shared first, so providers
+    can serve them from their prompt cache when several requests (e.g. the
+    sections of a document, or the documents of a tabletop) start with the
+    same blocks. Only the suffix differs between those requests.
+    """
+    prefix: Tuple[str, ...] = ()
+    suffix: str = ""
+
+    @property
+    def text(self) -> str:
+        """The complete prompt as a single string."""
+        return "\n\n".join(part for part in (*self.prefix, self.suffix) if part)
+
+
+PromptInput = Union[str, Prompt]
+
+
+def as_prompt(prompt: PromptInput) -> Prompt:
+    """Wrap a plain string prompt, which has no shared prefix."""
+    if isinstance(prompt, Prompt):
+        return prompt
+    return Prompt(suffix=prompt)
@@ -0,0 +1,34 @@
+"""
+Query helpers that load models together with the relationships callers use.
+"""
+
+from app.repositories.pagination import (
+    NEXT_CURSOR_HEADER,
+    InvalidCursorError,
+    Page,
+    decode_cursor,
+    encode_cursor,
+    paginate,
+)
+from app.repositories.tabletop import (
+    query_tabletops,
+    get_tabletop,
+    list_tabletop_summaries,
+)
+from app.repositories.document import get_user_document, list_tabletop_documents
+from app.repositories.user import list_users
+
+__all__ = [
+    "NEXT_CURSOR_HEADER",
+    "InvalidCursorError",
+    "Page",
+    "decode_cursor",
+    "encode_cursor",
+    "paginate",
+    "query_tabletops",
+    "get_tabletop",
+    "list_tabletop_summaries",
+    "get_user_document",
+    "list_tabletop_documents",
+    "list_users",
+]
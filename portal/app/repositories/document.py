@@ -0,0 +1,75 @@
+"""
+Document queries.
+"""
+
+from typing import List, Optional
+
+from sqlalchemy.orm import Session, joinedload, load_only
+
+from app.models.document import Document
+from app.models.tabletop import Tabletop
+
+
+def get_user_document(
+    db: Session,
+    document_id: int,
+    creator_id: int,
+    with_tabletop: bool = False,
+) -> Optional[Document]:
+    """
+    Get a document that belongs to one of a user's tabletops.
+
+    Args:
+        db: Database session
+        document_id: Document ID
+        creator_id: Owner of the document's tabletop
+        with_tabletop: Load Document.tabletop
+
+    Returns:
+        The document, or None if not found
+    """
+    query = db.query(Document).join(Tabletop).filter(
+        Document.id == document_id,
+        Tabletop.creator_id == creator_id,
+    )
+    if with_tabletop:
+        query = query.options(joinedload(Document.tabletop))
+    return query.first()
+
+
+def list_tabletop_documents(
+    db: Session,
+    tabletop_id: int,
+    creator_id: int,
+) -> Optional[List[Document]]:
+    """
+    List the documents of one of a user's tabletops.
+
+    Only the columns DocumentListResponse needs are loaded; the generated
+    description, content and learning goals stay in the database.
+
+    Args:
+        db: Database session
+        tabletop_id: Tabletop ID
+        creator_id: Owner of the tabletop
+
+    Returns:
+        The documents, or None if the tabletop was not found
+    """
+    tabletop_id = db.query(Tabletop.id).filter(
+        Tabletop.id == tabletop_id,
+        Tabletop.creator_id == creator_id,
+    ).scalar()
+    if tabletop_id is None:
+        return None
+
+    return db.query(Document).options(
+        load_only(
+            Document.tabletop_id,
+            Document.document_type,
+            Document.status,
+            Document.title,
+            Document.pdf_file_path,
+            Document.created_at,
+        )
+    ).filter(Document.tabletop_id == tabletop_id).order_by(Document.id).all()
@@ -0,0 +1,111 @@
+"""
+Keyset pagination.
+
+Instead of OFFSET, the next page starts after the (created_at, id) of the
+last row of the previous page, so fetching a page costs the same however
+deep it is. The position is handed to clients as an opaque cursor token.
+"""
+
+import base64
+import json
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Generic, List, Optional, Tuple, TypeVar
+
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Query
+
+T = TypeVar("T")
+
+# Response header carrying the cursor of the next page
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a cursor token cannot be decoded."""
+
+
+@dataclass
+class Page(Generic[T]):
+    """A page of results and the cursor for the page after it."""
+    items: List[T]
+    next_cursor: Optional[str] = None
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    """Encode a row position as an opaque cursor token."""
+    payload = json.dumps([created_at.isoformat(), row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """
+    Decode a cursor token.
+
+    Raises:
+        InvalidCursorError: If the token was not produced by encode_cursor
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (ValueError, TypeError, UnicodeError) as e:
+        raise InvalidCursorError("Invalid cursor") from e
+
+
+def paginate(
+    query: Query,
+    model: Any,
+    cursor: Optional[str] = None,
+    skip: int = 0,
+    limit: int = 100,
+    descending: bool = False,
+) -> Page:
+    """
+    Fetch one page of a query ordered by (created_at, id).
+
+    With a cursor the page starts after the cursor's row and skip is
+    ignored; otherwise skip rows are skipped with OFFSET, as before cursors
+    existed. Either way the result carries the cursor of the next page.
+
+    Args:
+        query: Query for the model, with any filters applied
+        model: Mapped class with created_at and id columns
+        cursor: Cursor from a previous page
+        skip: Rows to skip when no cursor is given
+        limit: Maximum rows in the page
+        descending: Newest first instead of oldest first
+
+    Returns:
+        The page
+    """
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        if descending:
+            after = or_(
+                model.created_at < created_at,
+                and_(model.created_at == created_at, model.id < row_id),
+            )
+        else:
+            after = or_(
+                model.created_at > created_at,
+                and_(model.created_at == created_at, model.id > row_id),
+            )
+        query = query.filter(after)
+
+    if descending:
+        query = query.order_by(model.created_at.desc(), model.id.desc())
+    else:
+        query = query.order_by(model.created_at, model.id)
+
+    if skip and not cursor:
+        query = query.offset(skip)
+
+    limit = max(limit, 0)
+    rows = query.limit(limit + 1).all()
+
+    if len(rows) <= limit or limit == 0:
+        return Page(rows[:limit])
+
+    last = rows[limit - 1]
+    return Page(rows[:limit], encode_cursor(last.created_at, last.id))
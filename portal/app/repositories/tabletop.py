@@ -0,0 +1,120 @@
+"""
+Tabletop queries with eager loading.
+
+Lazy loading Tabletop.questions or Tabletop.documents issues one SELECT per
+tabletop the first time the relationship is touched (e.g. by is_complete
+while serializing a list). These helpers load the relationships up front.
+"""
+
+from typing import Optional
+
+from sqlalchemy.orm import Query, Session, joinedload, load_only, selectinload
+
+from app.models.tabletop import Tabletop, TabletopQuestion, TabletopStatus
+from app.repositories.pagination import Page, paginate
+
+
+def query_tabletops(
+    db: Session,
+    with_questions: bool = False,
+    with_documents: bool = False,
+) -> Query:
+    """
+    Build a tabletop query that eagerly loads the requested relationships.
+
+    Relationships are loaded with one extra SELECT ... IN per relationship,
+    regardless of how many tabletops are returned.
+
+    Args:
+        db: Database session
+        with_questions: Load Tabletop.questions
+        with_documents: Load Tabletop.documents
+
+    Returns:
+        The tabletop query
+    """
+    query = db.query(Tabletop)
+    if with_questions:
+        query = query.options(selectinload(Tabletop.questions))
+    if with_documents:
+        query = query.options(selectinload(Tabletop.documents))
+    return query
+
+
+def get_tabletop(
+    db: Session,
+    tabletop_id: int,
+    creator_id: Optional[int] = None,
+    with_questions: bool = False,
+    with_documents: bool = False,
+) -> Optional[Tabletop]:
+    """
+    Get a tabletop by ID, optionally restricted to its creator.
+
+    Questions are joined into the same SELECT; documents, which carry the
+    generated content, are loaded with a separate SELECT.
+
+    Args:
+        db: Database session
+        tabletop_id: Tabletop ID
+        creator_id: Only return the tabletop if it belongs to this user
+        with_questions: Load Tabletop.questions
+        with_documents: Load Tabletop.documents
+
+    Returns:
+        The tabletop, or None if not found
+    """
+    query = db.query(Tabletop).filter(Tabletop.id == tabletop_id)
+    if creator_id is not None:
+        query = query.filter(Tabletop.creator_id == creator_id)
+    if with_questions:
+        query = query.options(joinedload(Tabletop.questions))
+    if with_documents:
+        query = query.options(selectinload(Tabletop.documents))
+    return query.first()
+
+
+def list_tabletop_summaries(
+    db: Session,
+    creator_id: int,
+    status: Optional[TabletopStatus] = None,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+) -> Page[Tabletop]:
+    """
+    List a user's tabletops with only the columns TabletopListResponse needs.
+
+    story_prompt is not loaded, and of the questions only what is_complete
+    reads. Accessing any other column issues a SELECT per tabletop.
+
+    Args:
+        db: Database session
+        creator_id: Owner of the tabletops
+        status: Only return tabletops with this status
+        skip: Number of tabletops to skip (ignored when a cursor is given)
+        limit: Maximum number of tabletops to return
+        cursor: Cursor of the page to return, from a previous page
+
+    Returns:
+        The page of tabletops
+
+    Raises:
+        InvalidCursorError: If the cursor is malformed
+    """
+    query = db.query(Tabletop).options(
+        load_only(
+            Tabletop.title,
+            Tabletop.description,
+            Tabletop.status,
+            Tabletop.creator_id,
+            Tabletop.created_at,
+        ),
+        selectinload(Tabletop.questions).load_only(
+            TabletopQuestion.question_type,
+            TabletopQuestion.answer,
+        ),
+    ).filter(Tabletop.creator_id == creator_id)
+    if status:
+        query = query.filter(Tabletop.status == status)
+    return paginate(query, Tabletop, cursor=cursor, skip=skip, limit=limit, descending=True)
@@ -0,0 +1,35 @@
+"""
+User queries.
+"""
+
+from typing import Optional
+
+from sqlalchemy.orm import Session, defer
+
+from app.models.user import User
+from app.repositories.pagination import Page, paginate
+
+
+def list_users(
+    db: Session,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+) -> Page[User]:
+    """
+    List users, oldest first, without their password hashes.
+
+    Args:
+        db: Database session
+        skip: Number of users to skip (ignored when a cursor is given)
+        limit: Maximum number of users to return
+        cursor: Cursor of the page to return, from a previous page
+
+    Returns:
+        The page of users
+
+    Raises:
+        InvalidCursorError: If the cursor is malformed
+    """
+    query = db.query(User).options(defer(User.hashed_password))
+    return paginate(query, User, cursor=cursor, skip=skip, limit=limit)
@@ -20,6 +20,7 @@ from app.schemas.tabletop import (
 from app.schemas.document import (
     DocumentCreate,
     DocumentResponse,
+    DocumentJobResponse,
     DocumentGenerateRequest,
 )
 
@@ -37,5 +38,6 @@ __all__ = [
     "TabletopQuestionResponse",
     "DocumentCreate",
     "DocumentResponse",
+    "DocumentJobResponse",
     "DocumentGenerateRequest",
 ]
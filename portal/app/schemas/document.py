@@ -40,6 +40,18 @@ class DocumentResponse(BaseModel):
         from_attributes = True
 
 
+class DocumentJobResponse(BaseModel):
+    """Schema for a queued document generation job (the job ID is the document ID)."""
+    id: int
+    tabletop_id: int
+    document_type: DocumentType
+    status: DocumentStatus
+    updated_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
 class DocumentListResponse(BaseModel):
     """Schema for listing documents."""
     id: int
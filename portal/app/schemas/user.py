@@ -57,3 +57,4 @@ class TokenData(BaseModel):
     """Schema for token payload data."""
     user_id: Optional[int] = None
     username: Optional[str] = None
+    token_id: Optional[str] = None
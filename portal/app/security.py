@@ -2,8 +2,11 @@
 Security utilities for authentication and authorization.
 """
 
+import asyncio
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Tuple
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
@@ -12,67 +15,196 @@ from passlib.context import CryptContext
 from sqlalchemy.orm import Session
 
 from app.config import settings
-from app.database import get_db
+from app.database import AsyncDB, get_async_db
 from app.models.user import User
 from app.schemas.user import TokenData
+from app.services.principal_cache import get_principal_cache
 
-# Password hashing context
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Password hashing context; hashes with any other cost need an update
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__min_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__max_rounds=settings.BCRYPT_ROUNDS,
+)
 
 # OAuth2 scheme for token authentication
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
 
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Verify a plain password against a hashed password."""
-    return pwd_context.verify(plain_password, hashed_password)
-
-
-def get_password_hash(password: str) -> str:
-    """Hash a password."""
-    return pwd_context.hash(password)
+def _verify_and_update(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    if not pwd_context.verify(plain_password, hashed_password):
+        return False, None
+    if pwd_context.needs_update(hashed_password):
+        return True, pwd_context.hash(plain_password)
+    return True, None
+
+
+class PasswordHasher:
+    """
+    Dedicated thread pool for bcrypt.
+
+    Each hash or verification takes hundreds of milliseconds of CPU. Running
+    them here keeps a burst of logins from occupying the threads shared by
+    the sync endpoints; at most max_workers passwords are processed at once
+    and further requests wait in the executor's queue.
+    """
+
+    def __init__(self, max_workers: int):
+        self.max_workers = max(max_workers, 1)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self.queue_depth = 0  # Passwords being processed or waiting for a thread
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers,
+                thread_name_prefix="password-hash",
+            )
+        return self._executor
+
+    async def _run(self, fn, *args):
+        self.queue_depth += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), fn, *args)
+        finally:
+            self.queue_depth -= 1
+
+    async def hash(self, password: str) -> str:
+        """Hash a password."""
+        return await self._run(pwd_context.hash, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        """Verify a plain password against a hashed password."""
+        return await self._run(pwd_context.verify, plain_password, hashed_password)
+
+    async def verify_and_update(
+        self,
+        plain_password: str,
+        hashed_password: str,
+    ) -> Tuple[bool, Optional[str]]:
+        """
+        Verify a password and rehash it if its hash uses outdated settings.
+
+        Returns:
+            Whether the password matched, and the new hash to store if the
+            stored one needs an update (None otherwise)
+        """
+        return await self._run(_verify_and_update, plain_password, hashed_password)
+
+    def shutdown(self) -> None:
+        """Stop the hashing threads."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+_password_hasher: Optional[PasswordHasher] = None
+
+
+def get_password_hasher() -> PasswordHasher:
+    """Get the process-wide password hasher."""
+    global _password_hasher
+    if _password_hasher is None:
+        _password_hasher = PasswordHasher(max_workers=settings.PASSWORD_HASH_THREADS)
+    return _password_hasher
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
-    """Create a JWT access token."""
+    """Create a JWT access token with a unique token ID (jti)."""
     to_encode = data.copy()
     if expires_delta:
         expire = datetime.utcnow() + expires_delta
     else:
         expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    to_encode.update({"exp": expire})
+    # JWT requires the subject to be a string
+    if "sub" in to_encode:
+        to_encode["sub"] = str(to_encode["sub"])
+    to_encode.update({"exp": expire, "jti": uuid.uuid4().hex})
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
 
 def decode_token(token: str) -> Optional[TokenData]:
-    """Decode and validate a JWT token."""
+    """Decode and validate a JWT token, reusing the result for tokens seen before."""
+    cache = get_principal_cache()
+    token_data = cache.get_token(token)
+    if token_data is not None:
+        return token_data
+
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        user_id: int = payload.get("sub")
+        subject = payload.get("sub")
         username: str = payload.get("username")
-        if user_id is None:
+        if subject is None:
             return None
-        return TokenData(user_id=user_id, username=username)
-    except JWTError:
+        token_data = TokenData(
+            user_id=int(subject),
+            username=username,
+            token_id=payload.get("jti"),
+        )
+    except (JWTError, ValueError):
         return None
 
+    if "exp" in payload:
+        cache.set_token(token, token_data, float(payload["exp"]))
+    return token_data
+
 
-def authenticate_user(db: Session, username: str, password: str) -> Optional[User]:
-    """Authenticate a user by username and password."""
-    user = db.query(User).filter(User.username == username).first()
+async def authenticate_user_async(db: AsyncDB, username: str, password: str) -> Optional[User]:
+    """
+    Authenticate a user by username and password without blocking the event loop.
+
+    The password is checked in the password hasher's threads. If the stored
+    hash was made with outdated settings (e.g. a lower BCRYPT_ROUNDS), it is
+    replaced with a fresh hash of the password.
+    """
+    user = await db.run(_get_user_by_username, username)
     if not user:
         return None
-    if not verify_password(password, user.hashed_password):
+
+    verified, new_hash = await get_password_hasher().verify_and_update(
+        password, user.hashed_password
+    )
+    if not verified:
         return None
+
+    if new_hash is not None:
+        await db.run(_store_password_hash, user, new_hash)
     return user
 
 
+def _get_user_by_username(db: Session, username: str) -> Optional[User]:
+    return db.query(User).filter(User.username == username).first()
+
+
+def _get_user_by_id(db: Session, user_id: int) -> Optional[User]:
+    user = db.query(User).filter(User.id == user_id).first()
+    if user is not None:
+        # Detach the user so later commits, in this request or by requests
+        # reusing it from the principal cache, cannot expire its attributes
+        db.expunge(user)
+    return user
+
+
+def _store_password_hash(db: Session, user: User, hashed_password: str) -> None:
+    user.hashed_password = hashed_password
+    db.commit()
+
+
 async def get_current_user(
     token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
+    db: AsyncDB = Depends(get_async_db)
 ) -> User:
-    """Get the current authenticated user from JWT token."""
+    """
+    Get the current authenticated user from JWT token.
+
+    The user is cached per token for AUTH_CACHE_TTL seconds; endpoints that
+    change a user must invalidate it in the principal cache. On a cache miss
+    the user is loaded without blocking the event loop.
+    """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -81,9 +213,15 @@ async def get_current_user(
     token_data = decode_token(token)
     if token_data is None:
         raise credentials_exception
-    user = db.query(User).filter(User.id == token_data.user_id).first()
+
+    cache = get_principal_cache()
+    user = cache.get_user(token_data.user_id, token_data.token_id)
     if user is None:
-        raise credentials_exception
+        user = await db.run(_get_user_by_id, token_data.user_id)
+        if user is None:
+            raise credentials_exception
+        if cache.enabled:
+            cache.set_user(token_data.user_id, token_data.token_id, user)
     if not user.is_active:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -2,13 +2,25 @@
 Services package for business logic.
 """
 
+from app.services.llm_cache import LLMResponseCache, get_llm_cache
 from app.services.llm_service import LLMService, get_llm_service
 from app.services.pdf_service import PDFService
+from app.services.artifact_store import PDFArtifactStore, get_artifact_store
 from app.services.document_service import DocumentGenerationService
+from app.services.job_queue import DocumentJobQueue, get_job_queue
+from app.services.principal_cache import PrincipalCache, get_principal_cache
 
 __all__ = [
+    "LLMResponseCache",
+    "get_llm_cache",
     "LLMService",
     "get_llm_service",
     "PDFService",
+    "PDFArtifactStore",
+    "get_artifact_store",
     "DocumentGenerationService",
+    "DocumentJobQueue",
+    "get_job_queue",
+    "PrincipalCache",
+    "get_principal_cache",
 ]
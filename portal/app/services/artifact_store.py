@@ -0,0 +1,289 @@
+"""
+Content-addressed storage for rendered PDFs.
+
+A PDF is named after a hash of its rendered inputs and the PDF theme, so
+rendering identical content again reuses the existing file instead of
+writing a new one. Files are reference counted by the documents pointing at
+them, and unreferenced files are removed by garbage collection
+(see app.artifact_gc).
+"""
+
+import hashlib
+import logging
+import os
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import AsyncDB, create_async_db
+from app.models.artifact import PDFArtifact
+from app.models.document import Document
+from app.services.pdf_service import PDFService, get_pdf_service
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class GarbageCollectionResult:
+    """Outcome of a garbage collection run."""
+    refs_corrected: int = 0
+    artifacts_removed: int = 0
+    files_removed: int = 0
+    bytes_freed: int = 0
+
+
+class PDFArtifactStore:
+    """
+    Reference-counted store of rendered PDF files.
+
+    render() returns the path of a PDF for the given inputs, rendering it
+    only if no artifact with the same content hash exists. attach() and
+    detach() keep reference counts in step with Document.pdf_file_path.
+    """
+
+    def __init__(
+        self,
+        pdf_service: Optional[PDFService] = None,
+        session_factory: Optional[Callable[[], AsyncDB]] = None,
+    ):
+        self.pdf_service = pdf_service or get_pdf_service()
+        self.session_factory = session_factory or create_async_db
+
+    @property
+    def output_dir(self) -> Path:
+        return Path(self.pdf_service.output_dir)
+
+    def content_hash(
+        self,
+        title: str,
+        description: str,
+        content: str,
+        learning_goals: str,
+    ) -> str:
+        """Hash the rendered inputs together with the PDF theme version."""
+        theme = self.pdf_service.theme
+        digest = hashlib.sha256()
+        for part in (theme.name, theme.version, title, description, content, learning_goals):
+            digest.update((part or "").encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    async def render(
+        self,
+        title: str,
+        description: str,
+        content: str,
+        learning_goals: str,
+    ) -> str:
+        """
+        Get the PDF for the given inputs, rendering it if it is not stored yet.
+
+        New artifacts start with no references; attach the returned path to
+        a document to keep it from being garbage collected.
+
+        Returns:
+            Path to the PDF file
+        """
+        content_hash = self.content_hash(title, description, content, learning_goals)
+
+        existing_path = await self._run(self._lookup, content_hash)
+        if existing_path is not None:
+            return existing_path
+
+        # Render under a temporary name so concurrent renders of the same
+        # content never expose a partially written file
+        temp_path = await self.pdf_service.generate_pdf_async(
+            title=title,
+            description=description,
+            content=content,
+            learning_goals=learning_goals,
+            filename=f"{content_hash}.{uuid.uuid4().hex}.tmp",
+        )
+        file_path = str(self.output_dir / f"{content_hash}.pdf")
+        os.replace(temp_path, file_path)
+
+        await self._run(self._record, content_hash, file_path)
+        return file_path
+
+    async def _run(self, fn, *args):
+        """Run fn in a session of its own."""
+        db = self.session_factory()
+        try:
+            return await db.run(fn, *args)
+        finally:
+            await db.close()
+
+    def _lookup(self, db: Session, content_hash: str) -> Optional[str]:
+        """Return the stored file for a hash and mark it as recently used."""
+        artifact = db.query(PDFArtifact).filter(
+            PDFArtifact.content_hash == content_hash
+        ).first()
+        if artifact is None or not os.path.exists(artifact.file_path):
+            return None
+
+        artifact.last_used_at = datetime.utcnow()
+        db.commit()
+        return artifact.file_path
+
+    def _record(self, db: Session, content_hash: str, file_path: str) -> None:
+        """Store the artifact row for a newly rendered file."""
+        try:
+            size_bytes = os.path.getsize(file_path)
+            artifact = db.query(PDFArtifact).filter(
+                PDFArtifact.content_hash == content_hash
+            ).first()
+
+            if artifact is None:
+                db.add(PDFArtifact(
+                    content_hash=content_hash,
+                    file_path=file_path,
+                    size_bytes=size_bytes,
+                ))
+            else:
+                # The row outlived its file; the file has just been rewritten
+                artifact.file_path = file_path
+                artifact.size_bytes = size_bytes
+                artifact.last_used_at = datetime.utcnow()
+
+            db.commit()
+        except IntegrityError:
+            # Another worker recorded the same content at the same time
+            db.rollback()
+
+    def attach(self, db: Session, document: Document, file_path: str) -> None:
+        """
+        Point a document at a stored PDF, moving its reference from any previous file.
+
+        The change is committed with the caller's session.
+        """
+        previous_path = document.pdf_file_path
+        if previous_path == file_path:
+            return
+
+        self._adjust_refs(db, file_path, 1)
+        document.pdf_file_path = file_path
+        if previous_path:
+            self._release(db, previous_path)
+
+    def detach(self, db: Session, document: Document) -> None:
+        """
+        Remove a document's reference to its PDF.
+
+        The change is committed with the caller's session.
+        """
+        previous_path = document.pdf_file_path
+        document.pdf_file_path = None
+        if previous_path:
+            self._release(db, previous_path)
+
+    def _release(self, db: Session, file_path: str) -> None:
+        stored = db.query(PDFArtifact.id).filter(PDFArtifact.file_path == file_path).first()
+        if stored is not None:
+            self._adjust_refs(db, file_path, -1)
+            return
+
+        # Files rendered before the store existed belong to a single document
+        if os.path.exists(file_path):
+            os.remove(file_path)
+
+    def _adjust_refs(self, db: Session, file_path: str, delta: int) -> int:
+        """Atomically change an artifact's reference count; returns rows updated."""
+        query = db.query(PDFArtifact).filter(PDFArtifact.file_path == file_path)
+        if delta < 0:
+            query = query.filter(PDFArtifact.ref_count > 0)
+        return query.update(
+            {
+                "ref_count": PDFArtifact.ref_count + delta,
+                "last_used_at": datetime.utcnow(),
+            },
+            synchronize_session=False,
+        )
+
+    def collect_garbage(
+        self,
+        db: Session,
+        grace_period: Optional[float] = None,
+        dry_run: bool = False,
+    ) -> GarbageCollectionResult:
+        """
+        Delete unreferenced PDFs.
+
+        Reference counts are first recomputed from Document.pdf_file_path,
+        which corrects counts left behind by bulk deletes (e.g. cascading
+        from a deleted tabletop). Unreferenced artifacts and files in the
+        output directory that no document points at are then removed once
+        they are older than the grace period.
+
+        Args:
+            db: Database session
+            grace_period: Seconds an unreferenced file is kept
+                (defaults to settings.PDF_ARTIFACT_GC_GRACE_PERIOD)
+            dry_run: Report what would be removed without removing it
+
+        Returns:
+            Counts of corrected references and removed files
+        """
+        if grace_period is None:
+            grace_period = settings.PDF_ARTIFACT_GC_GRACE_PERIOD
+        cutoff = datetime.utcnow() - timedelta(seconds=grace_period)
+        result = GarbageCollectionResult()
+
+        ref_counts: Dict[str, int] = dict(
+            db.query(Document.pdf_file_path, func.count(Document.id))
+            .filter(Document.pdf_file_path.isnot(None))
+            .group_by(Document.pdf_file_path)
+            .all()
+        )
+        referenced = {_normalize(path) for path in ref_counts}
+
+        for artifact in db.query(PDFArtifact).all():
+            actual = ref_counts.get(artifact.file_path, 0)
+            if artifact.ref_count != actual:
+                artifact.ref_count = actual
+                result.refs_corrected += 1
+
+            if actual:
+                referenced.add(_normalize(artifact.file_path))
+            elif artifact.last_used_at and artifact.last_used_at < cutoff:
+                result.artifacts_removed += 1
+                if not dry_run:
+                    db.delete(artifact)
+            else:
+                # Still within its grace period
+                referenced.add(_normalize(artifact.file_path))
+
+        cutoff_timestamp = (datetime.now() - timedelta(seconds=grace_period)).timestamp()
+        for path in self.output_dir.iterdir():
+            if not path.is_file() or _normalize(path) in referenced:
+                continue
+            stat = path.stat()
+            if stat.st_mtime >= cutoff_timestamp:
+                continue
+
+            result.files_removed += 1
+            result.bytes_freed += stat.st_size
+            if not dry_run:
+                path.unlink(missing_ok=True)
+
+        if dry_run:
+            db.rollback()
+        else:
+            db.commit()
+
+        return result
+
+
+def _normalize(path) -> str:
+    return os.path.abspath(path)
+
+
+def get_artifact_store() -> PDFArtifactStore:
+    """Get a PDF artifact store instance."""
+    return PDFArtifactStore()
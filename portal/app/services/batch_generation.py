@@ -0,0 +1,510 @@
+"""
+Bulk document generation through provider batch APIs.
+
+For work that does not need interactive latency, such as regenerating every
+tabletop after a prompt change, the section prompts of many documents are
+collected into provider batches (see app.services.llm_batch), which cost
+less and do not use the interactive rate limits. A batch run is one
+provider batch:
+
+1. start() marks the documents GENERATING, records a BatchItem per section
+   and submits the section prompts
+2. poll() checks the batch's progress until the provider reports it ended
+3. collect() writes each document's sections, renders its PDF and marks it
+   COMPLETED, or FAILED if any of its sections failed
+
+Runs are stored in the database, so they can be polled from a later process
+(see app.batch).
+"""
+
+import asyncio
+import logging
+from collections import defaultdict
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session, selectinload
+
+from app.config import settings
+from app.database import AsyncDB, create_async_db
+from app.models.batch import BatchItem, BatchItemStatus, BatchRun, BatchRunStatus
+from app.models.document import Document, DocumentStatus, DocumentType
+from app.models.tabletop import Tabletop
+from app.agents import get_agent_for_document_type
+from app.agents.base import BaseDocumentAgent, DocumentContent
+from app.repositories.tabletop import query_tabletops
+from app.services.artifact_store import PDFArtifactStore
+from app.services.llm_batch import BatchRequest, BatchResult, get_batch_backend
+from app.services.llm_service import PROVIDER_CLASSES, LLMService, get_llm_service
+
+logger = logging.getLogger(__name__)
+
+SECTIONS = ("description", "content", "learning_goals")
+
+
+class BatchGenerationService:
+    """Plans, submits, polls and collects batch runs."""
+
+    def __init__(
+        self,
+        llm_service: Optional[LLMService] = None,
+        session_factory: Optional[Callable[[], AsyncDB]] = None,
+        artifact_store: Optional[PDFArtifactStore] = None,
+    ):
+        self.llm_service = llm_service or get_llm_service()
+        self.session_factory = session_factory or create_async_db
+        self.artifact_store = artifact_store or PDFArtifactStore(
+            session_factory=self.session_factory
+        )
+
+    async def start(
+        self,
+        tabletop_ids: Optional[List[int]] = None,
+        document_types: Optional[List[DocumentType]] = None,
+        provider: Optional[str] = None,
+    ) -> List[int]:
+        """
+        Start batch generation of documents.
+
+        Documents that are already generating are skipped. The section
+        requests are split into runs of at most settings.BATCH_MAX_REQUESTS.
+
+        Args:
+            tabletop_ids: Tabletops to generate documents for
+                (defaults to every tabletop with all questions answered)
+            document_types: Document types to generate (all if None)
+            provider: LLM provider whose batch API is used
+                (defaults to the first of the configured routes)
+
+        Returns:
+            IDs of the submitted runs
+        """
+        if document_types is None:
+            document_types = list(DocumentType)
+        if provider is None:
+            provider = self.llm_service.router.routes[0].provider
+        provider = provider.lower()
+        if provider not in PROVIDER_CLASSES:
+            raise ValueError(f"Unknown LLM provider: {provider}")
+        # Fail before any document is marked GENERATING
+        get_batch_backend(provider)
+
+        db = self.session_factory()
+        try:
+            run_ids = await db.run(
+                self._plan, tabletop_ids, list(dict.fromkeys(document_types)), provider
+            )
+        finally:
+            await db.close()
+
+        for run_id in run_ids:
+            await self.submit(run_id)
+        return run_ids
+
+    def _plan(
+        self,
+        db: Session,
+        tabletop_ids: Optional[List[int]],
+        document_types: List[DocumentType],
+        provider: str,
+    ) -> List[int]:
+        """Mark the documents GENERATING and record their runs and items."""
+        query = query_tabletops(db, with_questions=True, with_documents=True)
+        if tabletop_ids is not None:
+            query = query.filter(Tabletop.id.in_(tabletop_ids))
+        tabletops = [tabletop for tabletop in query.order_by(Tabletop.id) if tabletop.is_complete]
+
+        items = []
+        for tabletop in tabletops:
+            documents_by_type = {document.document_type: document for document in tabletop.documents}
+            for document_type in document_types:
+                document = documents_by_type.get(document_type)
+                if document is None:
+                    document = Document(tabletop_id=tabletop.id, document_type=document_type)
+                    db.add(document)
+                elif document.status == DocumentStatus.GENERATING:
+                    logger.info("Skipping document %d, which is already generating", document.id)
+                    continue
+                document.status = DocumentStatus.GENERATING
+                document.error_message = None
+
+                agent = get_agent_for_document_type(document_type)
+                for section in SECTIONS:
+                    model = self._model(agent, section, provider)
+                    items.append(BatchItem(
+                        document=document,
+                        section=section,
+                        model=model,
+                        max_tokens=PROVIDER_CLASSES[provider].clamp_max_tokens(
+                            model, agent.section_budget(section).max_tokens
+                        ),
+                    ))
+
+        runs = []
+        max_requests = max(settings.BATCH_MAX_REQUESTS, len(SECTIONS))
+        # Keep a document's sections in the same run
+        per_run = max_requests - max_requests % len(SECTIONS)
+        for start in range(0, len(items), per_run):
+            run_items = items[start:start + per_run]
+            runs.append(BatchRun(provider=provider, request_count=len(run_items), items=run_items))
+        db.add_all(runs)
+        db.commit()
+        return [run.id for run in runs]
+
+    def _model(self, agent: BaseDocumentAgent, section: str, provider: str) -> str:
+        """The model a section would use on the provider in interactive generation."""
+        tier = agent.section_budget(section).tier
+        router = self.llm_service.router_for(agent.llm_task(section), tier)
+        for route in router.routes:
+            if route.provider == provider:
+                return route.model
+        provider_class = PROVIDER_CLASSES[provider]
+        return provider_class.tier_models.get(tier) or provider_class.default_model()
+
+    async def submit(self, run_id: int) -> None:
+        """Send a pending run's requests to the provider's batch API."""
+        db = self.session_factory()
+        try:
+            run = await db.run(self._load_run, run_id)
+            if run is None or run.status != BatchRunStatus.PENDING:
+                return
+            try:
+                requests = await db.run(self._requests, run)
+                batch_id = await get_batch_backend(run.provider).submit(requests)
+            except Exception as e:
+                logger.exception("Submitting batch run %d failed", run_id)
+                await db.run(self._fail_run, run, f"Batch submission failed: {e}")
+                return
+            await db.run(self._submitted, run, batch_id)
+            logger.info(
+                "Submitted batch run %d (%d requests) as %s batch %s",
+                run.id, run.request_count, run.provider, batch_id,
+            )
+        finally:
+            await db.close()
+
+    @staticmethod
+    def _load_run(db: Session, run_id: int) -> Optional[BatchRun]:
+        return db.query(BatchRun).options(
+            selectinload(BatchRun.items)
+        ).filter(BatchRun.id == run_id).first()
+
+    @staticmethod
+    def _requests(db: Session, run: BatchRun) -> List[BatchRequest]:
+        """Build the prompt of every item in a run."""
+        documents = {
+            document.id: document
+            for document in db.query(Document).filter(
+                Document.id.in_({item.document_id for item in run.items})
+            )
+        }
+        tabletops = {
+            tabletop.id: tabletop
+            for tabletop in query_tabletops(db, with_questions=True).filter(
+                Tabletop.id.in_({document.tabletop_id for document in documents.values()})
+            )
+        }
+
+        prompts = {}
+        for document in documents.values():
+            agent = get_agent_for_document_type(document.document_type)
+            prompts[document.id] = dict(agent.section_prompts(tabletops[document.tabletop_id]))
+
+        return [
+            BatchRequest(
+                custom_id=str(item.id),
+                prompt=prompts[item.document_id][item.section],
+                max_tokens=item.max_tokens,
+                model=item.model,
+            )
+            for item in run.items
+        ]
+
+    @staticmethod
+    def _submitted(db: Session, run: BatchRun, batch_id: str) -> None:
+        run.status = BatchRunStatus.SUBMITTED
+        run.provider_batch_id = batch_id
+        run.submitted_at = datetime.utcnow()
+        db.commit()
+
+    @staticmethod
+    def _fail_run(db: Session, run: BatchRun, error: str) -> None:
+        """Fail a run, its unfinished items and the documents still waiting for them."""
+        pending_document_ids = set()
+        for item in run.items:
+            if item.status == BatchItemStatus.PENDING:
+                item.status = BatchItemStatus.FAILED
+                item.error_message = error
+                pending_document_ids.add(item.document_id)
+        db.query(Document).filter(
+            Document.id.in_(pending_document_ids),
+            Document.status == DocumentStatus.GENERATING,
+        ).update(
+            {"status": DocumentStatus.FAILED, "error_message": error},
+            synchronize_session=False,
+        )
+        run.status = BatchRunStatus.FAILED
+        run.error_message = error
+        run.failed_count = sum(1 for item in run.items if item.status == BatchItemStatus.FAILED)
+        run.completed_at = datetime.utcnow()
+        db.commit()
+
+    async def poll(self, run_id: int) -> Optional[BatchRun]:
+        """
+        Check a run's progress, collecting its results once the batch has ended.
+
+        Pending runs, e.g. left behind by a crash before submission, are
+        submitted.
+
+        Returns:
+            The run, or None if not found
+        """
+        db = self.session_factory()
+        try:
+            run = await db.run(self._load_run, run_id)
+            if run is None:
+                return None
+            if run.status == BatchRunStatus.PENDING:
+                await self.submit(run_id)
+                return await db.run(self._reload, run)
+            if run.status != BatchRunStatus.SUBMITTED:
+                return run
+
+            progress = await get_batch_backend(run.provider).progress(run.provider_batch_id)
+            await db.run(self._update_counts, run, progress.succeeded, progress.failed)
+            if progress.ended:
+                await self.collect(db, run, progress.error)
+            return run
+        finally:
+            await db.close()
+
+    @staticmethod
+    def _reload(db: Session, run: BatchRun) -> BatchRun:
+        db.refresh(run)
+        return run
+
+    @staticmethod
+    def _update_counts(db: Session, run: BatchRun, succeeded: int, failed: int) -> None:
+        run.succeeded_count = succeeded
+        run.failed_count = failed
+        db.commit()
+
+    async def collect(self, db: AsyncDB, run: BatchRun, error: Optional[str] = None) -> None:
+        """
+        Write an ended run's results to its documents.
+
+        Only documents still GENERATING are written, so documents regenerated
+        in the meantime are left alone. Collecting again after an
+        interruption picks up where the last attempt stopped.
+
+        Args:
+            db: Database session the run was loaded in
+            run: The run, with its items loaded
+            error: Why the whole batch failed, if it did
+        """
+        results = await get_batch_backend(run.provider).results(run.provider_batch_id)
+        if error and not results:
+            await db.run(self._fail_run, run, error)
+            logger.warning("Batch run %d failed: %s", run.id, error)
+            return
+
+        finished = await db.run(self._record_results, run, {result.custom_id: result for result in results})
+        for document_id, content in finished:
+            try:
+                pdf_path = await self.artifact_store.render(
+                    title=content.title,
+                    description=content.description,
+                    content=content.content,
+                    learning_goals=content.learning_goals,
+                )
+            except Exception as e:
+                logger.exception("Rendering the PDF of document %d failed", document_id)
+                await db.run(self._complete_document, document_id, content, None, str(e))
+                continue
+            await db.run(self._complete_document, document_id, content, pdf_path, None)
+
+        await db.run(self._complete_run, run)
+        logger.info(
+            "Batch run %d completed: %d requests succeeded, %d failed",
+            run.id, run.succeeded_count, run.failed_count,
+        )
+
+    @staticmethod
+    def _record_results(
+        db: Session,
+        run: BatchRun,
+        results: Dict[str, BatchResult],
+    ) -> List[Tuple[int, DocumentContent]]:
+        """
+        Store each item's result and fail documents with a failed section.
+
+        Returns:
+            (document ID, content) of the generating documents whose sections
+            all succeeded
+        """
+        items_by_document = defaultdict(list)
+        for item in run.items:
+            result = results.get(str(item.id))
+            if item.status == BatchItemStatus.PENDING:
+                if result is None:
+                    item.status = BatchItemStatus.FAILED
+                    item.error_message = "The batch returned no result for this request"
+                elif result.error is not None or result.text is None:
+                    item.status = BatchItemStatus.FAILED
+                    item.error_message = result.error or "Empty response"
+                else:
+                    item.status = BatchItemStatus.SUCCEEDED
+                    item.result = result.text
+            items_by_document[item.document_id].append(item)
+
+        documents = db.query(Document).filter(
+            Document.id.in_(items_by_document),
+            Document.status == DocumentStatus.GENERATING,
+        ).all()
+        tabletops = {
+            tabletop.id: tabletop
+            for tabletop in db.query(Tabletop).filter(
+                Tabletop.id.in_({document.tabletop_id for document in documents})
+            )
+        }
+
+        finished = []
+        for document in documents:
+            items = items_by_document[document.id]
+            errors = [
+                f"{item.section.replace('_', ' ')}: {item.error_message}"
+                for item in items if item.status == BatchItemStatus.FAILED
+            ]
+            if errors:
+                document.status = DocumentStatus.FAILED
+                document.error_message = "; ".join(errors)
+                continue
+
+            agent = get_agent_for_document_type(document.document_type)
+            sections = {item.section: item.result for item in items}
+            finished.append((document.id, DocumentContent(
+                title=agent.generate_title(tabletops[document.tabletop_id]),
+                description=sections["description"],
+                content=sections["content"],
+                learning_goals=sections["learning_goals"],
+            )))
+
+        run.succeeded_count = sum(1 for item in run.items if item.status == BatchItemStatus.SUCCEEDED)
+        run.failed_count = sum(1 for item in run.items if item.status == BatchItemStatus.FAILED)
+        db.commit()
+        return finished
+
+    def _complete_document(
+        self,
+        db: Session,
+        document_id: int,
+        content: DocumentContent,
+        pdf_path: Optional[str],
+        error: Optional[str],
+    ) -> None:
+        """Store a document's content and PDF, or fail it if rendering failed."""
+        document = db.get(Document, document_id)
+        if document is None or document.status != DocumentStatus.GENERATING:
+            return
+        if pdf_path is None:
+            document.status = DocumentStatus.FAILED
+            document.error_message = error
+            db.commit()
+            return
+
+        document.title = content.title
+        document.description = content.description
+        document.content = content.content
+        document.learning_goals = content.learning_goals
+        document.agent_name = get_agent_for_document_type(document.document_type).name
+        self.artifact_store.attach(db, document, pdf_path)
+        document.status = DocumentStatus.COMPLETED
+        document.generated_at = datetime.utcnow()
+        db.commit()
+
+    @staticmethod
+    def _complete_run(db: Session, run: BatchRun) -> None:
+        run.status = BatchRunStatus.COMPLETED
+        run.completed_at = datetime.utcnow()
+        db.commit()
+
+    async def wait(
+        self,
+        run_ids: Optional[List[int]] = None,
+        poll_interval: Optional[float] = None,
+    ) -> List[BatchRun]:
+        """
+        Poll runs until they have all finished.
+
+        Args:
+            run_ids: Runs to wait for (defaults to every unfinished run)
+            poll_interval: Seconds between polls
+                (defaults to settings.BATCH_POLL_INTERVAL)
+
+        Returns:
+            The finished runs
+        """
+        if poll_interval is None:
+            poll_interval = settings.BATCH_POLL_INTERVAL
+        if run_ids is None:
+            run_ids = await self.unfinished_run_ids()
+
+        finished = {}
+        while True:
+            for run_id in run_ids:
+                if run_id in finished:
+                    continue
+                run = await self.poll(run_id)
+                if run is None or run.status in (BatchRunStatus.COMPLETED, BatchRunStatus.FAILED):
+                    finished[run_id] = run
+            if len(finished) == len(run_ids):
+                return [run for run in finished.values() if run is not None]
+            await asyncio.sleep(poll_interval)
+
+    async def unfinished_run_ids(self) -> List[int]:
+        """IDs of runs that are pending or submitted."""
+        return [run.id for run in await self.list_runs(unfinished_only=True)]
+
+    async def list_runs(self, unfinished_only: bool = False) -> List[BatchRun]:
+        """Batch runs, oldest first."""
+        db = self.session_factory()
+        try:
+            return await db.run(self._list_runs, unfinished_only)
+        finally:
+            await db.close()
+
+    @staticmethod
+    def _list_runs(db: Session, unfinished_only: bool) -> List[BatchRun]:
+        query = db.query(BatchRun)
+        if unfinished_only:
+            query = query.filter(BatchRun.status.in_((BatchRunStatus.PENDING, BatchRunStatus.SUBMITTED)))
+        return query.order_by(BatchRun.id).all()
+
+    async def cancel(self, run_id: int) -> Optional[BatchRun]:
+        """
+        Cancel a run.
+
+        A pending run fails right away. A submitted run is cancelled at the
+        provider, and the results it finished before stopping are collected
+        by the next poll.
+
+        Returns:
+            The run, or None if not found
+        """
+        db = self.session_factory()
+        try:
+            run = await db.run(self._load_run, run_id)
+            if run is None:
+                return None
+            if run.status == BatchRunStatus.PENDING:
+                await db.run(self._fail_run, run, "Batch run cancelled")
+            elif run.status == BatchRunStatus.SUBMITTED:
+                await get_batch_backend(run.provider).cancel(run.provider_batch_id)
+            return run
+        finally:
+            await db.close()
+
+
+def get_batch_generation_service() -> BatchGenerationService:
+    """Get the batch generation service instance."""
+    return BatchGenerationService()
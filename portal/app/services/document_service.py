@@ -2,16 +2,23 @@
 Document generation orchestration service.
 """
 
+import asyncio
 from datetime import datetime
-from typing import List, Optional
+from typing import AsyncIterator, Callable, Optional, Set
 
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
+from app.database import AsyncDB, create_async_db
 from app.models.tabletop import Tabletop
 from app.models.document import Document, DocumentType, DocumentStatus
 from app.agents import get_agent_for_document_type
+from app.agents.base import DocumentContent
+from app.repositories.tabletop import get_tabletop
 from app.services.llm_service import LLMService, get_llm_service
 from app.services.pdf_service import PDFService, get_pdf_service
+from app.services.artifact_store import PDFArtifactStore
+from app.services.job_queue import get_job_queue
 
 
 class DocumentGenerationService:
@@ -26,46 +33,38 @@ class DocumentGenerationService:
         self,
         llm_service: Optional[LLMService] = None,
         pdf_service: Optional[PDFService] = None,
+        session_factory: Optional[Callable[[], AsyncDB]] = None,
+        artifact_store: Optional[PDFArtifactStore] = None,
     ):
         self.llm_service = llm_service or get_llm_service()
         self.pdf_service = pdf_service or get_pdf_service()
+        self.session_factory = session_factory or create_async_db
+        self.artifact_store = artifact_store or PDFArtifactStore(
+            self.pdf_service, self.session_factory
+        )
+        self._background_tasks: Set[asyncio.Task] = set()
 
     async def generate_document(
         self,
-        db: Session,
+        db: AsyncDB,
         tabletop: Tabletop,
         document_type: DocumentType,
+        use_cache: Optional[bool] = None,
     ) -> Document:
         """
         Generate a single document for a tabletop exercise.
 
         Args:
             db: Database session
-            tabletop: The tabletop exercise
+            tabletop: The tabletop exercise, with its questions loaded
             document_type: Type of document to generate
+            use_cache: Read cached LLM responses (defaults to the LLM
+                service setting)
 
         Returns:
             The generated Document record
         """
-        # Check if document already exists
-        existing = db.query(Document).filter(
-            Document.tabletop_id == tabletop.id,
-            Document.document_type == document_type,
-        ).first()
-
-        if existing:
-            document = existing
-            document.status = DocumentStatus.GENERATING
-        else:
-            document = Document(
-                tabletop_id=tabletop.id,
-                document_type=document_type,
-                status=DocumentStatus.GENERATING,
-            )
-            db.add(document)
-
-        db.commit()
-        db.refresh(document)
+        document = await db.run(self._start_document, tabletop, document_type)
 
         try:
             # Get the appropriate agent for this document type
@@ -73,80 +72,232 @@ class DocumentGenerationService:
             document.agent_name = agent.name
 
             # Generate content using the agent
-            content = await agent.generate(tabletop, self.llm_service)
-
-            # Update document with generated content
-            document.title = content.title
-            document.description = content.description
-            document.content = content.content
-            document.learning_goals = content.learning_goals
-
-            # Generate PDF
-            pdf_path = self.pdf_service.generate_pdf(
-                title=content.title,
-                description=content.description,
-                content=content.content,
-                learning_goals=content.learning_goals,
-            )
-            document.pdf_file_path = pdf_path
+            content = await agent.generate(tabletop, self.llm_service, use_cache=use_cache)
 
-            # Mark as completed
-            document.status = DocumentStatus.COMPLETED
-            document.generated_at = datetime.utcnow()
+            await self._complete_document(db, document, content)
 
         except Exception as e:
             document.status = DocumentStatus.FAILED
             document.error_message = str(e)
 
-        db.commit()
-        db.refresh(document)
+        await db.run(self._save, document)
 
         return document
 
-    async def generate_all_documents(
+    async def stream_document(self, document_id: int) -> AsyncIterator[dict]:
+        """
+        Generate a single document, yielding progress events as they happen.
+
+        The document must have been claimed with claim_document(). Uses its
+        own database session so it can outlive the request handler. If the
+        consumer stops listening before the document is finished, the
+        document is returned to the job queue for the worker to complete.
+
+        Args:
+            document_id: ID of the claimed document
+
+        Yields:
+            Events as {"event": name, "data": dict}:
+            - "status": document_id, status and error_message
+            - "token": section and text of newly generated content
+        """
+        db = self.session_factory()
+        document = None
+        finished = False
+
+        try:
+            document = await db.run(Session.get, Document, document_id)
+            if document is None:
+                return
+            tabletop = await db.run(get_tabletop, document.tabletop_id, with_questions=True)
+            if tabletop is None:
+                return
+
+            yield self._status_event(document)
+
+            sections = {"description": [], "content": [], "learning_goals": []}
+            try:
+                agent = get_agent_for_document_type(document.document_type)
+                document.agent_name = agent.name
+
+                async for section, text in agent.stream(tabletop, self.llm_service):
+                    sections[section].append(text)
+                    yield {"event": "token", "data": {"section": section, "text": text}}
+
+                content = DocumentContent(
+                    title=agent.generate_title(tabletop),
+                    description="".join(sections["description"]),
+                    content="".join(sections["content"]),
+                    learning_goals="".join(sections["learning_goals"]),
+                )
+                await self._complete_document(db, document, content)
+
+            except Exception as e:
+                document.status = DocumentStatus.FAILED
+                document.error_message = str(e)
+
+            await db.run(self._save, document)
+            finished = True
+
+            yield self._status_event(document)
+
+        finally:
+            # The consumer's task may be cancelled, and a cancelled scope
+            # cancels every later await too, so clean up in a shielded task
+            unfinished_id = document.id if document is not None and not finished else None
+            cleanup = asyncio.ensure_future(self._close_stream(db, unfinished_id))
+            self._background_tasks.add(cleanup)
+            cleanup.add_done_callback(self._background_tasks.discard)
+            await asyncio.shield(cleanup)
+
+    def claim_document(
         self,
         db: Session,
         tabletop: Tabletop,
-        document_types: Optional[List[DocumentType]] = None,
-    ) -> List[Document]:
+        document_type: DocumentType,
+    ) -> Optional[Document]:
         """
-        Generate multiple documents for a tabletop exercise.
+        Mark a document as generating, unless it already is.
 
-        Args:
-            db: Database session
-            tabletop: The tabletop exercise
-            document_types: List of document types to generate (all if None)
+        A document that is generating belongs to a worker job, a batch run or
+        another stream, and generating it again here would race it for the
+        content and the PDF.
 
         Returns:
-            List of generated Document records
+            The claimed document, or None if it is already generating
         """
-        if document_types is None:
-            document_types = list(DocumentType)
+        existing = db.query(Document).filter(
+            Document.tabletop_id == tabletop.id,
+            Document.document_type == document_type,
+        ).first()
 
-        documents = []
-        for doc_type in document_types:
-            document = await self.generate_document(db, tabletop, doc_type)
-            documents.append(document)
+        if existing is None:
+            document = Document(
+                tabletop_id=tabletop.id,
+                document_type=document_type,
+                status=DocumentStatus.GENERATING,
+            )
+            db.add(document)
+            try:
+                db.commit()
+            except IntegrityError:
+                # Another request created the same document first
+                db.rollback()
+                return self.claim_document(db, tabletop, document_type)
+            db.refresh(document)
+            return document
 
-        return documents
+        # A conditional update, so only one of concurrent claims succeeds
+        claimed = db.query(Document).filter(
+            Document.id == existing.id,
+            Document.status != DocumentStatus.GENERATING,
+        ).update(
+            {
+                "status": DocumentStatus.GENERATING,
+                "error_message": None,
+                "updated_at": datetime.utcnow(),
+            },
+            synchronize_session=False,
+        )
+        db.commit()
+        if not claimed:
+            return None
+        db.refresh(existing)
+        return existing
 
-    async def regenerate_document(
+    def _start_document(
         self,
         db: Session,
-        document: Document,
+        tabletop: Tabletop,
+        document_type: DocumentType,
     ) -> Document:
-        """
-        Regenerate an existing document.
+        """Get or create the document record and mark it as generating."""
+        # Check if document already exists
+        existing = db.query(Document).filter(
+            Document.tabletop_id == tabletop.id,
+            Document.document_type == document_type,
+        ).first()
 
-        Args:
-            db: Database session
-            document: The document to regenerate
+        if existing:
+            document = existing
+            document.status = DocumentStatus.GENERATING
+            document.error_message = None
+        else:
+            document = Document(
+                tabletop_id=tabletop.id,
+                document_type=document_type,
+                status=DocumentStatus.GENERATING,
+            )
+            db.add(document)
 
-        Returns:
-            The regenerated Document record
-        """
-        tabletop = document.tabletop
-        return await self.generate_document(db, tabletop, document.document_type)
+        try:
+            db.commit()
+        except IntegrityError:
+            # Another request created the same document first; take over its
+            # row. The rollback expired the tabletop, so reload it for the agent.
+            db.rollback()
+            db.refresh(tabletop)
+            db.refresh(tabletop, ["questions"])
+            return self._start_document(db, tabletop, document_type)
+
+        db.refresh(document)
+
+        return document
+
+    @staticmethod
+    def _save(db: Session, document: Document) -> None:
+        db.commit()
+        db.refresh(document)
+
+    async def _close_stream(self, db: AsyncDB, unfinished_id: Optional[int]) -> None:
+        await db.close()
+        if unfinished_id is not None:
+            await self._release_job(unfinished_id)
+
+    async def _release_job(self, document_id: int) -> None:
+        """Return an unfinished document to the job queue, in a fresh session."""
+        db = self.session_factory()
+        try:
+            await db.run(get_job_queue().release, document_id)
+        finally:
+            await db.close()
+
+    async def _complete_document(
+        self,
+        db: AsyncDB,
+        document: Document,
+        content: DocumentContent,
+    ) -> None:
+        """Store generated content on the document and render its PDF."""
+        # Update document with generated content
+        document.title = content.title
+        document.description = content.description
+        document.content = content.content
+        document.learning_goals = content.learning_goals
+
+        # Reuse or render the PDF off the event loop
+        pdf_path = await self.artifact_store.render(
+            title=content.title,
+            description=content.description,
+            content=content.content,
+            learning_goals=content.learning_goals,
+        )
+        await db.run(self.artifact_store.attach, document, pdf_path)
+
+        # Mark as completed
+        document.status = DocumentStatus.COMPLETED
+        document.generated_at = datetime.utcnow()
+
+    @staticmethod
+    def _status_event(document: Document) -> dict:
+        return {
+            "event": "status",
+            "data": {
+                "document_id": document.id,
+                "status": document.status.value,
+                "error_message": document.error_message,
+            },
+        }
 
 
 def get_document_service() -> DocumentGenerationService:
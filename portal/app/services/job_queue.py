@@ -0,0 +1,185 @@
+"""
+Database-backed job queue for document generation.
+
+Documents in PENDING status are the queue. API requests enqueue documents and
+return immediately, while worker processes (see app.worker) claim and
+generate them.
+"""
+
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from sqlalchemy import exists
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.batch import BatchItem, BatchItemStatus
+from app.models.tabletop import Tabletop
+from app.models.document import Document, DocumentType, DocumentStatus
+from app.services.rate_limiter import Priority
+
+
+class DocumentJobQueue:
+    """
+    Job queue stored in the documents table.
+
+    A job is a Document row. Its ID is the job ID and its status tracks the
+    job through PENDING -> GENERATING -> COMPLETED / FAILED.
+    """
+
+    def enqueue(
+        self,
+        db: Session,
+        tabletop: Tabletop,
+        document_types: List[DocumentType],
+        priority: Priority = Priority.BULK,
+        use_cache: bool = True,
+    ) -> List[Document]:
+        """
+        Queue documents for generation.
+
+        Existing documents are reset to PENDING; documents that are already
+        queued or generating are left as they are, though a queued document
+        is moved up if its new priority is higher, and stops using the LLM
+        cache if asked to.
+
+        Args:
+            db: Database session
+            tabletop: The tabletop exercise
+            document_types: Document types to generate
+            priority: Lane the documents' LLM requests are sent in; interactive
+                jobs are also claimed before bulk jobs
+            use_cache: Whether the LLM may answer from cached responses; False
+                forces new content for documents whose prompts have not changed
+
+        Returns:
+            The queued Document records, in the requested order
+        """
+        unique_types = list(dict.fromkeys(document_types))
+
+        documents_by_type = {
+            document.document_type: document
+            for document in db.query(Document).filter(
+                Document.tabletop_id == tabletop.id,
+                Document.document_type.in_(unique_types),
+            ).all()
+        }
+
+        for doc_type in unique_types:
+            document = documents_by_type.get(doc_type)
+            if document is None:
+                document = Document(
+                    tabletop_id=tabletop.id,
+                    document_type=doc_type,
+                    status=DocumentStatus.PENDING,
+                    priority=int(priority),
+                    use_cache=use_cache,
+                )
+                db.add(document)
+                documents_by_type[doc_type] = document
+            elif document.status not in (DocumentStatus.PENDING, DocumentStatus.GENERATING):
+                document.status = DocumentStatus.PENDING
+                document.error_message = None
+                document.priority = int(priority)
+                document.use_cache = use_cache
+            elif document.status == DocumentStatus.PENDING:
+                document.priority = min(document.priority, int(priority))
+                document.use_cache = document.use_cache and use_cache
+
+        try:
+            db.commit()
+        except IntegrityError:
+            # A concurrent request created some of the documents first
+            db.rollback()
+            return self.enqueue(db, tabletop, document_types, priority, use_cache)
+
+        return [documents_by_type[doc_type] for doc_type in document_types]
+
+    def claim_next(self, db: Session) -> Optional[int]:
+        """
+        Claim the oldest pending job of the highest priority.
+
+        The claim is a conditional update from PENDING to GENERATING, so
+        several workers can poll the same database without taking the same job.
+
+        Returns:
+            The claimed document ID, or None if the queue is empty
+        """
+        while True:
+            candidate = db.query(Document.id).filter(
+                Document.status == DocumentStatus.PENDING,
+            ).order_by(
+                Document.priority, Document.updated_at, Document.id
+            ).with_for_update(skip_locked=True).first()
+
+            if candidate is None:
+                db.commit()
+                return None
+
+            claimed = db.query(Document).filter(
+                Document.id == candidate.id,
+                Document.status == DocumentStatus.PENDING,
+            ).update(
+                {"status": DocumentStatus.GENERATING, "updated_at": datetime.utcnow()},
+                synchronize_session=False,
+            )
+            db.commit()
+
+            if claimed:
+                return candidate.id
+
+    def release(self, db: Session, document_id: int) -> None:
+        """Return an unfinished job to the queue."""
+        db.query(Document).filter(
+            Document.id == document_id,
+            Document.status == DocumentStatus.GENERATING,
+        ).update(
+            {"status": DocumentStatus.PENDING},
+            synchronize_session=False,
+        )
+        db.commit()
+
+    def fail(self, db: Session, document_id: int, error_message: str) -> None:
+        """Mark a job that could not be run as failed."""
+        db.query(Document).filter(
+            Document.id == document_id,
+            Document.status == DocumentStatus.GENERATING,
+        ).update(
+            {"status": DocumentStatus.FAILED, "error_message": error_message},
+            synchronize_session=False,
+        )
+        db.commit()
+
+    def requeue_stale(self, db: Session, older_than: timedelta) -> int:
+        """
+        Return jobs left in GENERATING by a crashed worker to the queue.
+
+        Documents waiting for a batch run (see app.services.batch_generation)
+        are not jobs of any worker and stay GENERATING.
+
+        Args:
+            db: Database session
+            older_than: How long a job may be generating before it is stale
+
+        Returns:
+            Number of jobs requeued
+        """
+        cutoff = datetime.utcnow() - older_than
+        requeued = db.query(Document).filter(
+            Document.status == DocumentStatus.GENERATING,
+            Document.updated_at < cutoff,
+            ~exists().where(
+                BatchItem.document_id == Document.id,
+                BatchItem.status == BatchItemStatus.PENDING,
+            ),
+        ).update(
+            {"status": DocumentStatus.PENDING},
+            synchronize_session=False,
+        )
+        db.commit()
+        return requeued
+
+
+def get_job_queue() -> DocumentJobQueue:
+    """Get the document job queue instance."""
+    return DocumentJobQueue()
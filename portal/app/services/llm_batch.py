@@ -0,0 +1,307 @@
+"""
+Provider batch APIs for bulk LLM requests.
+
+Batch requests are processed by the provider within 24 hours at a lower
+price than interactive requests, and do not count against the interactive
+rate limits. Each backend submits a list of requests, reports the batch's
+progress and returns its results by custom ID:
+
+- OpenAI: the Batch API, with a JSONL file of chat completion requests
+- Anthropic: Message Batches
+- Mock: a local stand-in that answers with the mock provider's content,
+  keeping its state in settings.BATCH_LOCAL_DIR so separate processes can
+  submit and poll the same batch
+"""
+
+import json
+import time
+import uuid
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import List, Optional
+
+from app.config import settings
+from app.prompt import Prompt
+from app.services.llm_metrics import LLMUsage
+from app.services.llm_service import (
+    SYSTEM_PROMPT,
+    AnthropicProvider,
+    MockProvider,
+    OpenAIProvider,
+    get_provider_registry,
+)
+
+
+@dataclass
+class BatchRequest:
+    """A single LLM request in a batch."""
+    custom_id: str
+    prompt: Prompt
+    max_tokens: int
+    model: str
+
+
+@dataclass
+class BatchResult:
+    """The response to a batch request: its text, or why it failed."""
+    custom_id: str
+    text: Optional[str] = None
+    error: Optional[str] = None
+
+
+@dataclass
+class BatchProgress:
+    """Progress of a submitted batch."""
+    ended: bool
+    total: int = 0
+    succeeded: int = 0
+    failed: int = 0
+    error: Optional[str] = None  # Set if the whole batch failed
+
+
+class BaseBatchBackend(ABC):
+    """Base class for provider batch APIs."""
+
+    @abstractmethod
+    async def submit(self, requests: List[BatchRequest]) -> str:
+        """Submit requests as one batch; returns the provider's batch ID."""
+        pass
+
+    @abstractmethod
+    async def progress(self, batch_id: str) -> BatchProgress:
+        """Get the progress of a batch."""
+        pass
+
+    @abstractmethod
+    async def results(self, batch_id: str) -> List[BatchResult]:
+        """Get the results of an ended batch."""
+        pass
+
+    @abstractmethod
+    async def cancel(self, batch_id: str) -> None:
+        """Ask the provider to stop a batch; finished requests keep their results."""
+        pass
+
+
+class OpenAIBatchBackend(BaseBatchBackend):
+    """OpenAI Batch API for chat completions."""
+
+    ENDPOINT = "/v1/chat/completions"
+    # Batch statuses after which no more results are produced
+    ENDED = {"completed", "failed", "expired", "cancelled"}
+
+    def __init__(self, provider: Optional[OpenAIProvider] = None):
+        self.provider = provider or get_provider_registry().get("openai")
+
+    async def submit(self, requests: List[BatchRequest]) -> str:
+        lines = [
+            json.dumps({
+                "custom_id": request.custom_id,
+                "method": "POST",
+                "url": self.ENDPOINT,
+                "body": {
+                    "model": request.model,
+                    "messages": self.provider._messages(request.prompt),
+                    "max_tokens": request.max_tokens,
+                    "temperature": 0.7,
+                },
+            })
+            for request in requests
+        ]
+        client = self.provider.client
+        input_file = await client.files.create(
+            file=("batch.jsonl", "\n".join(lines).encode("utf-8")),
+            purpose="batch",
+        )
+        batch = await client.batches.create(
+            input_file_id=input_file.id,
+            endpoint=self.ENDPOINT,
+            completion_window="24h",
+        )
+        return batch.id
+
+    async def progress(self, batch_id: str) -> BatchProgress:
+        batch = await self.provider.client.batches.retrieve(batch_id)
+        counts = batch.request_counts
+        error = None
+        if batch.status == "failed":
+            errors = getattr(batch.errors, "data", None) or []
+            error = "; ".join(e.message for e in errors if e.message) or "Batch failed"
+        return BatchProgress(
+            ended=batch.status in self.ENDED,
+            total=counts.total if counts else 0,
+            succeeded=counts.completed if counts else 0,
+            failed=counts.failed if counts else 0,
+            error=error,
+        )
+
+    async def results(self, batch_id: str) -> List[BatchResult]:
+        batch = await self.provider.client.batches.retrieve(batch_id)
+        results = []
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if file_id:
+                content = await self.provider.client.files.content(file_id)
+                results.extend(self._parse_line(line) for line in content.text.splitlines() if line.strip())
+        return results
+
+    async def cancel(self, batch_id: str) -> None:
+        await self.provider.client.batches.cancel(batch_id)
+
+    def _parse_line(self, line: str) -> BatchResult:
+        entry = json.loads(line)
+        custom_id = entry["custom_id"]
+        response = entry.get("response") or {}
+        if entry.get("error") or response.get("status_code") != 200:
+            error = entry.get("error") or (response.get("body") or {}).get("error") or {}
+            return BatchResult(custom_id, error=error.get("message") or "Request failed")
+
+        body = response["body"]
+        usage = body.get("usage") or {}
+        cached = (usage.get("prompt_tokens_details") or {}).get("cached_tokens") or 0
+        self.provider.record_usage(LLMUsage(
+            uncached_input_tokens=usage.get("prompt_tokens", 0) - cached,
+            cached_input_tokens=cached,
+            output_tokens=usage.get("completion_tokens") or 0,
+        ))
+        return BatchResult(custom_id, text=body["choices"][0]["message"]["content"])
+
+
+class AnthropicBatchBackend(BaseBatchBackend):
+    """Anthropic Message Batches."""
+
+    def __init__(self, provider: Optional[AnthropicProvider] = None):
+        self.provider = provider or get_provider_registry().get("anthropic")
+
+    @property
+    def _batches(self):
+        # Message Batches moved out of the beta namespace in later SDK versions
+        messages = self.provider.client.messages
+        batches = getattr(messages, "batches", None)
+        return batches if batches is not None else self.provider.client.beta.messages.batches
+
+    async def submit(self, requests: List[BatchRequest]) -> str:
+        batch = await self._batches.create(requests=[
+            {
+                "custom_id": request.custom_id,
+                "params": {
+                    "model": request.model,
+                    "max_tokens": request.max_tokens,
+                    "messages": self.provider._messages(request.prompt),
+                    "system": SYSTEM_PROMPT,
+                },
+            }
+            for request in requests
+        ])
+        return batch.id
+
+    async def progress(self, batch_id: str) -> BatchProgress:
+        batch = await self._batches.retrieve(batch_id)
+        counts = batch.request_counts
+        failed = counts.errored + counts.canceled + counts.expired
+        return BatchProgress(
+            ended=batch.processing_status == "ended",
+            total=counts.processing + counts.succeeded + failed,
+            succeeded=counts.succeeded,
+            failed=failed,
+        )
+
+    async def results(self, batch_id: str) -> List[BatchResult]:
+        results = []
+        async for entry in await self._batches.results(batch_id):
+            result = entry.result
+            if result.type == "succeeded":
+                self.provider._record(result.message.usage)
+                results.append(BatchResult(entry.custom_id, text=result.message.content[0].text))
+            elif result.type == "errored":
+                error = getattr(result.error, "error", result.error)
+                results.append(BatchResult(entry.custom_id, error=getattr(error, "message", str(error))))
+            else:
+                results.append(BatchResult(entry.custom_id, error=f"Request {result.type}"))
+        return results
+
+    async def cancel(self, batch_id: str) -> None:
+        await self._batches.cancel(batch_id)
+
+
+class LocalBatchBackend(BaseBatchBackend):
+    """
+    Local stand-in for a provider batch API, for tests and development.
+
+    Answers are produced at submission with the mock provider's content and
+    become available settings.BATCH_LOCAL_DELAY seconds later. Requests whose
+    prompt contains settings.BATCH_LOCAL_FAIL_MARKER fail.
+    """
+
+    def __init__(self):
+        self.directory = settings.BATCH_LOCAL_DIR
+        self.mock = MockProvider()
+
+    def _path(self, batch_id: str):
+        return self.directory / f"{batch_id}.json"
+
+    def _load(self, batch_id: str) -> dict:
+        with open(self._path(batch_id)) as f:
+            return json.load(f)
+
+    def _save(self, batch_id: str, state: dict) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        temp_path = self._path(f"{batch_id}.tmp")
+        with open(temp_path, "w") as f:
+            json.dump(state, f)
+        temp_path.replace(self._path(batch_id))
+
+    async def submit(self, requests: List[BatchRequest]) -> str:
+        batch_id = f"local-batch-{uuid.uuid4().hex}"
+        marker = settings.BATCH_LOCAL_FAIL_MARKER
+        results = {}
+        for request in requests:
+            if marker and marker in request.prompt.text:
+                results[request.custom_id] = {"error": "Simulated request failure"}
+            else:
+                results[request.custom_id] = {"text": self.mock._mock_content(request.prompt.text)}
+        self._save(batch_id, {
+            "ready_at": time.time() + settings.BATCH_LOCAL_DELAY,
+            "cancelled": False,
+            "results": results,
+        })
+        return batch_id
+
+    async def progress(self, batch_id: str) -> BatchProgress:
+        state = self._load(batch_id)
+        ended = state["cancelled"] or time.time() >= state["ready_at"]
+        results = list(state["results"].values()) if ended else []
+        return BatchProgress(
+            ended=ended,
+            total=len(state["results"]),
+            succeeded=sum(1 for result in results if "text" in result),
+            failed=sum(1 for result in results if "error" in result),
+        )
+
+    async def results(self, batch_id: str) -> List[BatchResult]:
+        state = self._load(batch_id)
+        if state["cancelled"] and time.time() < state["ready_at"]:
+            return []
+        return [
+            BatchResult(custom_id, text=result.get("text"), error=result.get("error"))
+            for custom_id, result in state["results"].items()
+        ]
+
+    async def cancel(self, batch_id: str) -> None:
+        state = self._load(batch_id)
+        state["cancelled"] = True
+        self._save(batch_id, state)
+
+
+BATCH_BACKENDS = {
+    "openai": OpenAIBatchBackend,
+    "anthropic": AnthropicBatchBackend,
+    "mock": LocalBatchBackend,
+}
+
+
+def get_batch_backend(provider: str) -> BaseBatchBackend:
+    """Get the batch API of a provider."""
+    backend_class = BATCH_BACKENDS.get(provider)
+    if backend_class is None:
+        raise ValueError(f"No batch API for LLM provider: {provider}")
+    return backend_class()
@@ -0,0 +1,76 @@
+"""
+Token usage metrics for LLM requests.
+
+Providers record the usage reported with each response, split into input
+tokens read from the provider's prompt cache and input tokens processed in
+full, so the effect of prompt caching can be followed per provider.
+"""
+
+import threading
+from dataclasses import asdict, dataclass
+from typing import Dict, Optional
+
+
+@dataclass
+class LLMUsage:
+    """Token counts of a single LLM response."""
+    uncached_input_tokens: int = 0  # Processed in full, including cache writes
+    cached_input_tokens: int = 0  # Read from the provider's prompt cache
+    cache_write_tokens: int = 0  # Written to the provider's prompt cache
+    output_tokens: int = 0
+
+
+@dataclass
+class LLMUsageTotals(LLMUsage):
+    """Token counts summed over all responses of a provider."""
+    requests: int = 0
+
+    @property
+    def cached_input_ratio(self) -> float:
+        """Share of input tokens read from the prompt cache."""
+        total = self.cached_input_tokens + self.uncached_input_tokens
+        return self.cached_input_tokens / total if total else 0.0
+
+
+class LLMMetrics:
+    """Process-wide token usage totals per provider."""
+
+    def __init__(self):
+        self._totals: Dict[str, LLMUsageTotals] = {}
+        self._lock = threading.Lock()
+
+    def record(self, provider: str, usage: LLMUsage) -> None:
+        """Add the usage of one response to the provider's totals."""
+        with self._lock:
+            totals = self._totals.setdefault(provider, LLMUsageTotals())
+            totals.requests += 1
+            totals.uncached_input_tokens += usage.uncached_input_tokens
+            totals.cached_input_tokens += usage.cached_input_tokens
+            totals.cache_write_tokens += usage.cache_write_tokens
+            totals.output_tokens += usage.output_tokens
+
+    def snapshot(self) -> Dict[str, dict]:
+        """Current totals per provider, with the cached input token ratio."""
+        with self._lock:
+            return {
+                provider: {
+                    **asdict(totals),
+                    "cached_input_ratio": round(totals.cached_input_ratio, 4),
+                }
+                for provider, totals in self._totals.items()
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._totals.clear()
+
+
+_llm_metrics: Optional[LLMMetrics] = None
+
+
+def get_llm_metrics() -> LLMMetrics:
+    """Get the process-wide LLM usage metrics."""
+    global _llm_metrics
+    if _llm_metrics is None:
+        _llm_metrics = LLMMetrics()
+    return _llm_metrics
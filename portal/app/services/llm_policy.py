@@ -0,0 +1,437 @@
+"""
+Timeouts, retries, hedging and circuit breaking for LLM requests.
+
+Every attempt at a provider request has a deadline. Attempts that time out
+or fail with a transient error (connection errors, 408, 409 and 5xx
+responses) are retried with exponential backoff and full jitter. With
+hedging enabled, an attempt still running after the provider's recent p95
+latency is raced against a second, identical request and the first answer
+wins. A circuit breaker per provider and model counts consecutive
+failures; once open, requests fail immediately until a cooldown has passed
+and a single trial request has succeeded.
+
+Rate-limited (429) requests are not retried here: the rate limiter queues
+them again itself (see app.services.rate_limiter).
+"""
+
+import asyncio
+import random
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import AsyncIterator, Awaitable, Callable, Deque, Dict, Optional, Tuple, TypeVar
+
+from app.config import settings
+
+T = TypeVar("T")
+
+# Waits until a request may be sent, e.g. for rate-limiter admission
+Admit = Optional[Callable[[], Awaitable[None]]]
+
+# Status codes worth retrying: request timeout, conflict and server errors
+RETRYABLE_STATUS_CODES = {408, 409}
+
+# SDK and httpx exception classes for failed connections and timeouts
+RETRYABLE_ERROR_NAMES = {"APIConnectionError", "APITimeoutError", "TransportError"}
+
+
+class LLMTimeoutError(TimeoutError):
+    """An LLM request attempt did not finish before its deadline."""
+
+
+class CircuitOpenError(RuntimeError):
+    """The circuit breaker of a provider is open and rejects requests."""
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Whether a failed attempt may succeed when sent again."""
+    if isinstance(error, TimeoutError):
+        return True
+    status_code = getattr(error, "status_code", None)
+    if isinstance(status_code, int):
+        return status_code in RETRYABLE_STATUS_CODES or status_code >= 500
+    return any(cls.__name__ in RETRYABLE_ERROR_NAMES for cls in type(error).__mro__)
+
+
+def backoff_delay(retry: int, base: float, maximum: float) -> float:
+    """Seconds to wait before a retry: exponential backoff with full jitter."""
+    return random.uniform(0, min(maximum, base * 2 ** retry))
+
+
+@dataclass(frozen=True)
+class CallPolicy:
+    """How LLM requests are timed out, retried and hedged."""
+    timeout: float = 120.0  # Seconds per attempt (0 = no deadline)
+    max_attempts: int = 3
+    backoff_base: float = 1.0
+    backoff_max: float = 30.0
+    hedge: bool = False
+    hedge_percentile: float = 95.0
+    hedge_min_samples: int = 20
+
+    @classmethod
+    def from_settings(cls) -> "CallPolicy":
+        return cls(
+            timeout=settings.LLM_REQUEST_TIMEOUT,
+            max_attempts=max(1, settings.LLM_MAX_ATTEMPTS),
+            backoff_base=settings.LLM_RETRY_BACKOFF,
+            backoff_max=settings.LLM_RETRY_BACKOFF_MAX,
+            hedge=settings.LLM_HEDGE_REQUESTS,
+            hedge_percentile=settings.LLM_HEDGE_PERCENTILE,
+            hedge_min_samples=settings.LLM_HEDGE_MIN_SAMPLES,
+        )
+
+
+class LatencyTracker:
+    """Durations of the most recent successful requests."""
+
+    def __init__(self, max_samples: int = 200):
+        self._samples: Deque[float] = deque(maxlen=max_samples)
+
+    def record(self, seconds: float) -> None:
+        self._samples.append(seconds)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def percentile(self, percentile: float) -> Optional[float]:
+        """The given percentile of recent durations, or None without samples."""
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        index = min(len(ordered) - 1, int(len(ordered) * percentile / 100))
+        return ordered[index]
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+
+    Closed: requests pass. After failure_threshold failures in a row the
+    breaker opens and rejects requests for reset_timeout seconds. It then
+    lets one trial request through (half-open): success closes it again,
+    failure reopens it. Time is read from clock, in seconds.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        failure_threshold: int,
+        reset_timeout: float,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_in_flight = False
+
+    @property
+    def enabled(self) -> bool:
+        return self.failure_threshold > 0
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return self.CLOSED
+        if self._trial_in_flight or self.clock() - self._opened_at >= self.reset_timeout:
+            return self.HALF_OPEN
+        return self.OPEN
+
+    def allow(self) -> bool:
+        """Whether a request may be sent now; claims the trial when half-open."""
+        if not self.enabled or self._opened_at is None:
+            return True
+        if self._trial_in_flight or self.clock() - self._opened_at < self.reset_timeout:
+            return False
+        self._trial_in_flight = True
+        return True
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if not self.enabled:
+            return
+        if self._trial_in_flight or self.failures >= self.failure_threshold:
+            self._opened_at = self.clock()
+        self._trial_in_flight = False
+
+    def release(self) -> None:
+        """Give back an unused trial, e.g. when its request was cancelled."""
+        self._trial_in_flight = False
+
+
+class ProviderHealth:
+    """Latency, failures and circuit breaker of one provider and model."""
+
+    def __init__(self, breaker: CircuitBreaker, max_outcomes: int = 50):
+        self.breaker = breaker
+        self.latency = LatencyTracker()
+        self.successes = 0
+        self.failures = 0
+        self.hedged = 0
+        self._outcomes: Deque[bool] = deque(maxlen=max_outcomes)
+
+    @property
+    def error_rate(self) -> float:
+        """Share of recent attempts that failed."""
+        if not self._outcomes:
+            return 0.0
+        return self._outcomes.count(False) / len(self._outcomes)
+
+    def record_success(self, seconds: float) -> None:
+        self.successes += 1
+        self._outcomes.append(True)
+        self.latency.record(seconds)
+        self.breaker.record_success()
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self._outcomes.append(False)
+        self.breaker.record_failure()
+
+    def snapshot(self) -> dict:
+        p95 = self.latency.percentile(95)
+        return {
+            "circuit": self.breaker.state,
+            "successes": self.successes,
+            "failures": self.failures,
+            "error_rate": round(self.error_rate, 3),
+            "hedged": self.hedged,
+            "p95_latency": round(p95, 3) if p95 is not None else None,
+        }
+
+
+class ProviderHealthRegistry:
+    """Process-wide health of every provider and model."""
+
+    def __init__(self):
+        self._health: Dict[Tuple[str, str], ProviderHealth] = {}
+        self._lock = threading.Lock()
+
+    def get(self, provider: str, model: str) -> ProviderHealth:
+        with self._lock:
+            health = self._health.get((provider, model))
+            if health is None:
+                health = ProviderHealth(CircuitBreaker(
+                    failure_threshold=settings.LLM_CIRCUIT_FAILURE_THRESHOLD,
+                    reset_timeout=settings.LLM_CIRCUIT_RESET_TIMEOUT,
+                ))
+                self._health[(provider, model)] = health
+            return health
+
+    def snapshot(self) -> Dict[str, dict]:
+        with self._lock:
+            return {
+                f"{provider}:{model}": health.snapshot()
+                for (provider, model), health in self._health.items()
+            }
+
+
+_provider_health: Optional[ProviderHealthRegistry] = None
+
+
+def get_provider_health() -> ProviderHealthRegistry:
+    """Get the process-wide provider health registry."""
+    global _provider_health
+    if _provider_health is None:
+        _provider_health = ProviderHealthRegistry()
+    return _provider_health
+
+
+async def _with_deadline(awaitable: Awaitable[T], timeout: float) -> T:
+    if timeout <= 0:
+        return await awaitable
+    deadline = asyncio.timeout(timeout)
+    try:
+        async with deadline:
+            return await awaitable
+    except TimeoutError:
+        if deadline.expired():
+            raise LLMTimeoutError(f"LLM request timed out after {timeout:g}s") from None
+        raise
+
+
+async def _attempt(
+    call: Callable[[], Awaitable[T]],
+    admit: Admit,
+    timeout: float,
+    admitted: Optional[asyncio.Event] = None,
+) -> Tuple[T, float]:
+    """Send one request once admitted; returns its result and duration."""
+    if admit is not None:
+        await admit()
+    if admitted is not None:
+        admitted.set()
+    started = time.monotonic()
+    result = await _with_deadline(call(), timeout)
+    return result, time.monotonic() - started
+
+
+async def _hedged(
+    call: Callable[[], Awaitable[T]],
+    admit: Admit,
+    policy: CallPolicy,
+    health: ProviderHealth,
+) -> Tuple[T, float]:
+    """Run an attempt, racing it against a second request if it is slow."""
+    hedge_after = None
+    if policy.hedge and len(health.latency) >= policy.hedge_min_samples:
+        hedge_after = health.latency.percentile(policy.hedge_percentile)
+
+    if hedge_after is None:
+        return await _attempt(call, admit, policy.timeout)
+
+    admitted = asyncio.Event()
+    pending = {asyncio.ensure_future(_attempt(call, admit, policy.timeout, admitted))}
+    sent = asyncio.ensure_future(admitted.wait())
+    try:
+        # Time the first request from when it is sent, not while it is queued
+        await asyncio.wait(pending | {sent}, return_when=asyncio.FIRST_COMPLETED)
+        done, pending = await asyncio.wait(pending, timeout=hedge_after)
+        if not done:
+            health.hedged += 1
+            pending.add(asyncio.ensure_future(_attempt(call, admit, policy.timeout)))
+
+        error: Optional[BaseException] = None
+        while True:
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+                error = task.exception()
+            if not pending:
+                raise error
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        sent.cancel()
+        for task in pending:
+            task.cancel()
+
+
+def _check_circuit(health: ProviderHealth, name: str, last_error: Optional[BaseException]) -> bool:
+    """Raise if the circuit is open; returns whether this attempt is the trial."""
+    if not health.breaker.allow():
+        raise CircuitOpenError(
+            f"LLM provider {name} is unavailable after repeated failures"
+        ) from last_error
+    return health.breaker.state == CircuitBreaker.HALF_OPEN
+
+
+async def call_with_policy(
+    call: Callable[[], Awaitable[T]],
+    health: ProviderHealth,
+    policy: CallPolicy,
+    admit: Admit = None,
+    name: str = "",
+) -> T:
+    """
+    Run an LLM request under the policy.
+
+    Args:
+        call: Sends one attempt of the request; may be called several times
+        health: Health of the provider and model the request is sent to
+        policy: Deadlines, retries and hedging to apply
+        admit: Awaited before every attempt, outside of its deadline
+        name: Provider and model, for error messages
+
+    Raises:
+        CircuitOpenError: If the provider's circuit breaker is open
+        The error of the last attempt if every attempt failed, or of the
+        first non-retryable failure
+    """
+    last_error: Optional[BaseException] = None
+
+    for attempt in range(policy.max_attempts):
+        if attempt:
+            await asyncio.sleep(backoff_delay(attempt - 1, policy.backoff_base, policy.backoff_max))
+        trial = _check_circuit(health, name, last_error)
+
+        try:
+            result, seconds = await _hedged(call, admit, policy, health)
+        except asyncio.CancelledError:
+            if trial:
+                health.breaker.release()
+            raise
+        except Exception as e:
+            if not is_retryable(e):
+                # Not a sign of an unhealthy provider, e.g. an invalid request
+                if trial:
+                    health.breaker.release()
+                raise
+            health.record_failure()
+            last_error = e
+            continue
+
+        health.record_success(seconds)
+        return result
+
+    raise last_error
+
+
+async def stream_with_policy(
+    open_stream: Callable[[], AsyncIterator[str]],
+    health: ProviderHealth,
+    policy: CallPolicy,
+    admit: Admit = None,
+    name: str = "",
+) -> AsyncIterator[str]:
+    """
+    Stream an LLM response under the policy.
+
+    The deadline applies to the first text and to every gap between texts
+    after it. Attempts are retried only until they have produced text,
+    since text already yielded cannot be taken back. Streams are not hedged.
+    """
+    last_error: Optional[BaseException] = None
+
+    for attempt in range(policy.max_attempts):
+        if attempt:
+            await asyncio.sleep(backoff_delay(attempt - 1, policy.backoff_base, policy.backoff_max))
+        trial = _check_circuit(health, name, last_error)
+
+        stream = None
+        produced = False
+        try:
+            if admit is not None:
+                await admit()
+            started = time.monotonic()
+            stream = open_stream().__aiter__()
+            while True:
+                try:
+                    text = await _with_deadline(stream.__anext__(), policy.timeout)
+                except StopAsyncIteration:
+                    break
+                produced = True
+                yield text
+        except Exception as e:
+            if not is_retryable(e):
+                if trial:
+                    health.breaker.release()
+                raise
+            health.record_failure()
+            if produced:
+                raise
+            last_error = e
+            continue
+        except BaseException:
+            # Cancelled, or the consumer stopped listening
+            if trial:
+                health.breaker.release()
+            raise
+        finally:
+            if stream is not None:
+                await stream.aclose()
+
+        health.record_success(time.monotonic() - started)
+        return
+
+    raise last_error
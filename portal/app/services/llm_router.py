@@ -0,0 +1,165 @@
+"""
+Routing of LLM requests across several providers and models.
+
+LLM_ROUTES lists the providers and models requests may go to, each with a
+weight and optionally a cost. For every request the router ranks them:
+routes that can send right away come first, then routes whose rate limiter
+would queue the request, then routes whose circuit breaker is open. Within
+each group the "health" strategy picks in weighted random order, scaling
+each weight down by the route's recent error rate and median latency; the
+"cost" strategy tries the cheapest route first. LLMService sends the
+request to the first route and fails over to the next one on errors or
+throttling.
+
+LLM_ROUTE_OVERRIDES sends the sections of some agents elsewhere, and
+LLM_MODEL_TIERS names the routes of model tiers, e.g. the small, fast
+models agents use for short sections.
+"""
+
+import random
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence
+
+from app.services.llm_policy import CircuitBreaker, get_provider_health
+from app.services.rate_limiter import get_rate_limit_scheduler
+
+STRATEGIES = ("health", "cost")
+
+
+@dataclass(frozen=True)
+class Route:
+    """A provider and model requests may be sent to."""
+    provider: str
+    model: Optional[str] = None  # None = the provider's default model
+    weight: float = 1.0
+    cost: float = 0.0  # Relative price, e.g. USD per million tokens
+
+    @property
+    def key(self) -> str:
+        return f"{self.provider}:{self.model}" if self.model else self.provider
+
+
+def parse_routes(spec: str) -> List[Route]:
+    """
+    Parse a list of routes, e.g. "openai:gpt-4o=3/5,anthropic:claude-3-5-haiku-latest=1/1".
+
+    Each entry is provider[:model][=weight[/cost]].
+    """
+    routes = []
+    for entry in spec.split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        try:
+            target, _, values = entry.partition("=")
+            weight, _, cost = values.partition("/")
+            provider, _, model = target.strip().partition(":")
+            route = Route(
+                provider=provider.strip().lower(),
+                model=model.strip() or None,
+                weight=float(weight or 1),
+                cost=float(cost or 0),
+            )
+        except ValueError:
+            raise ValueError(f"Invalid LLM route: {entry!r}")
+        if not route.provider or route.weight < 0:
+            raise ValueError(f"Invalid LLM route: {entry!r}")
+        routes.append(route)
+    return routes
+
+
+def parse_route_map(spec: str, setting: str) -> Dict[str, List[Route]]:
+    """
+    Parse named lists of routes, e.g.
+    "description=openai:gpt-4o-mini;scenario_brief.content=anthropic,openai".
+
+    Entries are separated by semicolons; each maps a name to a list of
+    routes. Used for LLM_ROUTE_OVERRIDES, where names are a section, a
+    document type or document_type.section, and for LLM_MODEL_TIERS, where
+    they are tiers.
+    """
+    routes_by_name = {}
+    for entry in spec.split(";"):
+        entry = entry.strip()
+        if not entry:
+            continue
+        name, _, routes = entry.partition("=")
+        parsed = parse_routes(routes)
+        if not name.strip() or not parsed:
+            raise ValueError(f"Invalid {setting} entry: {entry!r}")
+        routes_by_name[name.strip().lower()] = parsed
+    return routes_by_name
+
+
+def override_keys(task: Optional[str]) -> List[str]:
+    """
+    The override keys matching a task, most specific first.
+
+    "scenario_brief.description" matches overrides for
+    "scenario_brief.description", then "scenario_brief", then "description".
+    """
+    if not task:
+        return []
+    task = task.lower()
+    document_type, _, section = task.partition(".")
+    return [key for key in (task, document_type, section) if key]
+
+
+class LLMRouter:
+    """Ranks a set of routes for each request."""
+
+    def __init__(self, routes: Sequence[Route], strategy: str = "health"):
+        if not routes:
+            raise ValueError("At least one LLM route is required")
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Unknown LLM routing strategy: {strategy}")
+        self.routes = list(routes)
+        self.strategy = strategy
+
+    def order(self, tokens: int) -> List[Route]:
+        """
+        The routes to try for a request, in order.
+
+        Args:
+            tokens: Estimated tokens of the request, to check rate limits
+        """
+        if len(self.routes) == 1:
+            return list(self.routes)
+
+        registry = get_provider_health()
+        scheduler = get_rate_limit_scheduler()
+        health = {route: registry.get(route.provider, route.model) for route in self.routes}
+
+        ready, throttled, unavailable = [], [], []
+        for route in self.routes:
+            if health[route].breaker.state == CircuitBreaker.OPEN:
+                unavailable.append(route)
+            elif scheduler.limiter(route.provider, route.model).would_wait(tokens):
+                throttled.append(route)
+            else:
+                ready.append(route)
+
+        # Latency is compared to the fastest route with samples, so routes
+        # without samples yet are tried as if they were the fastest
+        medians = {route: health[route].latency.percentile(50) for route in self.routes}
+        known = [median for median in medians.values() if median]
+        fastest = min(known) if known else None
+
+        scores = {}
+        for route in self.routes:
+            latency_factor = fastest / medians[route] if fastest and medians[route] else 1.0
+            scores[route] = route.weight * (1 - health[route].error_rate) ** 2 * latency_factor
+
+        return self._rank(ready, scores) + self._rank(throttled, scores) + unavailable
+
+    def _rank(self, routes: List[Route], scores: Dict[Route, float]) -> List[Route]:
+        if self.strategy == "cost":
+            return sorted(routes, key=lambda route: (route.cost, -scores[route]))
+
+        # Weighted random order: each route's chance of coming first is
+        # proportional to its score
+        def sort_key(route: Route) -> float:
+            score = scores[route]
+            return random.random() ** (1 / score) if score > 0 else 0.0
+
+        return sorted(routes, key=sort_key, reverse=True)
@@ -3,79 +3,362 @@ LLM integration service for AI-powered content generation.
 """
 
 from abc import ABC, abstractmethod
-from typing import Optional
+from dataclasses import replace
+from typing import AsyncIterator, Dict, Optional, Sequence, Tuple
 import asyncio
+import logging
+import threading
 
 from app.config import settings
+from app.prompt import Prompt, PromptInput, as_prompt
+from app.services.llm_cache import LLMResponseCache, get_llm_cache, make_cache_key
+from app.services.llm_metrics import LLMUsage, get_llm_metrics
+from app.services.llm_policy import (
+    CallPolicy,
+    call_with_policy,
+    get_provider_health,
+    stream_with_policy,
+)
+from app.services.llm_router import (
+    LLMRouter,
+    Route,
+    override_keys,
+    parse_route_map,
+    parse_routes,
+)
+from app.services.rate_limiter import (
+    Priority,
+    RateLimiter,
+    current_priority,
+    estimate_tokens,
+    get_rate_limit_scheduler,
+    rate_limit_error_headers,
+)
+
+logger = logging.getLogger(__name__)
+
+SYSTEM_PROMPT = (
+    "You are an expert in creating tabletop exercise materials. "
+    "Provide detailed, well-structured content in markdown format."
+)
 
 
 class BaseLLMProvider(ABC):
     """Base class for LLM providers."""
 
+    name = "base"
+
+    # Models of named tiers, e.g. {"fast": ...}, used when settings.LLM_MODEL_TIERS
+    # does not configure the tier
+    tier_models: Dict[str, str] = {}
+
+    # Most output tokens a request may ask for, by model name prefix; the
+    # longest matching prefix applies and unlisted models are not capped
+    output_token_limits: Dict[str, int] = {}
+
+    @classmethod
+    def default_model(cls) -> str:
+        """Model used when a route does not name one."""
+        return cls.name
+
+    @classmethod
+    def clamp_max_tokens(cls, model: str, max_tokens: int) -> int:
+        """Cap a requested max_tokens at the model's output limit."""
+        prefixes = [prefix for prefix in cls.output_token_limits if model.startswith(prefix)]
+        if not prefixes:
+            return max_tokens
+        return min(max_tokens, cls.output_token_limits[max(prefixes, key=len)])
+
     @abstractmethod
-    async def generate(self, prompt: str, max_tokens: int = 4000) -> str:
-        """Generate content from a prompt."""
+    async def generate(
+        self,
+        prompt: Prompt,
+        max_tokens: int = 4000,
+        model: Optional[str] = None,
+    ) -> str:
+        """Generate content from a prompt, with the given or the default model."""
+        pass
+
+    async def stream(
+        self,
+        prompt: Prompt,
+        max_tokens: int = 4000,
+        model: Optional[str] = None,
+    ) -> AsyncIterator[str]:
+        """
+        Generate content from a prompt, yielding text as it is produced.
+
+        Providers without native streaming yield the complete response once.
+        """
+        yield await self.generate(prompt, max_tokens, model)
+
+    async def aclose(self) -> None:
+        """Release any network resources held by the provider."""
         pass
 
+    def record_usage(self, usage: LLMUsage) -> None:
+        """Add a response's token usage to the process-wide metrics."""
+        get_llm_metrics().record(self.name, usage)
+
+    def observe_rate_limits(self, headers, model: Optional[str] = None) -> None:
+        """Update a model's rate limiter from a response's rate-limit headers."""
+        model = model or getattr(self, "model", self.name)
+        get_rate_limit_scheduler().limiter(self.name, model).update_from_headers(headers)
+
+
+def create_http_client(client_class):
+    """
+    Create a keep-alive HTTP client shared by all requests to a provider.
+
+    Args:
+        client_class: The SDK's DefaultAsyncHttpxClient, which keeps the SDK's
+            default timeouts and socket options
+    """
+    import httpx
+
+    return client_class(
+        limits=httpx.Limits(
+            max_connections=settings.LLM_HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.LLM_HTTP_KEEPALIVE_EXPIRY,
+        ),
+    )
+
 
 class OpenAIProvider(BaseLLMProvider):
-    """OpenAI GPT provider."""
+    """
+    OpenAI GPT provider.
+
+    OpenAI caches long prompt prefixes automatically. Messages are ordered
+    so that the system prompt and the prompt's shared prefix always come
+    before its suffix, which lets requests sharing a prefix hit that cache.
+    """
+
+    name = "openai"
+    tier_models = {"fast": "gpt-4o-mini"}
+    # gpt-4 shares its 8k context between prompt and response
+    output_token_limits = {"gpt-3.5-turbo": 4096, "gpt-4": 4096, "gpt-4o": 16384, "gpt-4.1": 32768}
 
     def __init__(self):
         try:
-            from openai import AsyncOpenAI
-            self.client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
-            self.model = settings.LLM_MODEL
+            from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+            self.client = AsyncOpenAI(
+                api_key=settings.OPENAI_API_KEY,
+                http_client=create_http_client(DefaultAsyncHttpxClient),
+            )
+            self.model = self.default_model()
         except ImportError:
             raise ImportError("openai package not installed. Run: pip install openai")
 
-    async def generate(self, prompt: str, max_tokens: int = 4000) -> str:
+    @classmethod
+    def default_model(cls) -> str:
+        return settings.LLM_MODEL
+
+    async def aclose(self) -> None:
+        await self.client.close()
+
+    def _messages(self, prompt: Prompt) -> list:
+        return [
+            {
+                "role": "system",
+                "content": SYSTEM_PROMPT,
+            },
+            {"role": "user", "content": prompt.text}
+        ]
+
+    def _record(self, usage) -> None:
+        if usage is None:
+            return
+        details = getattr(usage, "prompt_tokens_details", None)
+        cached = (getattr(details, "cached_tokens", None) or 0) if details else 0
+        self.record_usage(LLMUsage(
+            uncached_input_tokens=usage.prompt_tokens - cached,
+            cached_input_tokens=cached,
+            output_tokens=usage.completion_tokens or 0,
+        ))
+
+    async def generate(
+        self,
+        prompt: Prompt,
+        max_tokens: int = 4000,
+        model: Optional[str] = None,
+    ) -> str:
         """Generate content using OpenAI."""
-        response = await self.client.chat.completions.create(
-            model=self.model,
-            messages=[
-                {
-                    "role": "system",
-                    "content": "You are an expert in creating tabletop exercise materials. Provide detailed, well-structured content in markdown format."
-                },
-                {"role": "user", "content": prompt}
-            ],
-            max_tokens=max_tokens,
+        model = model or self.model
+        raw = await self.client.chat.completions.with_raw_response.create(
+            model=model,
+            messages=self._messages(prompt),
+            max_tokens=self.clamp_max_tokens(model, max_tokens),
             temperature=0.7,
         )
+        self.observe_rate_limits(raw.headers, model)
+        response = raw.parse()
+        self._record(response.usage)
         return response.choices[0].message.content
 
+    async def stream(
+        self,
+        prompt: Prompt,
+        max_tokens: int = 4000,
+        model: Optional[str] = None,
+    ) -> AsyncIterator[str]:
+        """Stream content using OpenAI."""
+        model = model or self.model
+        raw = await self.client.chat.completions.with_raw_response.create(
+            model=model,
+            messages=self._messages(prompt),
+            max_tokens=self.clamp_max_tokens(model, max_tokens),
+            temperature=0.7,
+            stream=True,
+            stream_options={"include_usage": True},
+        )
+        self.observe_rate_limits(raw.headers, model)
+        response = raw.parse()
+        async for chunk in response:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+            if getattr(chunk, "usage", None):
+                self._record(chunk.usage)
+
 
 class AnthropicProvider(BaseLLMProvider):
-    """Anthropic Claude provider."""
+    """
+    Anthropic Claude provider.
+
+    Each block of the prompt's shared prefix ends with a cache breakpoint,
+    so later requests starting with the same blocks read them from
+    Anthropic's prompt cache.
+    """
+
+    name = "anthropic"
+    tier_models = {"fast": "claude-3-haiku-20240307"}
+    output_token_limits = {"claude-3-": 4096, "claude-3-5-": 8192, "claude-3-7-": 64000}
+
+    # Anthropic allows four cache breakpoints per request
+    MAX_CACHE_BREAKPOINTS = 4
 
     def __init__(self):
         try:
-            from anthropic import AsyncAnthropic
-            self.client = AsyncAnthropic(api_key=settings.ANTHROPIC_API_KEY)
-            self.model = settings.LLM_MODEL if "claude" in settings.LLM_MODEL else "claude-3-sonnet-20240229"
+            from anthropic import AsyncAnthropic, DefaultAsyncHttpxClient
+            self.client = AsyncAnthropic(
+                api_key=settings.ANTHROPIC_API_KEY,
+                http_client=create_http_client(DefaultAsyncHttpxClient),
+            )
+            self.model = self.default_model()
         except ImportError:
             raise ImportError("anthropic package not installed. Run: pip install anthropic")
 
-    async def generate(self, prompt: str, max_tokens: int = 4000) -> str:
+    @classmethod
+    def default_model(cls) -> str:
+        return settings.LLM_MODEL if "claude" in settings.LLM_MODEL else "claude-3-sonnet-20240229"
+
+    async def aclose(self) -> None:
+        await self.client.close()
+
+    def _messages(self, prompt: Prompt) -> list:
+        blocks = []
+        cached_blocks = prompt.prefix[-self.MAX_CACHE_BREAKPOINTS:]
+        uncached_blocks = prompt.prefix[:-self.MAX_CACHE_BREAKPOINTS]
+        if uncached_blocks:
+            blocks.append({"type": "text", "text": "\n\n".join(uncached_blocks)})
+        for text in cached_blocks:
+            blocks.append({
+                "type": "text",
+                "text": text,
+                "cache_control": {"type": "ephemeral"},
+            })
+        if prompt.suffix:
+            blocks.append({"type": "text", "text": prompt.suffix})
+        return [{"role": "user", "content": blocks}]
+
+    def _record(self, usage) -> None:
+        cache_write = getattr(usage, "cache_creation_input_tokens", None) or 0
+        self.record_usage(LLMUsage(
+            uncached_input_tokens=usage.input_tokens + cache_write,
+            cached_input_tokens=getattr(usage, "cache_read_input_tokens", None) or 0,
+            cache_write_tokens=cache_write,
+            output_tokens=usage.output_tokens,
+        ))
+
+    async def generate(
+        self,
+        prompt: Prompt,
+        max_tokens: int = 4000,
+        model: Optional[str] = None,
+    ) -> str:
         """Generate content using Anthropic Claude."""
-        message = await self.client.messages.create(
-            model=self.model,
-            max_tokens=max_tokens,
-            messages=[
-                {"role": "user", "content": prompt}
-            ],
-            system="You are an expert in creating tabletop exercise materials. Provide detailed, well-structured content in markdown format."
+        model = model or self.model
+        raw = await self.client.messages.with_raw_response.create(
+            model=model,
+            max_tokens=self.clamp_max_tokens(model, max_tokens),
+            messages=self._messages(prompt),
+            system=SYSTEM_PROMPT,
         )
+        self.observe_rate_limits(raw.headers, model)
+        message = raw.parse()
+        self._record(message.usage)
         return message.content[0].text
 
+    async def stream(
+        self,
+        prompt: Prompt,
+        max_tokens: int = 4000,
+        model: Optional[str] = None,
+    ) -> AsyncIterator[str]:
+        """Stream content using Anthropic Claude."""
+        model = model or self.model
+        async with self.client.messages.stream(
+            model=model,
+            max_tokens=self.clamp_max_tokens(model, max_tokens),
+            messages=self._messages(prompt),
+            system=SYSTEM_PROMPT,
+        ) as stream:
+            self.observe_rate_limits(stream.response.headers, model)
+            async for text in stream.text_stream:
+                yield text
+            message = await stream.get_final_message()
+        self._record(message.usage)
+
 
 class MockProvider(BaseLLMProvider):
     """Mock provider for testing without API calls."""
 
-    async def generate(self, prompt: str, max_tokens: int = 4000) -> str:
+    name = "mock"
+
+    async def stream(
+        self,
+        prompt: Prompt,
+        max_tokens: int = 4000,
+        model: Optional[str] = None,
+    ) -> AsyncIterator[str]:
+        """Stream mock content word by word."""
+        content = self._mock_content(prompt.text)
+        for i, word in enumerate(content.split(" ")):
+            await asyncio.sleep(0.005)
+            yield word if i == 0 else " " + word
+
+    async def generate(
+        self,
+        prompt: Prompt,
+        max_tokens: int = 4000,
+        model: Optional[str] = None,
+    ) -> str:
         """Generate mock content for testing."""
         await asyncio.sleep(0.1)  # Simulate API latency
+        return self._mock_content(prompt.text)
+
+    def _mock_content(self, prompt: str) -> str:
+
+        # Single-call prompts ask for every section in its own tag
+        if "<learning_goals>" in prompt:
+            return "\n".join(
+                f"<{section}>\n{self._mock_content(hint)}\n</{section}>"
+                for section, hint in (
+                    ("description", "description"),
+                    ("content", "content"),
+                    ("learning_goals", "learning goals"),
+                )
+            )
 
         # Extract context from prompt to generate relevant mock content
         if "description" in prompt.lower():
@@ -114,39 +397,336 @@ by providing structured guidance and reference materials.
 """
 
 
+PROVIDER_CLASSES = {
+    "openai": OpenAIProvider,
+    "anthropic": AnthropicProvider,
+    "mock": MockProvider,
+}
+
+
+class ProviderRegistry:
+    """
+    Process-wide registry of LLM providers.
+
+    Each provider is created once and reused by every LLMService, so its
+    pooled HTTP connections are kept alive between requests. Call aclose()
+    on shutdown to close them.
+    """
+
+    def __init__(self):
+        self._providers: Dict[str, BaseLLMProvider] = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str) -> BaseLLMProvider:
+        """Get the provider with the given name, creating it on first use."""
+        with self._lock:
+            provider = self._providers.get(name)
+            if provider is None:
+                provider_class = PROVIDER_CLASSES.get(name)
+                if provider_class is None:
+                    raise ValueError(f"Unknown LLM provider: {name}")
+                provider = provider_class()
+                self._providers[name] = provider
+            return provider
+
+    async def aclose(self) -> None:
+        """Close all providers and their HTTP clients."""
+        with self._lock:
+            providers = list(self._providers.values())
+            self._providers.clear()
+        for provider in providers:
+            await provider.aclose()
+
+
+_provider_registry: Optional[ProviderRegistry] = None
+
+
+def get_provider_registry() -> ProviderRegistry:
+    """Get the process-wide provider registry."""
+    global _provider_registry
+    if _provider_registry is None:
+        _provider_registry = ProviderRegistry()
+    return _provider_registry
+
+
 class LLMService:
     """
     Main LLM service that abstracts provider-specific implementations.
 
     Supports multiple providers: OpenAI, Anthropic, and Mock (for testing).
+    Responses are cached by prompt; pass use_cache=False to force new content.
+    Requests are routed across the providers and models in settings.LLM_ROUTES
+    (or settings.LLM_PROVIDER alone), failing over to the next route on
+    errors or throttling. Requests may name a task, matched against
+    settings.LLM_ROUTE_OVERRIDES, and a model tier, whose routes come from
+    settings.LLM_MODEL_TIERS or the providers' tier_models. Each provider
+    admits requests through its rate limiter, in the lane set with
+    rate_limiter.llm_priority() (interactive by default), and they are timed
+    out, retried and hedged according to the call policy.
     """
 
-    def __init__(self, provider: Optional[str] = None):
-        provider = provider or settings.LLM_PROVIDER
-
-        if provider == "openai":
-            self._provider = OpenAIProvider()
-        elif provider == "anthropic":
-            self._provider = AnthropicProvider()
-        elif provider == "mock":
-            self._provider = MockProvider()
+    def __init__(
+        self,
+        provider: Optional[str] = None,
+        use_cache: bool = True,
+        cache: Optional[LLMResponseCache] = None,
+        policy: Optional[CallPolicy] = None,
+        routes: Optional[Sequence[Route]] = None,
+    ):
+        # An explicit provider or routes are used for every request, without
+        # the configured overrides and tiers
+        self._configured = routes is None and provider is None
+        if self._configured:
+            routes = parse_routes(settings.LLM_ROUTES) or [Route(settings.LLM_PROVIDER)]
+            overrides = parse_route_map(settings.LLM_ROUTE_OVERRIDES, "LLM_ROUTE_OVERRIDES")
+            tiers = parse_route_map(settings.LLM_MODEL_TIERS, "LLM_MODEL_TIERS")
         else:
-            raise ValueError(f"Unknown LLM provider: {provider}")
-
-        self.provider_name = provider
-
-    async def generate(self, prompt: str, max_tokens: int = 4000) -> str:
+            routes = routes or [Route(provider)]
+            overrides, tiers = {}, {}
+
+        self.router = self._make_router(routes)
+        self._overrides = {task: self._make_router(r) for task, r in overrides.items()}
+        self._tiers = {tier: self._make_router(r) for tier, r in tiers.items()}
+        self.provider_name = self.router.routes[0].provider
+        self.use_cache = use_cache
+        self._cache = cache or get_llm_cache()
+        self.policy = policy or CallPolicy.from_settings()
+
+    async def generate(
+        self,
+        prompt: PromptInput,
+        max_tokens: int = 4000,
+        use_cache: Optional[bool] = None,
+        task: Optional[str] = None,
+        tier: Optional[str] = None,
+    ) -> str:
         """
         Generate content from a prompt.
 
         Args:
-            prompt: The prompt to send to the LLM
+            prompt: The prompt to send to the LLM, as a string or a Prompt
+                with a shared prefix
             max_tokens: Maximum tokens in the response
+            use_cache: Read cached responses (defaults to the service setting).
+                Fresh responses are always written to the cache.
+            task: What the request is for, as document_type.section, to
+                apply settings.LLM_ROUTE_OVERRIDES
+            tier: Model tier to send the request to, e.g. "fast"
 
         Returns:
             Generated content as a string
         """
-        return await self._provider.generate(prompt, max_tokens)
+        if use_cache is None:
+            use_cache = self.use_cache
+        prompt = as_prompt(prompt)
+        router = self.router_for(task, tier)
+
+        if self._cache is None:
+            return await self._generate_uncached(prompt, max_tokens, router)
+
+        key = make_cache_key(*self._cache_identity(router), max_tokens, prompt.text)
+
+        if use_cache:
+            cached = await self._cache.get(key)
+            if cached is not None:
+                return cached
+
+        response = await self._generate_uncached(prompt, max_tokens, router)
+        await self._cache.set(key, response)
+        return response
+
+    async def stream(
+        self,
+        prompt: PromptInput,
+        max_tokens: int = 4000,
+        use_cache: Optional[bool] = None,
+        task: Optional[str] = None,
+        tier: Optional[str] = None,
+    ) -> AsyncIterator[str]:
+        """
+        Generate content from a prompt, yielding text as it arrives.
+
+        Cached responses are yielded in one piece. Completed streams are
+        written to the cache like generate().
+        """
+        if use_cache is None:
+            use_cache = self.use_cache
+        prompt = as_prompt(prompt)
+        router = self.router_for(task, tier)
+
+        if self._cache is None:
+            async for text in self._stream_uncached(prompt, max_tokens, router):
+                yield text
+            return
+
+        key = make_cache_key(*self._cache_identity(router), max_tokens, prompt.text)
+
+        if use_cache:
+            cached = await self._cache.get(key)
+            if cached is not None:
+                yield cached
+                return
+
+        parts = []
+        async for text in self._stream_uncached(prompt, max_tokens, router):
+            parts.append(text)
+            yield text
+        await self._cache.set(key, "".join(parts))
+
+    def router_for(self, task: Optional[str] = None, tier: Optional[str] = None) -> LLMRouter:
+        """
+        The router for a request.
+
+        The task's most specific override wins, then the tier's routes, then
+        the default routes.
+        """
+        for key in override_keys(task):
+            if key in self._overrides:
+                return self._overrides[key]
+        if tier and self._configured:
+            tier = tier.lower()
+            if tier not in self._tiers:
+                self._tiers[tier] = self._tier_router(tier)
+            return self._tiers[tier]
+        return self.router
+
+    def _tier_router(self, tier: str) -> LLMRouter:
+        """Route a tier not in settings.LLM_MODEL_TIERS to each provider's model for it."""
+        routes = [
+            replace(route, model=PROVIDER_CLASSES[route.provider].tier_models.get(tier, route.model))
+            for route in self.router.routes
+        ]
+        if routes == self.router.routes:
+            return self.router
+        return self._make_router(routes)
+
+    @staticmethod
+    def _make_router(routes: Sequence[Route]) -> LLMRouter:
+        resolved = []
+        for route in routes:
+            provider_class = PROVIDER_CLASSES.get(route.provider)
+            if provider_class is None:
+                raise ValueError(f"Unknown LLM provider: {route.provider}")
+            resolved.append(route if route.model else replace(route, model=provider_class.default_model()))
+        return LLMRouter(resolved, settings.LLM_ROUTING_STRATEGY)
+
+    @staticmethod
+    def _cache_identity(router: LLMRouter) -> Tuple[str, str]:
+        # Responses from any route of a router may answer the same prompt
+        if len(router.routes) == 1:
+            return router.routes[0].provider, router.routes[0].model
+        return "router", ",".join(route.key for route in router.routes)
+
+    @staticmethod
+    def _rate_limiter(route: Route) -> RateLimiter:
+        return get_rate_limit_scheduler().limiter(route.provider, route.model)
+
+    async def _send(
+        self,
+        route: Route,
+        prompt: Prompt,
+        max_tokens: int,
+        tokens: int,
+        priority: Priority,
+    ) -> str:
+        """Send a request to one route under the call policy (see app.services.llm_policy)."""
+        provider = get_provider_registry().get(route.provider)
+        limiter = self._rate_limiter(route)
+        return await call_with_policy(
+            lambda: provider.generate(prompt, max_tokens, route.model),
+            get_provider_health().get(route.provider, route.model),
+            self.policy,
+            admit=lambda: limiter.acquire(tokens, priority),
+            name=route.key,
+        )
+
+    async def _open_stream(
+        self,
+        route: Route,
+        prompt: Prompt,
+        max_tokens: int,
+        tokens: int,
+        priority: Priority,
+    ) -> AsyncIterator[str]:
+        """Stream a request from one route under the call policy."""
+        provider = get_provider_registry().get(route.provider)
+        limiter = self._rate_limiter(route)
+        async for text in stream_with_policy(
+            lambda: provider.stream(prompt, max_tokens, route.model),
+            get_provider_health().get(route.provider, route.model),
+            self.policy,
+            admit=lambda: limiter.acquire(tokens, priority),
+            name=route.key,
+        ):
+            yield text
+
+    def _failed(self, router: LLMRouter, route: Route, error: Exception) -> bool:
+        """Handle a failed route; returns whether it was rate limited."""
+        if len(router.routes) > 1:
+            logger.warning("LLM request to %s failed: %s", route.key, error)
+        headers = rate_limit_error_headers(error)
+        if headers is None:
+            return False
+        self._rate_limiter(route).throttle(headers)
+        return True
+
+    async def _generate_uncached(
+        self,
+        prompt: Prompt,
+        max_tokens: int,
+        router: LLMRouter,
+    ) -> str:
+        """
+        Send a request to the router's routes in turn until one succeeds.
+
+        A route rejecting the request with 429 is paused for the provider's
+        retry-after. Once every route has failed, the request is queued
+        again if any of them was rate limited, up to
+        settings.LLM_RATE_LIMIT_MAX_RETRIES times; otherwise the last error
+        is raised.
+        """
+        tokens = estimate_tokens(prompt, max_tokens)
+        priority = current_priority()
+
+        for attempt in range(settings.LLM_RATE_LIMIT_MAX_RETRIES + 1):
+            throttled = False
+            for route in router.order(tokens):
+                try:
+                    return await self._send(route, prompt, max_tokens, tokens, priority)
+                except Exception as e:
+                    throttled = self._failed(router, route, e) or throttled
+                    last_error = e
+            if not throttled or attempt >= settings.LLM_RATE_LIMIT_MAX_RETRIES:
+                raise last_error
+
+    async def _stream_uncached(
+        self,
+        prompt: Prompt,
+        max_tokens: int,
+        router: LLMRouter,
+    ) -> AsyncIterator[str]:
+        """Stream a request from the router's routes in turn, like _generate_uncached()."""
+        tokens = estimate_tokens(prompt, max_tokens)
+        priority = current_priority()
+
+        for attempt in range(settings.LLM_RATE_LIMIT_MAX_RETRIES + 1):
+            throttled = False
+            for route in router.order(tokens):
+                started = False
+                try:
+                    async for text in self._open_stream(route, prompt, max_tokens, tokens, priority):
+                        started = True
+                        yield text
+                    return
+                except Exception as e:
+                    # Text already yielded cannot be taken back, so only fail
+                    # over or retry requests that have not produced anything
+                    if started:
+                        raise
+                    throttled = self._failed(router, route, e) or throttled
+                    last_error = e
+            if not throttled or attempt >= settings.LLM_RATE_LIMIT_MAX_RETRIES:
+                raise last_error
 
 
 def get_llm_service() -> LLMService:
@@ -0,0 +1,266 @@
+"""
+Markdown tokenizer shared by the document renderers.
+
+Generated documents are converted in a single pass into a flat stream of
+block tokens, which the PDF and HTML renderers consume. Supported blocks:
+
+- # / ## / ### headings
+- Paragraphs (consecutive lines are joined)
+- Bulleted and numbered lists, nested by indentation
+- | Tables | with a header row |
+- ``` fenced code blocks
+- > Block quotes
+- --- horizontal rules
+
+Inline **bold**, *italic* and `code` are formatted by format_inline.
+"""
+
+import html
+import re
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Block token types
+HEADING = "heading"
+PARAGRAPH = "paragraph"
+LIST_START = "list_start"
+LIST_ITEM = "list_item"
+LIST_END = "list_end"
+TABLE = "table"
+CODE = "code"
+QUOTE = "quote"
+RULE = "rule"
+
+
+@dataclass(frozen=True)
+class Token:
+    """
+    A block of markdown.
+
+    Attributes:
+        type: One of the block token types above
+        text: Raw inline text (heading, paragraph, list item, quote) or code
+        level: Heading level, or list nesting depth starting at 0
+        ordered: Whether a list is numbered (list_start, list_item, list_end)
+        rows: Table cells, header row first
+    """
+    type: str
+    text: str = ""
+    level: int = 0
+    ordered: bool = False
+    rows: Tuple[Tuple[str, ...], ...] = ()
+
+
+LIST_ITEM_PATTERN = re.compile(r"^( *)([-*+]|\d+[.)])\s+(.*)$")
+HEADING_PATTERN = re.compile(r"^(#{1,6})\s+(.*?)\s*#*$")
+RULE_PATTERN = re.compile(r"^ {0,3}([-*_])( *\1){2,} *$")
+TABLE_SEPARATOR_PATTERN = re.compile(r"^\|?\s*:?-+:?\s*(\|\s*:?-+:?\s*)*\|?$")
+FENCE_PATTERN = re.compile(r"^\s*(```|~~~)")
+
+
+def tokenize(text: str) -> Iterator[Token]:
+    """
+    Tokenize markdown in a single pass over its lines.
+
+    Args:
+        text: Markdown source
+
+    Yields:
+        Block tokens in document order
+    """
+    paragraph: List[str] = []
+    quote: List[str] = []
+    table: List[Tuple[str, ...]] = []
+    lists: List[Tuple[int, bool]] = []  # (indent, ordered) of open lists
+    fence: Optional[str] = None
+    code: List[str] = []
+
+    def flush_blocks() -> Iterator[Token]:
+        if paragraph:
+            yield Token(PARAGRAPH, " ".join(paragraph))
+            paragraph.clear()
+        if quote:
+            yield Token(QUOTE, " ".join(quote))
+            quote.clear()
+        if table:
+            yield Token(TABLE, rows=tuple(table))
+            table.clear()
+
+    def close_lists(indent: int = -1) -> Iterator[Token]:
+        while lists and lists[-1][0] > indent:
+            _, ordered = lists.pop()
+            yield Token(LIST_END, level=len(lists), ordered=ordered)
+
+    for raw_line in text.expandtabs(4).splitlines():
+        # Fenced code is passed through untouched
+        if fence is not None:
+            if raw_line.strip().startswith(fence):
+                yield Token(CODE, "\n".join(code))
+                code.clear()
+                fence = None
+            else:
+                code.append(raw_line)
+            continue
+
+        line = raw_line.strip()
+
+        if not line:
+            yield from flush_blocks()
+            continue
+
+        fence_match = FENCE_PATTERN.match(raw_line)
+        if fence_match:
+            yield from flush_blocks()
+            yield from close_lists()
+            fence = fence_match.group(1)
+            continue
+
+        if RULE_PATTERN.match(raw_line):
+            yield from flush_blocks()
+            yield from close_lists()
+            yield Token(RULE)
+            continue
+
+        item = LIST_ITEM_PATTERN.match(raw_line)
+        if item:
+            yield from flush_blocks()
+            indent = len(item.group(1))
+            ordered = item.group(2)[0].isdigit()
+
+            yield from close_lists(indent)
+            if lists and lists[-1][0] == indent and lists[-1][1] != ordered:
+                yield from close_lists(indent - 1)
+            if not lists or lists[-1][0] < indent:
+                lists.append((indent, ordered))
+                yield Token(LIST_START, level=len(lists) - 1, ordered=ordered)
+
+            yield Token(LIST_ITEM, item.group(3), level=len(lists) - 1, ordered=ordered)
+            continue
+
+        heading = HEADING_PATTERN.match(line)
+        if heading:
+            yield from flush_blocks()
+            yield from close_lists()
+            yield Token(HEADING, heading.group(2), level=len(heading.group(1)))
+            continue
+
+        if line.startswith("|"):
+            if paragraph or quote:
+                yield from flush_blocks()
+            yield from close_lists()
+            if not TABLE_SEPARATOR_PATTERN.match(line):
+                table.append(tuple(cell.strip() for cell in line.strip("|").split("|")))
+            continue
+
+        if line.startswith(">"):
+            if paragraph or table:
+                yield from flush_blocks()
+            yield from close_lists()
+            quote.append(line.lstrip(">").strip())
+            continue
+
+        if quote or table:
+            yield from flush_blocks()
+        yield from close_lists()
+        paragraph.append(line)
+
+    if fence is not None:
+        yield Token(CODE, "\n".join(code))
+    yield from flush_blocks()
+    yield from close_lists()
+
+
+INLINE_PATTERN = re.compile(r"\*\*(.+?)\*\*|\*(.+?)\*|`(.+?)`")
+ESCAPE_TABLE = str.maketrans({"&": "&amp;", "<": "&lt;", ">": "&gt;"})
+
+PDF_INLINE_TAGS = {
+    "bold": ("<b>", "</b>"),
+    "italic": ("<i>", "</i>"),
+    "code": ('<font face="Courier">', "</font>"),
+}
+HTML_INLINE_TAGS = {
+    "bold": ("<strong>", "</strong>"),
+    "italic": ("<em>", "</em>"),
+    "code": ("<code>", "</code>"),
+}
+
+
+def escape(text: str) -> str:
+    """Escape &, < and > for ReportLab and HTML markup."""
+    return text.translate(ESCAPE_TABLE)
+
+
+def format_inline(text: str, tags: Dict[str, Tuple[str, str]] = PDF_INLINE_TAGS) -> str:
+    """
+    Escape text and convert inline **bold**, *italic* and `code` to markup.
+
+    Args:
+        text: Raw inline markdown
+        tags: Opening and closing markup for "bold", "italic" and "code"
+
+    Returns:
+        The formatted markup
+    """
+    parts = []
+    position = 0
+    for match in INLINE_PATTERN.finditer(text):
+        parts.append(escape(text[position:match.start()]))
+        bold, italic, code = match.groups()
+        if code is not None:
+            open_tag, close_tag = tags["code"]
+            parts.append(f"{open_tag}{escape(code)}{close_tag}")
+        else:
+            open_tag, close_tag = tags["bold" if bold is not None else "italic"]
+            parts.append(f"{open_tag}{format_inline(bold or italic, tags)}{close_tag}")
+        position = match.end()
+    parts.append(escape(text[position:]))
+    return "".join(parts)
+
+
+def render_html(tokens: Iterable[Token]) -> str:
+    """
+    Render block tokens as an HTML fragment.
+
+    List items stay open until the next item or the end of their list, so a
+    nested list is placed inside the item it follows.
+    """
+    parts = []
+    # For each open list, whether it has an open <li>
+    open_items: List[bool] = []
+    for token in tokens:
+        if token.type == HEADING:
+            parts.append(f"<h{token.level}>{format_inline(token.text, HTML_INLINE_TAGS)}</h{token.level}>")
+        elif token.type == PARAGRAPH:
+            parts.append(f"<p>{format_inline(token.text, HTML_INLINE_TAGS)}</p>")
+        elif token.type == LIST_START:
+            if open_items and not open_items[-1]:
+                # A list nested without a parent item still needs one
+                parts.append("<li>")
+                open_items[-1] = True
+            parts.append("<ol>" if token.ordered else "<ul>")
+            open_items.append(False)
+        elif token.type == LIST_ITEM:
+            if open_items and open_items[-1]:
+                parts.append("</li>")
+            parts.append(f"<li>{format_inline(token.text, HTML_INLINE_TAGS)}")
+            if open_items:
+                open_items[-1] = True
+        elif token.type == LIST_END:
+            if open_items and open_items.pop():
+                parts.append("</li>")
+            parts.append("</ol>" if token.ordered else "</ul>")
+        elif token.type == TABLE:
+            header, *body = token.rows
+            cells = "".join(f"<th>{format_inline(cell, HTML_INLINE_TAGS)}</th>" for cell in header)
+            rows = [f"<tr>{cells}</tr>"]
+            for row in body:
+                cells = "".join(f"<td>{format_inline(cell, HTML_INLINE_TAGS)}</td>" for cell in row)
+                rows.append(f"<tr>{cells}</tr>")
+            parts.append(f"<table>{''.join(rows)}</table>")
+        elif token.type == CODE:
+            parts.append(f"<pre><code>{html.escape(token.text, quote=False)}</code></pre>")
+        elif token.type == QUOTE:
+            parts.append(f"<blockquote>{format_inline(token.text, HTML_INLINE_TAGS)}</blockquote>")
+        elif token.type == RULE:
+            parts.append("<hr>")
+    return "\n".join(parts)
@@ -2,12 +2,177 @@
 PDF generation service for creating document files.
 """
 
+import asyncio
+import functools
+import multiprocessing
 import os
+import signal
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
-from typing import Optional
+from typing import Any, List, Optional, Tuple
 
 from app.config import settings
+from app.services.markdown_parser import (
+    CODE,
+    HEADING,
+    LIST_END,
+    LIST_ITEM,
+    LIST_START,
+    PARAGRAPH,
+    QUOTE,
+    RULE,
+    TABLE,
+    escape,
+    format_inline,
+    tokenize,
+)
+
+try:
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import letter
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.lib.units import inch
+    from reportlab.platypus import (
+        SimpleDocTemplate,
+        Paragraph,
+        Preformatted,
+        Spacer,
+        Table,
+        TableStyle,
+        PageBreak,
+        ListFlowable,
+        ListItem,
+        HRFlowable,
+    )
+    REPORTLAB_AVAILABLE = True
+except ImportError:
+    REPORTLAB_AVAILABLE = False
+
+
+@dataclass(frozen=True)
+class PDFTheme:
+    """
+    Page layout and paragraph styles used to render documents.
+
+    Themes are built once and shared by every render. Bump the version when
+    changing a theme so previously rendered PDFs can be told apart.
+    """
+    name: str
+    version: str
+    page_size: Any
+    margin: float
+    title_style: Any
+    heading_style: Any
+    subheading_style: Any
+    body_style: Any
+    description_style: Any
+    footer_style: Any
+    quote_style: Any
+    code_style: Any
+    table_style: Any
+    rule_color: Any
+    list_indent: int = 20
+
+
+def build_default_theme() -> PDFTheme:
+    """Build the default Zombies on Fire theme."""
+    if not REPORTLAB_AVAILABLE:
+        raise ImportError("reportlab package not installed. Run: pip install reportlab")
+
+    styles = getSampleStyleSheet()
+
+    return PDFTheme(
+        name="default",
+        version="2",
+        page_size=letter,
+        margin=72,
+        title_style=ParagraphStyle(
+            "CustomTitle",
+            parent=styles["Heading1"],
+            fontSize=24,
+            spaceAfter=30,
+            textColor=colors.HexColor("#1a1a2e"),
+        ),
+        heading_style=ParagraphStyle(
+            "CustomHeading",
+            parent=styles["Heading2"],
+            fontSize=16,
+            spaceBefore=20,
+            spaceAfter=12,
+            textColor=colors.HexColor("#16213e"),
+        ),
+        subheading_style=ParagraphStyle(
+            "CustomSubheading",
+            parent=styles["Heading3"],
+            fontSize=14,
+            spaceBefore=15,
+            spaceAfter=8,
+            textColor=colors.HexColor("#0f3460"),
+        ),
+        body_style=ParagraphStyle(
+            "CustomBody",
+            parent=styles["Normal"],
+            fontSize=11,
+            leading=16,
+            spaceAfter=12,
+        ),
+        description_style=ParagraphStyle(
+            "Description",
+            parent=styles["Normal"],
+            fontSize=12,
+            leading=18,
+            spaceAfter=20,
+            textColor=colors.HexColor("#4a4a4a"),
+            borderColor=colors.HexColor("#e0e0e0"),
+            borderWidth=1,
+            borderPadding=10,
+            backColor=colors.HexColor("#f8f9fa"),
+        ),
+        footer_style=ParagraphStyle(
+            "Footer",
+            parent=styles["Normal"],
+            fontSize=9,
+            textColor=colors.HexColor("#888888"),
+        ),
+        quote_style=ParagraphStyle(
+            "Quote",
+            parent=styles["Italic"],
+            fontSize=11,
+            leading=16,
+            leftIndent=20,
+            spaceAfter=12,
+            textColor=colors.HexColor("#4a4a4a"),
+        ),
+        code_style=ParagraphStyle(
+            "Code",
+            parent=styles["Code"],
+            fontSize=9,
+            leading=12,
+            spaceAfter=12,
+            backColor=colors.HexColor("#f8f9fa"),
+            borderPadding=6,
+        ),
+        table_style=TableStyle([
+            ("GRID", (0, 0), (-1, -1), 0.5, colors.HexColor("#e0e0e0")),
+            ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#f0f0f5")),
+            ("VALIGN", (0, 0), (-1, -1), "TOP"),
+        ]),
+        rule_color=colors.HexColor("#e0e0e0"),
+    )
+
+
+_default_theme: Optional[PDFTheme] = None
+
+
+def get_default_theme() -> PDFTheme:
+    """Get the default theme, building it on first use in this process."""
+    global _default_theme
+    if _default_theme is None:
+        _default_theme = build_default_theme()
+    return _default_theme
 
 
 class PDFService:
@@ -17,12 +182,18 @@ class PDFService:
     Uses ReportLab for PDF generation with support for:
     - Markdown-like formatting
     - Multiple sections
-    - Professional styling
+    - Professional styling (see PDFTheme)
     """
 
-    def __init__(self, output_dir: Optional[Path] = None):
+    def __init__(self, output_dir: Optional[Path] = None, theme: Optional[PDFTheme] = None):
         self.output_dir = output_dir or settings.PDF_OUTPUT_DIR
         self.output_dir.mkdir(parents=True, exist_ok=True)
+        self._theme = theme
+
+    @property
+    def theme(self) -> PDFTheme:
+        """The theme used for rendering (the default theme unless one was given)."""
+        return self._theme or get_default_theme()
 
     def generate_pdf(
         self,
@@ -45,22 +216,11 @@ class PDFService:
         Returns:
             Path to the generated PDF file
         """
-        try:
-            from reportlab.lib import colors
-            from reportlab.lib.pagesizes import letter
-            from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-            from reportlab.lib.units import inch
-            from reportlab.platypus import (
-                SimpleDocTemplate,
-                Paragraph,
-                Spacer,
-                Table,
-                TableStyle,
-                PageBreak,
-            )
-        except ImportError:
+        if not REPORTLAB_AVAILABLE:
             raise ImportError("reportlab package not installed. Run: pip install reportlab")
 
+        theme = self.theme
+
         # Generate filename if not provided
         if not filename:
             safe_title = "".join(c if c.isalnum() or c in " -_" else "" for c in title)
@@ -73,103 +233,46 @@ class PDFService:
         # Create document
         doc = SimpleDocTemplate(
             str(filepath),
-            pagesize=letter,
-            rightMargin=72,
-            leftMargin=72,
-            topMargin=72,
-            bottomMargin=72,
-        )
-
-        # Styles
-        styles = getSampleStyleSheet()
-
-        # Custom styles
-        title_style = ParagraphStyle(
-            "CustomTitle",
-            parent=styles["Heading1"],
-            fontSize=24,
-            spaceAfter=30,
-            textColor=colors.HexColor("#1a1a2e"),
-        )
-
-        heading_style = ParagraphStyle(
-            "CustomHeading",
-            parent=styles["Heading2"],
-            fontSize=16,
-            spaceBefore=20,
-            spaceAfter=12,
-            textColor=colors.HexColor("#16213e"),
-        )
-
-        subheading_style = ParagraphStyle(
-            "CustomSubheading",
-            parent=styles["Heading3"],
-            fontSize=14,
-            spaceBefore=15,
-            spaceAfter=8,
-            textColor=colors.HexColor("#0f3460"),
-        )
-
-        body_style = ParagraphStyle(
-            "CustomBody",
-            parent=styles["Normal"],
-            fontSize=11,
-            leading=16,
-            spaceAfter=12,
-        )
-
-        description_style = ParagraphStyle(
-            "Description",
-            parent=styles["Normal"],
-            fontSize=12,
-            leading=18,
-            spaceAfter=20,
-            textColor=colors.HexColor("#4a4a4a"),
-            borderColor=colors.HexColor("#e0e0e0"),
-            borderWidth=1,
-            borderPadding=10,
-            backColor=colors.HexColor("#f8f9fa"),
+            pagesize=theme.page_size,
+            rightMargin=theme.margin,
+            leftMargin=theme.margin,
+            topMargin=theme.margin,
+            bottomMargin=theme.margin,
         )
 
         # Build document content
         story = []
 
         # Title
-        story.append(Paragraph(self._escape_html(title), title_style))
+        story.append(Paragraph(escape(title), theme.title_style))
         story.append(Spacer(1, 0.25 * inch))
 
         # Description box
-        story.append(Paragraph("Overview", heading_style))
-        story.append(Paragraph(self._escape_html(description), description_style))
+        story.append(Paragraph("Overview", theme.heading_style))
+        story.append(Paragraph(escape(description), theme.description_style))
         story.append(Spacer(1, 0.25 * inch))
 
         # Learning Goals
-        story.append(Paragraph("Learning Goals", heading_style))
-        goals_content = self._markdown_to_paragraphs(learning_goals, body_style)
+        story.append(Paragraph("Learning Goals", theme.heading_style))
+        goals_content = self._markdown_to_paragraphs(learning_goals, theme.body_style)
         story.extend(goals_content)
         story.append(Spacer(1, 0.25 * inch))
 
         # Main Content
         story.append(PageBreak())
-        story.append(Paragraph("Document Content", heading_style))
+        story.append(Paragraph("Document Content", theme.heading_style))
         story.append(Spacer(1, 0.15 * inch))
 
         content_paragraphs = self._markdown_to_paragraphs(
-            content, body_style, heading_style, subheading_style
+            content, theme.body_style, theme.heading_style, theme.subheading_style
         )
         story.extend(content_paragraphs)
 
         # Footer info
         story.append(Spacer(1, 0.5 * inch))
-        footer_style = ParagraphStyle(
-            "Footer",
-            parent=styles["Normal"],
-            fontSize=9,
-            textColor=colors.HexColor("#888888"),
-        )
         story.append(Paragraph(
             f"Generated by OWASP Zombies on Fire Tabletop Portal | {datetime.now().strftime('%Y-%m-%d %H:%M')}",
-            footer_style
+            theme.footer_style
         ))
 
         # Build PDF
@@ -177,12 +280,31 @@ class PDFService:
 
         return str(filepath)
 
-    def _escape_html(self, text: str) -> str:
-        """Escape HTML special characters."""
-        return (
-            text.replace("&", "&amp;")
-            .replace("<", "&lt;")
-            .replace(">", "&gt;")
+    async def generate_pdf_async(
+        self,
+        title: str,
+        description: str,
+        content: str,
+        learning_goals: str,
+        filename: Optional[str] = None,
+    ) -> str:
+        """
+        Generate a PDF without blocking the event loop.
+
+        Rendering runs in the shared PDF render pool; see generate_pdf for
+        the arguments.
+
+        Returns:
+            Path to the generated PDF file
+        """
+        return await get_pdf_render_pool().render(
+            str(self.output_dir),
+            theme=self._theme,
+            title=title,
+            description=description,
+            content=content,
+            learning_goals=learning_goals,
+            filename=filename,
         )
 
     def _markdown_to_paragraphs(
@@ -193,117 +315,153 @@ class PDFService:
         subheading_style=None,
     ) -> list:
         """
-        Convert markdown-like content to ReportLab paragraphs.
-
-        Handles:
-        - ## Headings
-        - ### Subheadings
-        - **bold** text
-        - *italic* text
-        - - Bullet points
-        - Numbered lists
-        """
-        from reportlab.platypus import Paragraph, Spacer, ListFlowable, ListItem
-        from reportlab.lib.units import inch
+        Convert markdown content to ReportLab flowables.
 
+        The content is tokenized by app.services.markdown_parser. Headings
+        are rendered as body text when no heading styles are given.
+        """
+        theme = self.theme
         elements = []
-        lines = content.split("\n")
-        current_list = []
-        in_list = False
-
-        for line in lines:
-            line = line.strip()
-
-            if not line:
-                if in_list and current_list:
-                    elements.append(self._create_list(current_list, body_style))
-                    current_list = []
-                    in_list = False
-                elements.append(Spacer(1, 0.1 * inch))
-                continue
-
-            # Headings
-            if line.startswith("### ") and subheading_style:
-                if in_list and current_list:
-                    elements.append(self._create_list(current_list, body_style))
-                    current_list = []
-                    in_list = False
-                elements.append(Paragraph(self._escape_html(line[4:]), subheading_style))
-                continue
-
-            if line.startswith("## ") and heading_style:
-                if in_list and current_list:
-                    elements.append(self._create_list(current_list, body_style))
-                    current_list = []
-                    in_list = False
-                elements.append(Paragraph(self._escape_html(line[3:]), heading_style))
-                continue
-
-            if line.startswith("# ") and heading_style:
-                if in_list and current_list:
-                    elements.append(self._create_list(current_list, body_style))
-                    current_list = []
-                    in_list = False
-                elements.append(Paragraph(self._escape_html(line[2:]), heading_style))
-                continue
-
-            # Bullet points
-            if line.startswith("- ") or line.startswith("* "):
-                in_list = True
-                current_list.append(("bullet", line[2:]))
-                continue
-
-            # Numbered lists
-            if len(line) > 2 and line[0].isdigit() and line[1] in ".)":
-                in_list = True
-                current_list.append(("number", line[2:].strip()))
-                continue
-
-            # Regular paragraph
-            if in_list and current_list:
-                elements.append(self._create_list(current_list, body_style))
-                current_list = []
-                in_list = False
-
-            # Process inline formatting
-            formatted_line = self._process_inline_formatting(line)
-            elements.append(Paragraph(formatted_line, body_style))
-
-        # Handle any remaining list
-        if current_list:
-            elements.append(self._create_list(current_list, body_style))
+        open_lists: List[Tuple[list, bool]] = []  # (items, ordered)
+
+        for token in tokenize(content):
+            if token.type == LIST_START:
+                open_lists.append(([], token.ordered))
+
+            elif token.type == LIST_ITEM:
+                paragraph = Paragraph(format_inline(token.text), body_style)
+                open_lists[-1][0].append(ListItem(paragraph))
+
+            elif token.type == LIST_END:
+                items, ordered = open_lists.pop()
+                flowable = ListFlowable(
+                    items,
+                    bulletType="1" if ordered else "bullet",
+                    leftIndent=theme.list_indent,
+                )
+                if open_lists:
+                    open_lists[-1][0].append(flowable)
+                else:
+                    elements.append(flowable)
+
+            elif token.type == HEADING:
+                if token.level <= 2:
+                    style = heading_style
+                else:
+                    style = subheading_style or heading_style
+                elements.append(Paragraph(format_inline(token.text), style or body_style))
+
+            elif token.type == PARAGRAPH:
+                elements.append(Paragraph(format_inline(token.text), body_style))
+
+            elif token.type == QUOTE:
+                elements.append(Paragraph(format_inline(token.text), theme.quote_style))
+
+            elif token.type == CODE:
+                elements.append(Preformatted(token.text, theme.code_style))
+
+            elif token.type == TABLE:
+                elements.append(self._create_table(token.rows, body_style))
+
+            elif token.type == RULE:
+                elements.append(HRFlowable(width="100%", color=theme.rule_color, spaceBefore=6, spaceAfter=6))
 
         return elements
 
-    def _create_list(self, items: list, style) -> "ListFlowable":
-        """Create a list flowable from items."""
-        from reportlab.platypus import ListFlowable, ListItem, Paragraph
+    def _create_table(self, rows: tuple, style) -> "Table":
+        """Create a table flowable with a header row."""
+        width = max(len(row) for row in rows)
+        data = [
+            [Paragraph(format_inline(cell), style) for cell in row] + [""] * (width - len(row))
+            for row in rows
+        ]
+        table = Table(data, repeatRows=1, hAlign="LEFT")
+        table.setStyle(self.theme.table_style)
+        return table
 
-        list_items = []
-        for item_type, text in items:
-            formatted = self._process_inline_formatting(text)
-            list_items.append(ListItem(Paragraph(formatted, style)))
 
-        bullet_type = "bullet" if items[0][0] == "bullet" else "1"
-        return ListFlowable(list_items, bulletType=bullet_type, leftIndent=20)
+def _init_render_process() -> None:
+    # Ctrl+C is handled by the parent, which finishes in-flight renders
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
 
-    def _process_inline_formatting(self, text: str) -> str:
-        """Process inline markdown formatting."""
-        import re
 
-        # Escape HTML first
-        text = self._escape_html(text)
+def _render_pdf(output_dir: str, theme: Optional[PDFTheme] = None, **kwargs) -> str:
+    """Render a PDF in a pool process."""
+    return PDFService(Path(output_dir), theme).generate_pdf(**kwargs)
 
-        # Bold: **text** -> <b>text</b>
-        text = re.sub(r"\*\*(.+?)\*\*", r"<b>\1</b>", text)
 
-        # Italic: *text* -> <i>text</i>
-        text = re.sub(r"\*(.+?)\*", r"<i>\1</i>", text)
+class PDFRenderPool:
+    """
+    Process pool for CPU-bound PDF rendering.
 
-        # Code: `text` -> <font face="Courier">text</font>
-        text = re.sub(r"`(.+?)`", r'<font face="Courier">\1</font>', text)
+    At most max_workers PDFs render at once and up to max_pending more wait
+    in the queue; further callers wait for a free slot. A crashed render
+    process only fails the PDFs in flight, and the pool is restarted for
+    the next render. With max_workers set to 0, PDFs render in a thread.
+    """
 
-        return text
+    def __init__(self, max_workers: int, max_pending: int):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self.queue_depth = 0  # Renders running or waiting for a process
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_render_process,
+            )
+        return self._executor
+
+    async def render(self, output_dir: str, **kwargs) -> str:
+        """Render a PDF and return its path."""
+        if self.max_workers <= 0:
+            return await asyncio.to_thread(_render_pdf, output_dir, **kwargs)
+
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_workers + self.max_pending)
+
+        async with self._slots:
+            self.queue_depth += 1
+            executor = self._get_executor()
+            loop = asyncio.get_running_loop()
+            try:
+                return await loop.run_in_executor(
+                    executor, functools.partial(_render_pdf, output_dir, **kwargs)
+                )
+            except BrokenProcessPool:
+                self._restart(executor)
+                raise RuntimeError("PDF rendering process crashed")
+            finally:
+                self.queue_depth -= 1
+
+    def _restart(self, executor: ProcessPoolExecutor) -> None:
+        if self._executor is executor:
+            self._executor = None
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def shutdown(self) -> None:
+        """Stop the render processes."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+
+_pdf_render_pool: Optional[PDFRenderPool] = None
+
+
+def get_pdf_render_pool() -> PDFRenderPool:
+    """Get the process-wide PDF render pool."""
+    global _pdf_render_pool
+    if _pdf_render_pool is None:
+        _pdf_render_pool = PDFRenderPool(
+            max_workers=settings.PDF_RENDER_PROCESSES,
+            max_pending=settings.PDF_RENDER_MAX_PENDING,
+        )
+    return _pdf_render_pool
 
 
 def get_pdf_service() -> PDFService:
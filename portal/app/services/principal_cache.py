@@ -0,0 +1,125 @@
+"""
+In-process cache of authenticated principals.
+
+Every API call decodes its bearer token and loads the user it names. Both
+results are kept here for a short time so repeated calls with the same
+token skip the JWT verification and the SELECT on users. Changes to a user
+(e.g. is_active or is_admin) must call invalidate() so they take effect on
+the next request rather than after the TTL.
+
+The cache is per process; with several web server processes, other
+processes see a change once their entries expire.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional, Set, Tuple
+
+from app.config import settings
+
+PrincipalKey = Tuple[int, Optional[str]]
+
+
+class PrincipalCache:
+    """LRU cache of decoded tokens and of users keyed by user ID and token ID."""
+
+    def __init__(self, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._tokens: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._principals: "OrderedDict[PrincipalKey, Tuple[float, Any]]" = OrderedDict()
+        self._keys_by_user: dict = {}
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0 and self.max_entries > 0
+
+    def get_token(self, token: str) -> Optional[Any]:
+        """Get the decoded data of a token that has not expired yet."""
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._tokens.get(token)
+            if entry is None:
+                return None
+            expires_at, token_data = entry
+            if time.time() >= expires_at:
+                del self._tokens[token]
+                return None
+            self._tokens.move_to_end(token)
+            return token_data
+
+    def set_token(self, token: str, token_data: Any, expires_at: float) -> None:
+        """Remember a decoded token until it expires."""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._tokens[token] = (expires_at, token_data)
+            self._tokens.move_to_end(token)
+            while len(self._tokens) > self.max_entries:
+                self._tokens.popitem(last=False)
+
+    def get_user(self, user_id: int, token_id: Optional[str]) -> Optional[Any]:
+        """Get the cached user for a token, if it is still fresh."""
+        if not self.enabled:
+            return None
+        key = (user_id, token_id)
+        with self._lock:
+            entry = self._principals.get(key)
+            if entry is None:
+                return None
+            stored_at, user = entry
+            if time.time() - stored_at > self.ttl:
+                self._remove(key)
+                return None
+            self._principals.move_to_end(key)
+            return user
+
+    def set_user(self, user_id: int, token_id: Optional[str], user: Any) -> None:
+        """Cache the user a token authenticated as."""
+        if not self.enabled:
+            return
+        key = (user_id, token_id)
+        with self._lock:
+            self._principals[key] = (time.time(), user)
+            self._principals.move_to_end(key)
+            self._keys_by_user.setdefault(user_id, set()).add(key)
+            while len(self._principals) > self.max_entries:
+                self._remove(next(iter(self._principals)))
+
+    def invalidate(self, user_id: int) -> None:
+        """Drop every cached entry for a user, e.g. after it was changed or deleted."""
+        with self._lock:
+            keys: Set[PrincipalKey] = self._keys_by_user.pop(user_id, set())
+            for key in keys:
+                self._principals.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._tokens.clear()
+            self._principals.clear()
+            self._keys_by_user.clear()
+
+    def _remove(self, key: PrincipalKey) -> None:
+        self._principals.pop(key, None)
+        keys = self._keys_by_user.get(key[0])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_user[key[0]]
+
+
+_principal_cache: Optional[PrincipalCache] = None
+
+
+def get_principal_cache() -> PrincipalCache:
+    """Get the process-wide principal cache."""
+    global _principal_cache
+    if _principal_cache is None:
+        _principal_cache = PrincipalCache(
+            ttl=settings.AUTH_CACHE_TTL,
+            max_entries=settings.AUTH_CACHE_MAX_ENTRIES,
+        )
+    return _principal_cache
@@ -0,0 +1,411 @@
+"""
+Rate-limit aware admission of LLM requests.
+
+Every provider and model has a request bucket (requests per minute) and a
+token bucket (tokens per minute). A request is sent once both buckets hold
+enough for it; until then it waits in a priority lane, so interactive
+requests are admitted before queued bulk work. The limits come from the
+settings and are corrected by the rate-limit headers of every response,
+and a 429 pauses the bucket until the provider's retry-after has passed.
+"""
+
+import asyncio
+import heapq
+import itertools
+import re
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from enum import IntEnum
+from typing import Callable, Dict, Iterator, List, Mapping, Optional, Tuple
+
+from app.config import settings
+from app.prompt import Prompt
+
+
+class Priority(IntEnum):
+    """Admission lanes; lower values are admitted first."""
+    INTERACTIVE = 0
+    BULK = 1
+
+
+_current_priority: ContextVar[Priority] = ContextVar("llm_priority", default=Priority.INTERACTIVE)
+
+
+def current_priority() -> Priority:
+    """The admission lane of LLM requests made by the current task."""
+    return _current_priority.get()
+
+
+@contextmanager
+def llm_priority(priority: Priority) -> Iterator[None]:
+    """Send the LLM requests made inside the block in the given lane."""
+    token = _current_priority.set(Priority(priority))
+    try:
+        yield
+    finally:
+        _current_priority.reset(token)
+
+
+def estimate_tokens(prompt: Prompt, max_tokens: int) -> int:
+    """
+    Estimate the tokens a request counts against a tokens-per-minute limit.
+
+    Providers count the prompt and the requested max_tokens; the prompt is
+    estimated at four characters per token.
+    """
+    return len(prompt.text) // 4 + max_tokens
+
+
+@dataclass
+class RateLimitHeaders:
+    """Rate-limit state reported by a provider response."""
+    request_limit: Optional[int] = None
+    requests_remaining: Optional[int] = None
+    token_limit: Optional[int] = None
+    tokens_remaining: Optional[int] = None
+    retry_after: Optional[float] = None
+
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+
+
+def _parse_int(value: Optional[str]) -> Optional[int]:
+    try:
+        return int(float(value)) if value is not None else None
+    except ValueError:
+        return None
+
+
+def _parse_seconds(value: Optional[str]) -> Optional[float]:
+    """Parse seconds ("20"), OpenAI durations ("6m0s", "20ms") or RFC 3339 times."""
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+
+    parts = _DURATION_PART.findall(value)
+    if parts and "".join(number + unit for number, unit in parts) == value:
+        return sum(float(number) * _DURATION_UNITS[unit] for number, unit in parts)
+
+    try:
+        reset_at = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if reset_at.tzinfo is None:
+        reset_at = reset_at.replace(tzinfo=timezone.utc)
+    return max((reset_at - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+def parse_rate_limit_headers(headers: Mapping[str, str]) -> RateLimitHeaders:
+    """
+    Read the rate-limit headers of an OpenAI or Anthropic response.
+
+    OpenAI sends x-ratelimit-{limit,remaining}-{requests,tokens}; Anthropic
+    sends anthropic-ratelimit-{requests,tokens}-{limit,remaining}. Both send
+    retry-after with 429 responses.
+    """
+    get = headers.get
+    parsed = RateLimitHeaders(
+        request_limit=_parse_int(
+            get("x-ratelimit-limit-requests") or get("anthropic-ratelimit-requests-limit")
+        ),
+        requests_remaining=_parse_int(
+            get("x-ratelimit-remaining-requests") or get("anthropic-ratelimit-requests-remaining")
+        ),
+        token_limit=_parse_int(
+            get("x-ratelimit-limit-tokens") or get("anthropic-ratelimit-tokens-limit")
+        ),
+        tokens_remaining=_parse_int(
+            get("x-ratelimit-remaining-tokens") or get("anthropic-ratelimit-tokens-remaining")
+        ),
+        retry_after=_parse_seconds(get("retry-after")),
+    )
+    if parsed.retry_after is None and get("retry-after-ms"):
+        retry_after_ms = _parse_seconds(get("retry-after-ms"))
+        parsed.retry_after = retry_after_ms / 1000 if retry_after_ms is not None else None
+    return parsed
+
+
+def rate_limit_error_headers(error: BaseException) -> Optional[Mapping[str, str]]:
+    """The response headers of a provider's 429 error, or None for other errors."""
+    if getattr(error, "status_code", None) != 429:
+        return None
+    response = getattr(error, "response", None)
+    return getattr(response, "headers", None) or {}
+
+
+class TokenBucket:
+    """
+    Bucket refilled continuously up to a per-minute limit.
+
+    A limit of 0 means unlimited. Requests larger than the whole limit are
+    admitted once the bucket is full, rather than never.
+    """
+
+    def __init__(self, per_minute: int, now: Optional[float] = None):
+        self.per_minute = per_minute
+        self.level = float(per_minute)
+        self._updated = time.monotonic() if now is None else now
+
+    @property
+    def unlimited(self) -> bool:
+        return self.per_minute <= 0
+
+    def refill(self, now: float) -> None:
+        if not self.unlimited:
+            elapsed = now - self._updated
+            self.level = min(self.per_minute, self.level + elapsed * self.per_minute / 60)
+        self._updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until amount is available, after a refill."""
+        if self.unlimited:
+            return 0.0
+        needed = min(amount, self.per_minute) - self.level
+        return max(needed, 0.0) * 60 / self.per_minute
+
+    def take(self, amount: float) -> None:
+        if not self.unlimited:
+            self.level -= min(amount, self.per_minute)
+
+    def give_back(self, amount: float) -> None:
+        if not self.unlimited:
+            self.level = min(self.per_minute, self.level + min(amount, self.per_minute))
+
+    def set_limit(self, per_minute: int) -> None:
+        if per_minute == self.per_minute:
+            return
+        if self.unlimited:
+            self.level = float(per_minute)
+        self.per_minute = per_minute
+        self.level = min(self.level, per_minute)
+
+    def set_remaining(self, remaining: int) -> None:
+        if not self.unlimited:
+            self.level = min(self.level, float(remaining))
+
+
+@dataclass(order=True)
+class _Waiter:
+    priority: int
+    sequence: int
+    tokens: int = field(compare=False)
+    future: asyncio.Future = field(compare=False)
+
+
+class RateLimiter:
+    """
+    Request and token buckets of one provider and model, with priority lanes.
+
+    Time is read from clock, in seconds; it must match the event loop's
+    clock, which runs the timers that admit waiting requests.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: int = 0,
+        tokens_per_minute: int = 0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.configured_requests_per_minute = requests_per_minute
+        self.configured_tokens_per_minute = tokens_per_minute
+        self.clock = clock
+        self.requests = TokenBucket(requests_per_minute, clock())
+        self.tokens = TokenBucket(tokens_per_minute, clock())
+        self.paused_until = 0.0
+        self._waiters: List[_Waiter] = []
+        self._sequence = itertools.count()
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    @property
+    def queue_depth(self) -> int:
+        """Requests waiting for admission."""
+        return sum(1 for waiter in self._waiters if not waiter.future.done())
+
+    async def acquire(self, tokens: int, priority: Priority = Priority.INTERACTIVE) -> None:
+        """Wait until a request of the given size may be sent."""
+        if not self._waiters and self._try_take(tokens):
+            return
+
+        loop = asyncio.get_running_loop()
+        waiter = _Waiter(int(priority), next(self._sequence), tokens, loop.create_future())
+        heapq.heappush(self._waiters, waiter)
+        self._dispatch()
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if waiter.future.done() and not waiter.future.cancelled():
+                # Admitted just as it was cancelled; return the capacity
+                self.requests.give_back(1)
+                self.tokens.give_back(tokens)
+            self._dispatch()
+            raise
+
+    def would_wait(self, tokens: int) -> bool:
+        """Whether a request of the given size would have to queue right now."""
+        return bool(self.queue_depth) or self._wait_time(tokens) > 0
+
+    def update_from_headers(self, headers: Mapping[str, str]) -> None:
+        """Adopt the limits and remaining quota reported by the provider."""
+        parsed = parse_rate_limit_headers(headers)
+        now = self.clock()
+        self.requests.refill(now)
+        self.tokens.refill(now)
+
+        if parsed.request_limit:
+            self.requests.set_limit(self._effective(parsed.request_limit, self.configured_requests_per_minute))
+        if parsed.token_limit:
+            self.tokens.set_limit(self._effective(parsed.token_limit, self.configured_tokens_per_minute))
+        if parsed.requests_remaining is not None:
+            self.requests.set_remaining(parsed.requests_remaining)
+        if parsed.tokens_remaining is not None:
+            self.tokens.set_remaining(parsed.tokens_remaining)
+        self._dispatch()
+
+    def throttle(self, headers: Mapping[str, str], default_delay: float = 1.0) -> float:
+        """
+        Pause admission after a 429 response.
+
+        Returns:
+            Seconds admission is paused for
+        """
+        self.update_from_headers(headers)
+        delay = parse_rate_limit_headers(headers).retry_after
+        if delay is None:
+            delay = default_delay
+        self.paused_until = max(self.paused_until, self.clock() + delay)
+        self._dispatch()
+        return delay
+
+    def snapshot(self) -> dict:
+        return {
+            "requests_per_minute": self.requests.per_minute,
+            "tokens_per_minute": self.tokens.per_minute,
+            "queue_depth": self.queue_depth,
+        }
+
+    @staticmethod
+    def _effective(reported: int, configured: int) -> int:
+        # A configured limit below the provider's is kept, e.g. to leave
+        # quota for other applications sharing the API key
+        return min(reported, configured) if configured > 0 else reported
+
+    def _wait_time(self, tokens: int) -> float:
+        now = self.clock()
+        self.requests.refill(now)
+        self.tokens.refill(now)
+        return max(
+            self.paused_until - now,
+            self.requests.wait_time(1),
+            self.tokens.wait_time(tokens),
+        )
+
+    def _try_take(self, tokens: int) -> bool:
+        if self._wait_time(tokens) > 0:
+            return False
+        self.requests.take(1)
+        self.tokens.take(tokens)
+        return True
+
+    def _dispatch(self) -> None:
+        """Admit waiters in priority order for as long as capacity allows."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        while self._waiters:
+            waiter = self._waiters[0]
+            if waiter.future.done():
+                heapq.heappop(self._waiters)
+                continue
+
+            delay = self._wait_time(waiter.tokens)
+            if delay > 0:
+                loop = waiter.future.get_loop()
+                self._timer = loop.call_later(delay, self._dispatch)
+                return
+
+            heapq.heappop(self._waiters)
+            self.requests.take(1)
+            self.tokens.take(waiter.tokens)
+            waiter.future.set_result(None)
+
+
+def parse_rate_limits(spec: str) -> Dict[Tuple[str, Optional[str]], Tuple[int, int]]:
+    """
+    Parse LLM_RATE_LIMITS, e.g. "openai=500/30000,anthropic:claude-3-haiku=50/50000".
+
+    Returns:
+        (requests per minute, tokens per minute) by (provider, model), where
+        model is None for limits that apply to every model of the provider
+    """
+    limits = {}
+    for entry in spec.split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        try:
+            target, values = entry.split("=", 1)
+            requests_per_minute, _, tokens_per_minute = values.partition("/")
+            provider, _, model = target.strip().partition(":")
+            limits[(provider.lower(), model or None)] = (
+                int(requests_per_minute or 0),
+                int(tokens_per_minute or 0),
+            )
+        except ValueError:
+            raise ValueError(f"Invalid LLM_RATE_LIMITS entry: {entry!r}")
+    return limits
+
+
+class RateLimitScheduler:
+    """Process-wide rate limiters, one per provider and model."""
+
+    def __init__(
+        self,
+        requests_per_minute: int = 0,
+        tokens_per_minute: int = 0,
+        limits: Optional[Dict[Tuple[str, Optional[str]], Tuple[int, int]]] = None,
+    ):
+        self.default_limits = (requests_per_minute, tokens_per_minute)
+        self.limits = limits or {}
+        self._limiters: Dict[Tuple[str, str], RateLimiter] = {}
+
+    def limiter(self, provider: str, model: str) -> RateLimiter:
+        """Get the rate limiter of a provider and model."""
+        key = (provider, model)
+        limiter = self._limiters.get(key)
+        if limiter is None:
+            requests_per_minute, tokens_per_minute = self.limits.get(
+                (provider, model),
+                self.limits.get((provider, None), self.default_limits),
+            )
+            limiter = RateLimiter(requests_per_minute, tokens_per_minute)
+            self._limiters[key] = limiter
+        return limiter
+
+    def snapshot(self) -> Dict[str, dict]:
+        return {
+            f"{provider}:{model}": limiter.snapshot()
+            for (provider, model), limiter in self._limiters.items()
+        }
+
+
+_rate_limit_scheduler: Optional[RateLimitScheduler] = None
+
+
+def get_rate_limit_scheduler() -> RateLimitScheduler:
+    """Get the process-wide rate-limit scheduler."""
+    global _rate_limit_scheduler
+    if _rate_limit_scheduler is None:
+        _rate_limit_scheduler = RateLimitScheduler(
+            requests_per_minute=settings.LLM_REQUESTS_PER_MINUTE,
+            tokens_per_minute=settings.LLM_TOKENS_PER_MINUTE,
+            limits=parse_rate_limits(settings.LLM_RATE_LIMITS),
+        )
+    return _rate_limit_scheduler
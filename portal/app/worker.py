@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+Document generation worker.
+
+Claims queued documents from the database and generates them, outside of the
+web server processes.
+
+Usage:
+    python -m app.worker [--processes N] [--concurrency N]
+"""
+
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import os
+import signal
+from datetime import timedelta
+from typing import Callable, List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import (
+    AsyncDB,
+    async_engine,
+    create_async_db,
+    dispose_async_engine,
+    engine,
+    init_db,
+)
+from app.models.document import Document
+from app.repositories.tabletop import get_tabletop
+from app.services.document_service import DocumentGenerationService
+from app.services.job_queue import DocumentJobQueue, get_job_queue
+from app.services.llm_service import get_provider_registry
+from app.services.pdf_service import get_pdf_render_pool
+from app.services.rate_limiter import Priority, llm_priority
+
+logger = logging.getLogger(__name__)
+
+
+class DocumentWorker:
+    """
+    Pool of asyncio tasks that generate queued documents.
+
+    Each task claims one job at a time in its own database session. On
+    shutdown, tasks finish their current job; jobs still running after the
+    shutdown timeout are cancelled and returned to the queue.
+    """
+
+    def __init__(
+        self,
+        concurrency: Optional[int] = None,
+        poll_interval: Optional[float] = None,
+        session_factory: Optional[Callable[[], AsyncDB]] = None,
+        job_queue: Optional[DocumentJobQueue] = None,
+        document_service: Optional[DocumentGenerationService] = None,
+    ):
+        self.concurrency = concurrency or settings.WORKER_CONCURRENCY
+        self.poll_interval = poll_interval or settings.WORKER_POLL_INTERVAL
+        self.session_factory = session_factory or create_async_db
+        self.job_queue = job_queue or get_job_queue()
+        self.document_service = document_service or DocumentGenerationService(
+            session_factory=self.session_factory
+        )
+        self._stopping = asyncio.Event()
+        self._tasks: List[asyncio.Task] = []
+
+    async def run(self) -> None:
+        """Run the worker pool until stop() is called."""
+        await self._requeue_stale_jobs()
+
+        self._tasks = [
+            asyncio.create_task(self._worker_loop(), name=f"document-worker-{i}")
+            for i in range(self.concurrency)
+        ]
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def stop(self, timeout: Optional[float] = None) -> None:
+        """
+        Stop the worker pool gracefully.
+
+        Args:
+            timeout: Seconds to wait for running jobs before cancelling them
+                (defaults to settings.WORKER_SHUTDOWN_TIMEOUT)
+        """
+        if timeout is None:
+            timeout = settings.WORKER_SHUTDOWN_TIMEOUT
+
+        self._stopping.set()
+        if not self._tasks:
+            return
+
+        _, pending = await asyncio.wait(self._tasks, timeout=timeout)
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.wait(pending)
+
+    async def _worker_loop(self) -> None:
+        """Claim and process jobs until the pool is stopping."""
+        while not self._stopping.is_set():
+            document_id = await self._claim_next_job()
+
+            if document_id is None:
+                try:
+                    await asyncio.wait_for(self._stopping.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            await self.process(document_id)
+
+    async def _claim_next_job(self) -> Optional[int]:
+        db = self.session_factory()
+        try:
+            return await db.run(self.job_queue.claim_next)
+        except Exception:
+            logger.exception("Failed to claim a document job")
+            await db.run(Session.rollback)
+            return None
+        finally:
+            await db.close()
+
+    async def _requeue_stale_jobs(self) -> None:
+        db = self.session_factory()
+        try:
+            requeued = await db.run(
+                self.job_queue.requeue_stale,
+                timedelta(seconds=settings.WORKER_STALE_JOB_TIMEOUT),
+            )
+            if requeued:
+                logger.info("Requeued %d stale document jobs", requeued)
+        finally:
+            await db.close()
+
+    async def _release_job(self, document_id: int) -> None:
+        # A fresh session: the job's own session may still be in use by a
+        # cancelled database call
+        db = self.session_factory()
+        try:
+            await db.run(self.job_queue.release, document_id)
+        finally:
+            await db.close()
+
+    async def _fail_job(self, document_id: int, error: Exception) -> None:
+        # A fresh session, since the error may have left the job's session
+        # unusable
+        db = self.session_factory()
+        try:
+            await db.run(self.job_queue.fail, document_id, str(error))
+        except Exception:
+            logger.exception("Failed to mark document %d as failed", document_id)
+        finally:
+            await db.close()
+
+    async def process(self, document_id: int) -> None:
+        """Generate a single claimed document."""
+        db = self.session_factory()
+        try:
+            document = await db.run(Session.get, Document, document_id)
+            if document is None:
+                return
+
+            logger.info("Generating document %d (%s)", document.id, document.document_type.value)
+            tabletop = await db.run(get_tabletop, document.tabletop_id, with_questions=True)
+            with llm_priority(Priority(document.priority)):
+                document = await self.document_service.generate_document(
+                    db, tabletop, document.document_type, use_cache=document.use_cache
+                )
+            logger.info("Document %d finished with status %s", document.id, document.status.value)
+
+        except asyncio.CancelledError:
+            await self._release_job(document_id)
+            logger.info("Returned document %d to the queue", document_id)
+            raise
+
+        except Exception as e:
+            # Errors outside the agent, e.g. loading the tabletop, would
+            # otherwise leave the document GENERATING until it goes stale
+            logger.exception("Document job %d failed", document_id)
+            await self._fail_job(document_id, e)
+
+        finally:
+            await db.close()
+
+
+def run_worker_process(concurrency: Optional[int] = None) -> None:
+    """Run a worker pool in the current process until SIGINT or SIGTERM."""
+    logging.basicConfig(
+        level=logging.INFO,
+        format=f"%(asctime)s [worker {os.getpid()}] %(levelname)s %(message)s",
+    )
+
+    # Connections inherited from a parent process must not be reused
+    engine.dispose(close=False)
+    if async_engine is not None:
+        async_engine.sync_engine.dispose(close=False)
+
+    async def _main():
+        worker = DocumentWorker(concurrency=concurrency)
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, lambda: asyncio.ensure_future(worker.stop()))
+            except NotImplementedError:
+                pass  # Windows: fall back to KeyboardInterrupt
+
+        logger.info("Document worker started with %d tasks", worker.concurrency)
+        try:
+            await worker.run()
+        finally:
+            await get_provider_registry().aclose()
+            await dispose_async_engine()
+            get_pdf_render_pool().shutdown()
+        logger.info("Document worker stopped")
+
+    try:
+        asyncio.run(_main())
+    except KeyboardInterrupt:
+        pass
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Zombies on Fire document generation worker")
+    parser.add_argument(
+        "--processes",
+        type=int,
+        default=settings.WORKER_PROCESSES,
+        help="Number of worker processes (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=settings.WORKER_CONCURRENCY,
+        help="Documents generated at the same time by each process (default: %(default)s)",
+    )
+    args = parser.parse_args(argv)
+
+    init_db()
+
+    if args.processes <= 1:
+        run_worker_process(args.concurrency)
+        return
+
+    processes = [
+        multiprocessing.Process(
+            target=run_worker_process,
+            args=(args.concurrency,),
+            name=f"document-worker-{i}",
+        )
+        for i in range(args.processes)
+    ]
+    for process in processes:
+        process.start()
+
+    def _forward_signal(signum, frame):
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+
+    signal.signal(signal.SIGINT, _forward_signal)
+    signal.signal(signal.SIGTERM, _forward_signal)
+
+    for process in processes:
+        process.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""Add composite indexes for hot queries and unique document types per tabletop
+
+Tables are created by init_db() on startup, so on a new database these
+indexes already exist and are skipped. On databases created before them,
+duplicate (tabletop_id, document_type) documents are removed first,
+keeping the most recent row; run `python -m app.artifact_gc` afterwards
+to clean up their PDFs.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17 00:00:00
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+INDEXES = [
+    ("ix_tabletops_creator_id_created_at", "tabletops", ["creator_id", "created_at"], False),
+    (
+        "ix_tabletop_questions_tabletop_id_question_type",
+        "tabletop_questions",
+        ["tabletop_id", "question_type"],
+        False,
+    ),
+    ("uq_documents_tabletop_id_document_type", "documents", ["tabletop_id", "document_type"], True),
+    ("ix_documents_status_updated_at", "documents", ["status", "updated_at"], False),
+]
+
+
+def _existing_indexes(table_name: str) -> set:
+    inspector = sa.inspect(op.get_bind())
+    return {index["name"] for index in inspector.get_indexes(table_name)}
+
+
+def upgrade() -> None:
+    for name, table_name, columns, unique in INDEXES:
+        if name in _existing_indexes(table_name):
+            continue
+
+        if unique:
+            # Keep the newest document of each type per tabletop
+            op.execute(
+                """
+                DELETE FROM documents
+                WHERE id NOT IN (
+                    SELECT MAX(id) FROM documents GROUP BY tabletop_id, document_type
+                )
+                """
+            )
+
+        op.create_index(name, table_name, columns, unique=unique)
+
+
+def downgrade() -> None:
+    for name, table_name, _, _ in reversed(INDEXES):
+        if name in _existing_indexes(table_name):
+            op.drop_index(name, table_name=table_name)
@@ -0,0 +1,33 @@
+"""Add an index for keyset pagination of the user listing
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17 00:00:00
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+INDEX_NAME = "ix_users_created_at_id"
+
+
+def _has_index() -> bool:
+    inspector = sa.inspect(op.get_bind())
+    return INDEX_NAME in {index["name"] for index in inspector.get_indexes("users")}
+
+
+def upgrade() -> None:
+    if not _has_index():
+        op.create_index(INDEX_NAME, "users", ["created_at", "id"])
+
+
+def downgrade() -> None:
+    if _has_index():
+        op.drop_index(INDEX_NAME, table_name="users")
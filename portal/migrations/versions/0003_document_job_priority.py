@@ -0,0 +1,60 @@
+"""Add job priorities to documents
+
+Queued documents are claimed by priority, then age. Existing documents get
+the bulk priority, and the job queue index gains the priority column.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17 00:00:00
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+OLD_INDEX = ("ix_documents_status_updated_at", ["status", "updated_at"])
+NEW_INDEX = ("ix_documents_status_priority_updated_at", ["status", "priority", "updated_at"])
+
+
+def _inspector():
+    return sa.inspect(op.get_bind())
+
+
+def _existing_indexes() -> set:
+    return {index["name"] for index in _inspector().get_indexes("documents")}
+
+
+def _has_priority() -> bool:
+    return "priority" in {column["name"] for column in _inspector().get_columns("documents")}
+
+
+def upgrade() -> None:
+    if not _has_priority():
+        with op.batch_alter_table("documents") as batch_op:
+            batch_op.add_column(
+                sa.Column("priority", sa.Integer(), nullable=False, server_default="1")
+            )
+
+    indexes = _existing_indexes()
+    if OLD_INDEX[0] in indexes:
+        op.drop_index(OLD_INDEX[0], table_name="documents")
+    if NEW_INDEX[0] not in indexes:
+        op.create_index(NEW_INDEX[0], "documents", NEW_INDEX[1])
+
+
+def downgrade() -> None:
+    indexes = _existing_indexes()
+    if NEW_INDEX[0] in indexes:
+        op.drop_index(NEW_INDEX[0], table_name="documents")
+    if OLD_INDEX[0] not in indexes:
+        op.create_index(OLD_INDEX[0], "documents", OLD_INDEX[1])
+
+    if _has_priority():
+        with op.batch_alter_table("documents") as batch_op:
+            batch_op.drop_column("priority")
@@ -0,0 +1,88 @@
+"""Add batch runs for provider batch-API generation
+
+Tables are created by init_db() on startup, so on a new database they
+already exist and are skipped.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17 00:00:00
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+RUN_STATUSES = ("PENDING", "SUBMITTED", "COMPLETED", "FAILED")
+ITEM_STATUSES = ("PENDING", "SUCCEEDED", "FAILED")
+
+
+def _existing_tables() -> set:
+    return set(sa.inspect(op.get_bind()).get_table_names())
+
+
+def upgrade() -> None:
+    tables = _existing_tables()
+
+    if "batch_runs" not in tables:
+        op.create_table(
+            "batch_runs",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("provider", sa.String(50), nullable=False),
+            sa.Column("status", sa.Enum(*RUN_STATUSES, name="batchrunstatus"), nullable=False),
+            sa.Column("provider_batch_id", sa.String(255), nullable=True),
+            sa.Column("request_count", sa.Integer(), nullable=False),
+            sa.Column("succeeded_count", sa.Integer(), nullable=False),
+            sa.Column("failed_count", sa.Integer(), nullable=False),
+            sa.Column("error_message", sa.Text(), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+            sa.Column("updated_at", sa.DateTime(), nullable=True),
+            sa.Column("submitted_at", sa.DateTime(), nullable=True),
+            sa.Column("completed_at", sa.DateTime(), nullable=True),
+        )
+        op.create_index("ix_batch_runs_id", "batch_runs", ["id"])
+
+    if "batch_items" not in tables:
+        op.create_table(
+            "batch_items",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column(
+                "run_id",
+                sa.Integer(),
+                sa.ForeignKey("batch_runs.id", ondelete="CASCADE"),
+                nullable=False,
+            ),
+            sa.Column(
+                "document_id",
+                sa.Integer(),
+                sa.ForeignKey("documents.id", ondelete="CASCADE"),
+                nullable=False,
+            ),
+            sa.Column("section", sa.String(50), nullable=False),
+            sa.Column("model", sa.String(100), nullable=False),
+            sa.Column("max_tokens", sa.Integer(), nullable=False),
+            sa.Column("status", sa.Enum(*ITEM_STATUSES, name="batchitemstatus"), nullable=False),
+            sa.Column("result", sa.Text(), nullable=True),
+            sa.Column("error_message", sa.Text(), nullable=True),
+        )
+        op.create_index("ix_batch_items_id", "batch_items", ["id"])
+        op.create_index("ix_batch_items_run_id", "batch_items", ["run_id"])
+        op.create_index(
+            "ix_batch_items_document_id_status", "batch_items", ["document_id", "status"]
+        )
+
+
+def downgrade() -> None:
+    tables = _existing_tables()
+    if "batch_items" in tables:
+        op.drop_table("batch_items")
+    if "batch_runs" in tables:
+        op.drop_table("batch_runs")
+    # PostgreSQL keeps enum types after their tables are dropped
+    sa.Enum(name="batchitemstatus").drop(op.get_bind(), checkfirst=True)
+    sa.Enum(name="batchrunstatus").drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,37 @@
+"""Let document jobs bypass the LLM response cache
+
+Regenerating a document queues a job that must not be answered from cached
+responses. Existing documents may use the cache.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17 00:00:00
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def _has_use_cache() -> bool:
+    columns = sa.inspect(op.get_bind()).get_columns("documents")
+    return "use_cache" in {column["name"] for column in columns}
+
+
+def upgrade() -> None:
+    if not _has_use_cache():
+        with op.batch_alter_table("documents") as batch_op:
+            batch_op.add_column(
+                sa.Column("use_cache", sa.Boolean(), nullable=False, server_default=sa.true())
+            )
+
+
+def downgrade() -> None:
+    if _has_use_cache():
+        with op.batch_alter_table("documents") as batch_op:
+            batch_op.drop_column("use_cache")
@@ -0,0 +1,51 @@
+"""Make created_at non-null on the paginated tables
+
+Listings are paginated by (created_at, id), and a cursor cannot encode a
+missing created_at. Rows without one get their updated_at, or the time of
+the migration.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17 00:00:00
+"""
+
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+
+TABLES = ("tabletops", "users")
+
+
+def _created_at_nullable(table_name: str) -> bool:
+    columns = sa.inspect(op.get_bind()).get_columns(table_name)
+    return next(column["nullable"] for column in columns if column["name"] == "created_at")
+
+
+def upgrade() -> None:
+    now = datetime.utcnow()
+    for table_name in TABLES:
+        if not _created_at_nullable(table_name):
+            continue
+        op.execute(
+            sa.text(
+                f"UPDATE {table_name} SET created_at = COALESCE(updated_at, :now)"
+                " WHERE created_at IS NULL"
+            ).bindparams(now=now)
+        )
+        with op.batch_alter_table(table_name) as batch_op:
+            batch_op.alter_column("created_at", existing_type=sa.DateTime(), nullable=False)
+
+
+def downgrade() -> None:
+    for table_name in TABLES:
+        if not _created_at_nullable(table_name):
+            with op.batch_alter_table(table_name) as batch_op:
+                batch_op.alter_column("created_at", existing_type=sa.DateTime(), nullable=True)
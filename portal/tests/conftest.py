@@ -0,0 +1,167 @@
+"""
+Shared fixtures.
+
+Settings are read from the environment when app.config is imported, so the
+test environment is set up here before any app module is loaded: a scratch
+SQLite database, the mock LLM provider and its local batch API with
+immediate results, no embedded worker, and no authentication cache, so
+every request looks up its user.
+"""
+
+import asyncio
+import os
+import selectors
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, List
+
+_test_dir = Path(tempfile.mkdtemp(prefix="zombies-on-fire-tests-"))
+os.environ.update({
+    "DATABASE_URL": f"sqlite:///{_test_dir / 'test.db'}",
+    "DATABASE_ASYNC": "false",
+    "LLM_PROVIDER": "mock",
+    "LLM_ROUTES": "",
+    "LLM_CACHE_ENABLED": "false",
+    "EMBEDDED_WORKER": "false",
+    "AUTH_CACHE_TTL": "0",
+    "BCRYPT_ROUNDS": "4",
+    "PDF_RENDER_PROCESSES": "0",
+    "UPLOAD_DIR": str(_test_dir / "uploads"),
+    "PDF_OUTPUT_DIR": str(_test_dir / "pdfs"),
+    "BATCH_LOCAL_DIR": str(_test_dir / "batches"),
+    "BATCH_LOCAL_DELAY": "0",
+    "BATCH_LOCAL_FAIL_MARKER": "",
+})
+
+import pytest  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+
+from app.database import Base, engine, init_db  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models.tabletop import QuestionType  # noqa: E402
+
+
+class VirtualTimeSelector(selectors.DefaultSelector):
+    """Polls without blocking and moves the loop's clock to its next timer instead."""
+
+    loop: "VirtualTimeLoop"
+
+    def select(self, timeout=None):
+        events = super().select(0)
+        if not events and timeout:
+            self.loop.now += timeout
+        return events
+
+
+class VirtualTimeLoop(asyncio.SelectorEventLoop):
+    """Event loop whose clock only advances when every task is waiting."""
+
+    def __init__(self):
+        selector = VirtualTimeSelector()
+        selector.loop = self
+        self.now = 0.0
+        super().__init__(selector)
+
+    def time(self) -> float:
+        return self.now
+
+
+class QueryCounter:
+    """SQL statements executed on the engine while counting."""
+
+    def __init__(self):
+        self.statements: List[str] = []
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+
+@pytest.fixture(autouse=True)
+def database() -> Iterator[None]:
+    """Give every test empty tables."""
+    init_db()
+    yield
+    Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture
+def client() -> Iterator[TestClient]:
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def auth_headers(client: TestClient) -> dict:
+    """Authorization headers of a freshly registered user."""
+    client.post("/api/auth/register", json={
+        "email": "alice@example.com",
+        "username": "alice",
+        "password": "password123",
+    })
+    response = client.post("/api/auth/login", data={"username": "alice", "password": "password123"})
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+@pytest.fixture
+def virtual_time() -> Iterator[VirtualTimeLoop]:
+    """
+    Event loop on a virtual clock, so sleeps, timeouts and timers take no time.
+
+    Usage:
+        virtual_time.run_until_complete(coroutine)
+        assert virtual_time.time() == 30
+    """
+    loop = VirtualTimeLoop()
+    try:
+        yield loop
+    finally:
+        loop.close()
+
+
+@pytest.fixture
+def count_queries():
+    """
+    Count the SQL statements executed inside a block.
+
+    Usage:
+        with count_queries() as queries:
+            client.get(...)
+        assert queries.count == 3
+    """
+    @contextmanager
+    def counting() -> Iterator[QueryCounter]:
+        counter = QueryCounter()
+        event.listen(engine, "before_cursor_execute", counter)
+        try:
+            yield counter
+        finally:
+            event.remove(engine, "before_cursor_execute", counter)
+
+    return counting
+
+
+@pytest.fixture
+def create_tabletop(client: TestClient, auth_headers: dict):
+    """Create a tabletop through the API, optionally with every question answered."""
+    def create(title: str = "Zombie Day", complete: bool = True) -> dict:
+        tabletop = client.post(
+            "/api/tabletops/",
+            json={"title": title, "description": "A zombie outbreak"},
+            headers=auth_headers,
+        ).json()
+        if complete:
+            for question_type in QuestionType:
+                client.put(
+                    f"/api/tabletops/{tabletop['id']}/questions/{question_type.value}",
+                    json={"question_type": question_type.value, "answer": "An answer long enough"},
+                    headers=auth_headers,
+                )
+        return tabletop
+
+    return create
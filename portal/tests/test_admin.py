@@ -0,0 +1,30 @@
+"""
+Liveness check and admin metrics.
+"""
+
+from app.database import SessionLocal
+from app.models.user import User
+
+
+def test_health_only_reports_liveness(client):
+    response = client.get("/health")
+
+    assert response.status_code == 200
+    assert set(response.json()) == {"status", "app", "version"}
+
+
+def test_metrics_need_an_admin(client, auth_headers):
+    assert client.get("/api/admin/metrics").status_code == 401
+
+    with SessionLocal() as db:
+        db.query(User).update({User.is_admin: False})
+        db.commit()
+
+    assert client.get("/api/admin/metrics", headers=auth_headers).status_code == 403
+
+
+def test_metrics(client, auth_headers):
+    response = client.get("/api/admin/metrics", headers=auth_headers)
+
+    assert response.status_code == 200
+    assert set(response.json()) == {"queues", "llm_usage", "llm_rate_limits", "llm_providers"}
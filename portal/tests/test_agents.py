@@ -0,0 +1,107 @@
+"""
+Document agents' section generation, with a scripted stand-in for the LLM service.
+"""
+
+import asyncio
+from typing import Dict, List, Optional
+
+import pytest
+
+from app.agents import AGENT_REGISTRY, get_agent_for_document_type
+from app.models.document import DocumentType
+from app.models.tabletop import Tabletop
+
+
+class ScriptedLLMService:
+    """
+    Answers each section request after a delay, or fails it.
+
+    Requests are told apart by their task, e.g. "scenario_brief.content".
+    """
+
+    provider_name = "scripted"
+
+    def __init__(self, delays: Optional[Dict[str, float]] = None, errors: Optional[Dict[str, Exception]] = None):
+        self.delays = delays or {}
+        self.errors = errors or {}
+        self.started: List[str] = []
+        self.cancelled: List[str] = []
+        self.max_tokens: Dict[str, int] = {}
+
+    async def generate(self, prompt, max_tokens=4000, use_cache=None, task=None, tier=None) -> str:
+        section = task.split(".", 1)[1]
+        self.started.append(section)
+        self.max_tokens[section] = max_tokens
+        try:
+            await asyncio.sleep(self.delays.get(section, 0))
+        except asyncio.CancelledError:
+            self.cancelled.append(section)
+            raise
+        if section in self.errors:
+            raise self.errors[section]
+        return f"The {section}"
+
+
+@pytest.fixture
+def agent():
+    return get_agent_for_document_type(DocumentType.SCENARIO_BRIEF)
+
+
+@pytest.fixture
+def tabletop() -> Tabletop:
+    return Tabletop(title="Zombie Day", description="A zombie outbreak", questions=[])
+
+
+@pytest.mark.asyncio
+async def test_parallel_sections(agent, tabletop):
+    llm = ScriptedLLMService()
+
+    document = await agent.generate(tabletop, llm, parallel=True, structured=False)
+
+    assert (document.description, document.content, document.learning_goals) == (
+        "The description", "The content", "The learning_goals",
+    )
+    assert sorted(llm.started) == ["content", "description", "learning_goals"]
+
+
+@pytest.mark.asyncio
+async def test_failed_section_cancels_the_others(agent, tabletop):
+    llm = ScriptedLLMService(
+        delays={"content": 60, "learning_goals": 60},
+        errors={"description": RuntimeError("provider down")},
+    )
+
+    with pytest.raises(RuntimeError, match="provider down"):
+        await asyncio.wait_for(agent.generate(tabletop, llm, parallel=True, structured=False), 5)
+
+    assert sorted(llm.cancelled) == ["content", "learning_goals"]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("error", [RuntimeError("overloaded"), None])
+async def test_structured_call_falls_back_to_sections(agent, tabletop, error):
+    if error is None:
+        # The single call times out instead
+        llm = ScriptedLLMService(delays={"structured": 60})
+    else:
+        llm = ScriptedLLMService(errors={"structured": error})
+
+    document = await agent.generate(tabletop, llm, structured=True, section_timeout=0.05)
+
+    assert document.content == "The content"
+    assert llm.started[0] == "structured"
+    assert sorted(llm.started[1:]) == ["content", "description", "learning_goals"]
+    assert llm.max_tokens["structured"] == agent.structured_budget()
+
+
+def test_structured_timeout_scales_with_the_budget(agent):
+    # 300 + 4000 + 600 section tokens and 50 for the tags, against the 4000 of the content
+    assert agent.structured_budget() == 4950
+    assert agent.structured_timeout(400) == pytest.approx(495)
+    assert agent.structured_timeout(0) == 0
+
+
+@pytest.mark.parametrize("agent_class", AGENT_REGISTRY.values(), ids=lambda cls: cls.__name__)
+def test_every_agent_budgets_its_own_sections(agent_class):
+    assert "section_budgets" in vars(agent_class)
+    assert set(agent_class.section_budgets) == {"description", "content", "learning_goals"}
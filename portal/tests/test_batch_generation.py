@@ -0,0 +1,186 @@
+"""
+Batch generation through the local stand-in batch API of the mock provider.
+"""
+
+from datetime import datetime, timedelta
+from typing import List
+
+import pytest
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models.batch import BatchItem, BatchItemStatus, BatchRunStatus
+from app.models.document import Document, DocumentStatus, DocumentType
+from app.models.tabletop import QuestionType, Tabletop, TabletopQuestion
+from app.models.user import User
+from app.services.batch_generation import BatchGenerationService
+from app.services.job_queue import get_job_queue
+
+# Text of every learning goals prompt, used to make those requests fail
+LEARNING_GOALS_MARKER = "measurable learning objectives"
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def tabletop_ids(db) -> List[int]:
+    """Two tabletops with every question answered, and one draft."""
+    user = User(email="alice@example.com", username="alice", hashed_password="-")
+    db.add(user)
+    db.flush()
+
+    ids = []
+    for title, complete in (("Zombie Day", True), ("Zombie Night", True), ("Draft", False)):
+        tabletop = Tabletop(title=title, creator_id=user.id)
+        tabletop.questions = [
+            TabletopQuestion(
+                question_type=question_type,
+                question_text=f"About the {question_type.value}?",
+                answer="An answer long enough" if complete else None,
+            )
+            for question_type in QuestionType
+        ]
+        db.add(tabletop)
+        db.flush()
+        ids.append(tabletop.id)
+    db.commit()
+    return ids
+
+
+@pytest.fixture
+def service() -> BatchGenerationService:
+    return BatchGenerationService()
+
+
+def documents(db) -> List[Document]:
+    db.expire_all()
+    return db.query(Document).order_by(Document.tabletop_id, Document.id).all()
+
+
+@pytest.mark.asyncio
+async def test_batch_run_completes_documents(db, tabletop_ids, service):
+    run_ids = await service.start(
+        document_types=[DocumentType.SCENARIO_BRIEF, DocumentType.INJECT_CARDS],
+        provider="mock",
+    )
+    runs = await service.wait(run_ids, poll_interval=0)
+
+    assert [run.status for run in runs] == [BatchRunStatus.COMPLETED]
+    assert (runs[0].request_count, runs[0].succeeded_count, runs[0].failed_count) == (12, 12, 0)
+
+    generated = documents(db)
+    # The draft tabletop is skipped
+    assert {document.tabletop_id for document in generated} == set(tabletop_ids[:2])
+    assert len(generated) == 4
+    for document in generated:
+        assert document.status == DocumentStatus.COMPLETED
+        assert document.title.endswith(document.document_type.value.replace("_", " ").title())
+        assert document.description and document.content and document.learning_goals
+        assert document.pdf_file_path
+        assert document.agent_name
+
+
+@pytest.mark.asyncio
+async def test_runs_are_split_keeping_documents_together(db, tabletop_ids, service, monkeypatch):
+    monkeypatch.setattr(settings, "BATCH_MAX_REQUESTS", 4)
+
+    run_ids = await service.start(document_types=[DocumentType.SCENARIO_BRIEF], provider="mock")
+    runs = await service.wait(run_ids, poll_interval=0)
+
+    # Three section requests per document, so one document per run
+    assert [run.request_count for run in runs] == [3, 3]
+    assert all(run.status == BatchRunStatus.COMPLETED for run in runs)
+    assert all(document.status == DocumentStatus.COMPLETED for document in documents(db))
+
+
+@pytest.mark.asyncio
+async def test_failed_section_fails_its_document(db, tabletop_ids, service, monkeypatch):
+    monkeypatch.setattr(settings, "BATCH_LOCAL_FAIL_MARKER", LEARNING_GOALS_MARKER)
+
+    run_ids = await service.start(document_types=[DocumentType.SCENARIO_BRIEF], provider="mock")
+    [run] = await service.wait(run_ids, poll_interval=0)
+
+    assert run.status == BatchRunStatus.COMPLETED
+    assert (run.succeeded_count, run.failed_count) == (4, 2)
+
+    failed_sections = {
+        item.section
+        for item in db.query(BatchItem).filter(BatchItem.status == BatchItemStatus.FAILED)
+    }
+    assert failed_sections == {"learning_goals"}
+    for document in documents(db):
+        assert document.status == DocumentStatus.FAILED
+        assert document.error_message == "learning goals: Simulated request failure"
+        assert document.pdf_file_path is None
+
+
+@pytest.mark.asyncio
+async def test_start_skips_generating_documents(db, tabletop_ids, service):
+    db.add(Document(
+        tabletop_id=tabletop_ids[0],
+        document_type=DocumentType.SCENARIO_BRIEF,
+        status=DocumentStatus.GENERATING,
+    ))
+    db.commit()
+
+    run_ids = await service.start(document_types=[DocumentType.SCENARIO_BRIEF], provider="mock")
+    [run] = await service.wait(run_ids, poll_interval=0)
+
+    assert run.request_count == 3
+    statuses = {document.tabletop_id: document.status for document in documents(db)}
+    assert statuses == {
+        tabletop_ids[0]: DocumentStatus.GENERATING,
+        tabletop_ids[1]: DocumentStatus.COMPLETED,
+    }
+
+
+@pytest.mark.asyncio
+async def test_cancelled_run_fails_unfinished_documents(db, tabletop_ids, service, monkeypatch):
+    monkeypatch.setattr(settings, "BATCH_LOCAL_DELAY", 3600)
+
+    [run_id] = await service.start(document_types=[DocumentType.SCENARIO_BRIEF], provider="mock")
+    run = await service.poll(run_id)
+    assert run.status == BatchRunStatus.SUBMITTED
+    assert all(document.status == DocumentStatus.GENERATING for document in documents(db))
+
+    await service.cancel(run_id)
+    run = await service.poll(run_id)
+
+    assert run.status == BatchRunStatus.COMPLETED
+    assert (run.succeeded_count, run.failed_count) == (0, 6)
+    assert all(document.status == DocumentStatus.FAILED for document in documents(db))
+
+
+@pytest.mark.asyncio
+async def test_requeue_stale_skips_documents_waiting_for_a_batch(db, tabletop_ids, service, monkeypatch):
+    monkeypatch.setattr(settings, "BATCH_LOCAL_DELAY", 3600)
+    await service.start(
+        tabletop_ids=[tabletop_ids[0]],
+        document_types=[DocumentType.SCENARIO_BRIEF],
+        provider="mock",
+    )
+    # A job left behind by a crashed worker
+    db.add(Document(
+        tabletop_id=tabletop_ids[1],
+        document_type=DocumentType.SCENARIO_BRIEF,
+        status=DocumentStatus.GENERATING,
+    ))
+    db.commit()
+    db.query(Document).update({"updated_at": datetime.utcnow() - timedelta(days=1)})
+    db.commit()
+
+    requeued = get_job_queue().requeue_stale(db, timedelta(hours=1))
+
+    assert requeued == 1
+    statuses = {document.tabletop_id: document.status for document in documents(db)}
+    assert statuses == {
+        tabletop_ids[0]: DocumentStatus.GENERATING,
+        tabletop_ids[1]: DocumentStatus.PENDING,
+    }
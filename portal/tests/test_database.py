@@ -0,0 +1,40 @@
+"""
+Schema checks on startup.
+"""
+
+import pytest
+from alembic.runtime.migration import MigrationContext
+from sqlalchemy import text
+
+from app.database import SchemaOutOfDateError, _migration_scripts, engine, init_db
+
+
+def stamp(revision: str) -> None:
+    with engine.begin() as connection:
+        MigrationContext.configure(connection).stamp(_migration_scripts(), revision)
+
+
+def test_new_database_is_stamped_as_migrated():
+    with engine.connect() as connection:
+        assert MigrationContext.configure(connection).get_current_heads() == tuple(
+            _migration_scripts().get_heads()
+        )
+
+
+def test_existing_database_with_pending_migrations_fails_fast():
+    stamp("0004")
+    try:
+        with pytest.raises(SchemaOutOfDateError, match="at revision 0004.*alembic upgrade head"):
+            init_db()
+    finally:
+        stamp("head")
+
+
+def test_database_created_before_migrations_fails_fast():
+    with engine.begin() as connection:
+        connection.execute(text("DROP TABLE alembic_version"))
+    try:
+        with pytest.raises(SchemaOutOfDateError, match="at revision none"):
+            init_db()
+    finally:
+        stamp("head")
@@ -0,0 +1,61 @@
+"""
+Document generation over Server-Sent Events.
+"""
+
+import json
+from typing import List, Tuple
+
+from app.database import SessionLocal
+from app.models.document import Document, DocumentStatus, DocumentType
+
+
+def parse_events(body: str) -> List[Tuple[str, dict]]:
+    events = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+def test_stream_generates_the_document(client, auth_headers, create_tabletop):
+    tabletop = create_tabletop()
+
+    response = client.post(
+        f"/api/documents/tabletop/{tabletop['id']}/generate/scenario_brief/stream",
+        headers=auth_headers,
+    )
+
+    assert response.status_code == 200
+    events = parse_events(response.text)
+    assert events[0] == ("status", {
+        "document_id": events[0][1]["document_id"],
+        "status": DocumentStatus.GENERATING.value,
+        "error_message": None,
+    })
+    assert events[-1][1]["status"] == DocumentStatus.COMPLETED.value
+    content = "".join(data["text"] for event, data in events if data.get("section") == "content")
+    document = client.get(f"/api/documents/{events[0][1]['document_id']}", headers=auth_headers).json()
+    assert document["content"] == content
+
+
+def test_stream_refuses_a_document_that_is_already_generating(client, auth_headers, create_tabletop):
+    tabletop = create_tabletop()
+    with SessionLocal() as db:
+        # Claimed by a worker or a batch run
+        db.add(Document(
+            tabletop_id=tabletop["id"],
+            document_type=DocumentType.SCENARIO_BRIEF,
+            status=DocumentStatus.GENERATING,
+        ))
+        db.commit()
+
+    response = client.post(
+        f"/api/documents/tabletop/{tabletop['id']}/generate/scenario_brief/stream",
+        headers=auth_headers,
+    )
+
+    assert response.status_code == 409
+    with SessionLocal() as db:
+        [document] = db.query(Document).all()
+        assert document.status == DocumentStatus.GENERATING
+        assert document.content is None
@@ -0,0 +1,238 @@
+"""
+Circuit breaking, retries, timeouts and hedging of LLM requests, on a fake clock.
+"""
+
+import asyncio
+from typing import List, Union
+
+import pytest
+
+from app.prompt import Prompt
+from app.services import llm_policy
+from app.services.llm_policy import (
+    CallPolicy,
+    CircuitBreaker,
+    CircuitOpenError,
+    LLMTimeoutError,
+    ProviderHealth,
+    call_with_policy,
+)
+from app.services.llm_service import MockProvider
+
+
+class FakeClock:
+    """A clock that only moves when told to."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class APIError(Exception):
+    """A provider error response."""
+
+    def __init__(self, status_code: int):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+class ScriptedCall:
+    """
+    Sends a request to the mock provider, after failing or stalling attempts as scripted.
+
+    Each step of the script applies to one attempt: an exception is raised,
+    and a number is the seconds to wait before the request is sent.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, *script: Union[Exception, float]):
+        self.loop = loop
+        self.script = list(script)
+        self.started: List[float] = []
+        self.provider = MockProvider()
+
+    async def __call__(self) -> str:
+        self.started.append(self.loop.time())
+        step = self.script.pop(0) if self.script else 0
+        if isinstance(step, Exception):
+            raise step
+        await asyncio.sleep(step)
+        return await self.provider.generate(Prompt(suffix="Write the content"), 100)
+
+
+@pytest.fixture
+def clock() -> FakeClock:
+    return FakeClock()
+
+
+@pytest.fixture
+def breaker(clock) -> CircuitBreaker:
+    return CircuitBreaker(failure_threshold=3, reset_timeout=30, clock=clock)
+
+
+@pytest.fixture
+def health(virtual_time) -> ProviderHealth:
+    return ProviderHealth(CircuitBreaker(failure_threshold=3, reset_timeout=30, clock=virtual_time.time))
+
+
+@pytest.fixture
+def longest_backoff(monkeypatch):
+    """Make the jittered backoff always wait its maximum."""
+    monkeypatch.setattr(llm_policy.random, "uniform", lambda low, high: high)
+
+
+def open_breaker(breaker: CircuitBreaker) -> None:
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+
+
+def test_breaker_opens_after_consecutive_failures(breaker):
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow()
+
+    breaker.record_failure()
+
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+
+
+def test_breaker_lets_one_trial_through_after_the_reset_timeout(breaker, clock):
+    open_breaker(breaker)
+
+    clock.now = 29.9
+    assert not breaker.allow()
+    clock.now = 30
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow()
+    assert not breaker.allow()
+
+    breaker.record_success()
+
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.failures == 0
+
+
+def test_failed_trial_reopens_the_breaker(breaker, clock):
+    open_breaker(breaker)
+    clock.now = 30
+    assert breaker.allow()
+
+    breaker.record_failure()
+
+    assert breaker.state == CircuitBreaker.OPEN
+    clock.now = 59.9
+    assert not breaker.allow()
+    clock.now = 60
+    assert breaker.allow()
+
+
+def test_released_trial_can_be_claimed_again(breaker, clock):
+    open_breaker(breaker)
+    clock.now = 30
+    assert breaker.allow()
+
+    breaker.release()
+
+    assert breaker.allow()
+
+
+def test_transient_failures_are_retried_with_backoff(virtual_time, health, longest_backoff):
+    call = ScriptedCall(virtual_time, APIError(503), APIError(502))
+    policy = CallPolicy(timeout=10, max_attempts=3, backoff_base=1, backoff_max=30)
+
+    result = virtual_time.run_until_complete(call_with_policy(call, health, policy))
+
+    assert result
+    assert call.started == [0, 1, 3]
+    assert (health.failures, health.successes) == (2, 1)
+    assert health.breaker.state == CircuitBreaker.CLOSED
+
+
+def test_invalid_requests_are_not_retried(virtual_time, health):
+    call = ScriptedCall(virtual_time, APIError(400))
+
+    with pytest.raises(APIError):
+        virtual_time.run_until_complete(call_with_policy(call, health, CallPolicy(max_attempts=3)))
+
+    assert len(call.started) == 1
+    assert health.failures == 0
+
+
+def test_attempts_time_out(virtual_time, health, longest_backoff):
+    call = ScriptedCall(virtual_time, 60, 60)
+    policy = CallPolicy(timeout=5, max_attempts=2, backoff_base=1)
+
+    with pytest.raises(LLMTimeoutError):
+        virtual_time.run_until_complete(call_with_policy(call, health, policy))
+
+    assert call.started == [0, 6]
+    assert virtual_time.time() == pytest.approx(11)
+    assert health.failures == 2
+
+
+def test_open_circuit_fails_fast_until_a_trial_succeeds(virtual_time, health):
+    call = ScriptedCall(virtual_time, APIError(503), APIError(503), APIError(503))
+    policy = CallPolicy(max_attempts=5, backoff_base=0)
+
+    with pytest.raises(CircuitOpenError):
+        virtual_time.run_until_complete(call_with_policy(call, health, policy))
+    assert len(call.started) == 3
+
+    with pytest.raises(CircuitOpenError):
+        virtual_time.run_until_complete(call_with_policy(call, health, policy))
+    assert len(call.started) == 3
+
+    virtual_time.run_until_complete(asyncio.sleep(30))
+    assert virtual_time.run_until_complete(call_with_policy(call, health, policy))
+    assert health.breaker.state == CircuitBreaker.CLOSED
+
+
+def test_cancelled_trial_is_released(virtual_time, health):
+    open_breaker(health.breaker)
+    virtual_time.run_until_complete(asyncio.sleep(30))
+    stalled = ScriptedCall(virtual_time, 60)
+
+    with pytest.raises(TimeoutError):
+        virtual_time.run_until_complete(
+            asyncio.wait_for(call_with_policy(stalled, health, CallPolicy()), 1)
+        )
+
+    assert health.breaker.state == CircuitBreaker.HALF_OPEN
+    assert health.breaker.allow()
+
+
+def test_slow_attempt_is_hedged(virtual_time, health):
+    for _ in range(20):
+        health.latency.record(1.0)
+    call = ScriptedCall(virtual_time, 60)
+    admission_delays = iter([5, 0])
+
+    async def admit():
+        await asyncio.sleep(next(admission_delays))
+
+    policy = CallPolicy(timeout=120, hedge=True, hedge_min_samples=20)
+    result = virtual_time.run_until_complete(call_with_policy(call, health, policy, admit=admit))
+
+    assert result
+    # The hedge is sent 1s (the p95) after the first request left the queue
+    assert call.started == [5, 6]
+    assert virtual_time.time() == pytest.approx(6.1)
+    assert health.hedged == 1
+
+
+def test_fast_attempt_is_not_hedged(virtual_time, health):
+    for _ in range(20):
+        health.latency.record(1.0)
+    call = ScriptedCall(virtual_time)
+
+    policy = CallPolicy(timeout=120, hedge=True, hedge_min_samples=20)
+    virtual_time.run_until_complete(call_with_policy(call, health, policy))
+
+    assert call.started == [0]
+    assert health.hedged == 0
@@ -0,0 +1,106 @@
+"""
+Markdown tokenizer and HTML renderer.
+"""
+
+from app.services.markdown_parser import (
+    CODE,
+    HEADING,
+    LIST_END,
+    LIST_ITEM,
+    LIST_START,
+    PARAGRAPH,
+    QUOTE,
+    RULE,
+    TABLE,
+    Token,
+    format_inline,
+    render_html,
+    tokenize,
+)
+
+
+def html(text: str) -> str:
+    return render_html(tokenize(text)).replace("\n", "")
+
+
+def test_blocks():
+    tokens = list(tokenize(
+        "# Title\n"
+        "First line\nsecond line\n"
+        "\n"
+        "> Quoted\n"
+        "---\n"
+        "| Name | Role |\n|------|------|\n| Ann | Medic |\n"
+        "```\n  keep   spacing\n```\n"
+    ))
+
+    assert tokens == [
+        Token(HEADING, "Title", level=1),
+        Token(PARAGRAPH, "First line second line"),
+        Token(QUOTE, "Quoted"),
+        Token(RULE),
+        Token(TABLE, rows=(("Name", "Role"), ("Ann", "Medic"))),
+        Token(CODE, "  keep   spacing"),
+    ]
+
+
+def test_nested_lists():
+    tokens = list(tokenize("1. One\n2. Two\n   - Sub\n     - Deeper\n3. Three"))
+
+    assert [(token.type, token.text, token.level, token.ordered) for token in tokens] == [
+        (LIST_START, "", 0, True),
+        (LIST_ITEM, "One", 0, True),
+        (LIST_ITEM, "Two", 0, True),
+        (LIST_START, "", 1, False),
+        (LIST_ITEM, "Sub", 1, False),
+        (LIST_START, "", 2, False),
+        (LIST_ITEM, "Deeper", 2, False),
+        (LIST_END, "", 2, False),
+        (LIST_END, "", 1, False),
+        (LIST_ITEM, "Three", 0, True),
+        (LIST_END, "", 0, True),
+    ]
+
+
+def test_switching_list_kind_starts_a_new_list():
+    tokens = list(tokenize("- Bullet\n1. Number"))
+
+    assert [(token.type, token.ordered) for token in tokens] == [
+        (LIST_START, False), (LIST_ITEM, False), (LIST_END, False),
+        (LIST_START, True), (LIST_ITEM, True), (LIST_END, True),
+    ]
+
+
+def test_unclosed_fence_keeps_its_code():
+    assert list(tokenize("```\ncode\n- not a list")) == [Token(CODE, "code\n- not a list")]
+
+
+def test_nested_list_html_is_inside_its_parent_item():
+    assert html("- A\n  - A1\n  - A2\n- B") == (
+        "<ul><li>A<ul><li>A1</li><li>A2</li></ul></li><li>B</li></ul>"
+    )
+
+
+def test_list_nested_without_a_parent_item_gets_one():
+    tokens = [
+        Token(LIST_START),
+        Token(LIST_START, level=1),
+        Token(LIST_ITEM, "Orphan", level=1),
+        Token(LIST_END, level=1),
+        Token(LIST_END),
+    ]
+
+    assert render_html(tokens).replace("\n", "") == "<ul><li><ul><li>Orphan</li></ul></li></ul>"
+
+
+def test_html_is_escaped():
+    assert html("Fish & <chips> **<b>** `a<b`") == (
+        "<p>Fish &amp; &lt;chips&gt; <strong>&lt;b&gt;</strong> <code>a&lt;b</code></p>"
+    )
+    assert html("```\n<script>&\n```") == "<pre><code>&lt;script&gt;&amp;</code></pre>"
+    assert html("| <x> |\n|---|") == "<table><tr><th>&lt;x&gt;</th></tr></table>"
+
+
+def test_inline_formatting_nests():
+    assert format_inline("**bold *and italic* too**") == "<b>bold <i>and italic</i> too</b>"
+    assert format_inline("`**not bold**`") == '<font face="Courier">**not bold**</font>'
@@ -0,0 +1,41 @@
+"""
+Keyset pagination of the tabletop listing.
+"""
+
+from datetime import datetime
+
+import pytest
+
+from app.repositories import NEXT_CURSOR_HEADER, InvalidCursorError, decode_cursor, encode_cursor
+
+
+def test_cursor_pages_follow_each_other(client, auth_headers, create_tabletop):
+    titles = [f"Tabletop {i}" for i in range(5)]
+    for title in titles:
+        create_tabletop(title, complete=False)
+
+    pages = []
+    response = client.get("/api/tabletops/?limit=2", headers=auth_headers)
+    pages.append([tabletop["title"] for tabletop in response.json()])
+    while NEXT_CURSOR_HEADER in response.headers:
+        response = client.get(
+            f"/api/tabletops/?limit=2&cursor={response.headers[NEXT_CURSOR_HEADER]}",
+            headers=auth_headers,
+        )
+        pages.append([tabletop["title"] for tabletop in response.json()])
+
+    # Newest first
+    assert pages == [titles[4:2:-1], titles[2:0:-1], titles[:1]]
+
+
+def test_invalid_cursor_is_rejected(client, auth_headers):
+    response = client.get("/api/tabletops/?cursor=not-a-cursor", headers=auth_headers)
+
+    assert response.status_code == 400
+
+
+def test_cursor_round_trip():
+    created_at = datetime(2026, 10, 17, 12, 30, 15, 250000)
+    assert decode_cursor(encode_cursor(created_at, 42)) == (created_at, 42)
+    with pytest.raises(InvalidCursorError):
+        decode_cursor("e30")
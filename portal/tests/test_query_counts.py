@@ -0,0 +1,79 @@
+"""
+Queries issued per request by the busiest endpoints.
+
+Counts include the lookup of the authenticated user (the principal cache is
+disabled in tests). A higher count usually means a relationship is being
+lazy loaded per row again; load it in app.repositories instead.
+"""
+
+from app.models.document import DocumentType
+
+
+def test_list_tabletops(client, auth_headers, create_tabletop, count_queries):
+    # User, tabletops, and one SELECT ... IN for all of their questions
+    for i in range(6):
+        create_tabletop(f"Tabletop {i}")
+
+    with count_queries() as queries:
+        response = client.get("/api/tabletops/", headers=auth_headers)
+
+    assert response.status_code == 200
+    assert len(response.json()) == 6
+    assert queries.count == 3
+
+
+def test_get_tabletop(client, auth_headers, create_tabletop, count_queries):
+    # User, and the tabletop joined with its questions
+    tabletop = create_tabletop()
+
+    with count_queries() as queries:
+        response = client.get(f"/api/tabletops/{tabletop['id']}", headers=auth_headers)
+
+    assert response.status_code == 200
+    assert len(response.json()["questions"]) == 4
+    assert queries.count == 2
+
+
+def test_complete_tabletop(client, auth_headers, create_tabletop, count_queries):
+    tabletop = create_tabletop()
+
+    with count_queries() as queries:
+        response = client.post(f"/api/tabletops/{tabletop['id']}/complete", headers=auth_headers)
+
+    assert response.status_code == 200
+    assert response.json()["status"] == "completed"
+    assert queries.count == 3
+
+
+def test_generate_documents(client, auth_headers, create_tabletop, count_queries):
+    # User, tabletop with questions, existing documents, and the insert
+    tabletop = create_tabletop()
+
+    with count_queries() as queries:
+        response = client.post(
+            f"/api/documents/tabletop/{tabletop['id']}/generate",
+            json={"document_types": [DocumentType.SCENARIO_BRIEF.value]},
+            headers=auth_headers,
+        )
+
+    assert response.status_code == 202
+    assert [document["status"] for document in response.json()] == ["pending"]
+    assert queries.count == 4
+
+
+def test_list_tabletop_documents(client, auth_headers, create_tabletop, count_queries):
+    # User, the tabletop's ownership check, and its documents
+    tabletop = create_tabletop()
+    document_types = [DocumentType.SCENARIO_BRIEF, DocumentType.INJECT_CARDS, DocumentType.FACILITATOR_GUIDE]
+    client.post(
+        f"/api/documents/tabletop/{tabletop['id']}/generate",
+        json={"document_types": [document_type.value for document_type in document_types]},
+        headers=auth_headers,
+    )
+
+    with count_queries() as queries:
+        response = client.get(f"/api/documents/tabletop/{tabletop['id']}", headers=auth_headers)
+
+    assert response.status_code == 200
+    assert len(response.json()) == 3
+    assert queries.count == 3
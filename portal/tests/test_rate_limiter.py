@@ -0,0 +1,124 @@
+"""
+Rate-limiter admission, on a virtual clock.
+"""
+
+import asyncio
+from typing import List, Tuple
+
+import pytest
+
+from app.services.rate_limiter import Priority, RateLimiter
+
+
+def limiter_on(loop: asyncio.AbstractEventLoop, requests_per_minute: int = 0, tokens_per_minute: int = 0) -> RateLimiter:
+    return RateLimiter(requests_per_minute, tokens_per_minute, clock=loop.time)
+
+
+async def admit(limiter: RateLimiter, requests: List[Tuple[str, int, Priority]]) -> List[Tuple[str, float]]:
+    """Queue the requests in order; returns when each was admitted."""
+    loop = asyncio.get_running_loop()
+    admitted = []
+
+    async def send(name: str, tokens: int, priority: Priority) -> None:
+        await limiter.acquire(tokens, priority)
+        admitted.append((name, loop.time()))
+
+    tasks = [asyncio.create_task(send(*request)) for request in requests]
+    await asyncio.gather(*tasks)
+    return admitted
+
+
+def drain(limiter: RateLimiter) -> None:
+    limiter.requests.take(limiter.requests.per_minute)
+
+
+def test_requests_wait_for_the_bucket_to_refill(virtual_time):
+    limiter = limiter_on(virtual_time, requests_per_minute=60)
+
+    admitted = virtual_time.run_until_complete(admit(limiter, [
+        (f"request {i}", 0, Priority.INTERACTIVE) for i in range(62)
+    ]))
+
+    assert [seconds for _, seconds in admitted] == [0] * 60 + [pytest.approx(1), pytest.approx(2)]
+
+
+def test_tokens_wait_for_the_bucket_to_refill(virtual_time):
+    limiter = limiter_on(virtual_time, tokens_per_minute=6000)
+
+    admitted = virtual_time.run_until_complete(admit(limiter, [
+        ("first", 6000, Priority.INTERACTIVE),
+        ("second", 3000, Priority.INTERACTIVE),
+        # Larger than the whole limit: admitted once the bucket is full
+        ("huge", 9000, Priority.INTERACTIVE),
+    ]))
+
+    assert admitted == [("first", 0), ("second", pytest.approx(30)), ("huge", pytest.approx(90))]
+
+
+def test_interactive_requests_are_admitted_before_bulk_requests(virtual_time):
+    limiter = limiter_on(virtual_time, requests_per_minute=60)
+    drain(limiter)
+
+    admitted = virtual_time.run_until_complete(admit(limiter, [
+        ("bulk 1", 0, Priority.BULK),
+        ("bulk 2", 0, Priority.BULK),
+        ("interactive", 0, Priority.INTERACTIVE),
+    ]))
+
+    assert admitted == [
+        ("interactive", pytest.approx(1)),
+        ("bulk 1", pytest.approx(2)),
+        ("bulk 2", pytest.approx(3)),
+    ]
+
+
+def test_cancelled_request_gives_up_its_place(virtual_time):
+    limiter = limiter_on(virtual_time, requests_per_minute=60)
+    drain(limiter)
+
+    async def cancel_first() -> List[Tuple[str, float]]:
+        first = asyncio.create_task(limiter.acquire(0))
+        queued = asyncio.create_task(admit(limiter, [("second", 0, Priority.INTERACTIVE)]))
+        await asyncio.sleep(0.5)
+        assert limiter.queue_depth == 2
+        first.cancel()
+        return await queued
+
+    assert virtual_time.run_until_complete(cancel_first()) == [("second", pytest.approx(1))]
+    assert limiter.queue_depth == 0
+
+
+def test_429_pauses_admission_for_the_retry_after(virtual_time):
+    limiter = limiter_on(virtual_time)
+
+    assert limiter.throttle({"retry-after": "20"}) == 20
+    admitted = virtual_time.run_until_complete(admit(limiter, [
+        ("bulk", 0, Priority.BULK),
+        ("interactive", 0, Priority.INTERACTIVE),
+    ]))
+
+    assert admitted == [("interactive", pytest.approx(20)), ("bulk", pytest.approx(20))]
+
+
+def test_429_without_retry_after_pauses_for_the_default_delay(virtual_time):
+    limiter = limiter_on(virtual_time)
+
+    assert limiter.throttle({}, default_delay=1.5) == 1.5
+    admitted = virtual_time.run_until_complete(admit(limiter, [("request", 0, Priority.INTERACTIVE)]))
+
+    assert admitted == [("request", pytest.approx(1.5))]
+
+
+def test_headers_correct_the_limits(virtual_time):
+    limiter = limiter_on(virtual_time, requests_per_minute=600, tokens_per_minute=10000)
+
+    limiter.update_from_headers({
+        "x-ratelimit-limit-requests": "120",
+        "x-ratelimit-remaining-requests": "0",
+        "x-ratelimit-limit-tokens": "50000",
+    })
+
+    # The provider's lower request limit is adopted; the configured token limit is kept
+    assert (limiter.requests.per_minute, limiter.tokens.per_minute) == (120, 10000)
+    admitted = virtual_time.run_until_complete(admit(limiter, [("request", 0, Priority.INTERACTIVE)]))
+    assert admitted == [("request", pytest.approx(0.5))]
@@ -0,0 +1,103 @@
+"""
+Document worker job handling.
+"""
+
+import pytest
+
+from app.database import SessionLocal, create_async_db
+from app.models.document import Document, DocumentStatus, DocumentType
+from app.models.tabletop import Tabletop
+from app.models.user import User
+from app.services.document_service import DocumentGenerationService
+from app.services.job_queue import get_job_queue
+from app.services.llm_cache import LLMResponseCache
+from app.services.llm_service import LLMService, MockProvider
+from app.worker import DocumentWorker
+
+
+class BrokenDocumentService:
+    """Fails the way a database error outside the agent would."""
+
+    async def generate_document(self, db, tabletop, document_type, use_cache=None):
+        raise RuntimeError("database is locked")
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def document_id(db) -> int:
+    """A queued document of a tabletop."""
+    user = User(email="alice@example.com", username="alice", hashed_password="-")
+    db.add(user)
+    db.flush()
+    tabletop = Tabletop(title="Zombie Day", creator_id=user.id)
+    db.add(tabletop)
+    db.commit()
+    [document] = get_job_queue().enqueue(db, tabletop, [DocumentType.SCENARIO_BRIEF])
+    return document.id
+
+
+async def run_next_job(worker: DocumentWorker) -> int:
+    """Claim and process the next queued document."""
+    db = create_async_db()
+    try:
+        document_id = await db.run(get_job_queue().claim_next)
+    finally:
+        await db.close()
+    assert document_id is not None
+    await worker.process(document_id)
+    return document_id
+
+
+@pytest.mark.asyncio
+async def test_job_error_outside_the_agent_fails_the_document(db, document_id):
+    worker = DocumentWorker(concurrency=1, document_service=BrokenDocumentService())
+
+    assert await run_next_job(worker) == document_id
+
+    document = db.get(Document, document_id)
+    assert document.status == DocumentStatus.FAILED
+    assert document.error_message == "database is locked"
+
+
+@pytest.mark.asyncio
+async def test_regenerate_bypasses_the_llm_cache(client, auth_headers, create_tabletop, monkeypatch):
+    calls = []
+    mock_generate = MockProvider.generate
+
+    async def generate(self, prompt, max_tokens=4000, model=None):
+        calls.append(prompt)
+        return await mock_generate(self, prompt, max_tokens, model)
+
+    monkeypatch.setattr(MockProvider, "generate", generate)
+    llm_service = LLMService(provider="mock", cache=LLMResponseCache(max_entries=100, ttl=3600))
+    worker = DocumentWorker(
+        concurrency=1,
+        document_service=DocumentGenerationService(llm_service=llm_service),
+    )
+    tabletop = create_tabletop()
+    generate_url = f"/api/documents/tabletop/{tabletop['id']}/generate/scenario_brief"
+
+    document_id = client.post(generate_url, headers=auth_headers).json()["id"]
+    await run_next_job(worker)
+    assert len(calls) == 3
+
+    # Generating again with unchanged answers is served from the cache
+    client.post(generate_url, headers=auth_headers)
+    await run_next_job(worker)
+    assert len(calls) == 3
+
+    response = client.post(f"/api/documents/{document_id}/regenerate", headers=auth_headers)
+    assert response.status_code == 202
+    assert await run_next_job(worker) == document_id
+    assert len(calls) == 6
+
+    document = client.get(f"/api/documents/{document_id}", headers=auth_headers).json()
+    assert document["status"] == DocumentStatus.COMPLETED.value